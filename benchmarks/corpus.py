@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Generator corpus PDF sintetis untuk benchmark (deterministic per seed)
+
+Jenis dokumen:
+    text     - paragraf native text
+    table    - table dengan garis (ruled) plus sedikit text
+    image    - native text plus beberapa image raster berisi text (untuk OCR)
+    scanned  - satu image raster per halaman tanpa text layer (hasil scan)
+    mixed    - bergantian text, table, image dan scanned
+
+Usage:
+    python benchmarks/corpus.py OUTPUT_DIR [--spec text:20 table:20 image:10 scanned:10 mixed:50] [--seed 0]
+
+Setiap entry spec "kind:pages" menghasilkan satu PDF dengan jumlah halaman tersebut (1 - 2000).
+"""
+
+import argparse
+import json
+import os
+import random
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+PAGE_KINDS = ["text", "table", "image", "scanned"]
+DOCUMENT_KINDS = PAGE_KINDS + ["mixed"]
+DEFAULT_SPEC = ["text:20", "table:20", "image:10", "scanned:10", "mixed:50"]
+MAX_PAGES = 2000
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua laporan keuangan tahun anggaran "
+    "pendapatan biaya total jumlah nilai persen kg unit"
+).split()
+
+
+def random_sentence(rng: random.Random, words: int = 10) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def render_text_image(lines: list, width: int = 600, height: int = 200, dpi: int = 150) -> bytes:
+    """Render beberapa baris text ke PNG (dipakai sebagai image/scan yang perlu OCR)"""
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    for index, line in enumerate(lines):
+        page.insert_text((20, 40 + index * 28), line, fontsize=16)
+    png = page.get_pixmap(dpi=dpi).tobytes("png")
+    doc.close()
+    return png
+
+
+class CorpusBuilder:
+    """Tambah halaman per jenis ke dokumen; image raster di-share per dokumen (xref reuse) supaya file tetap kecil"""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self._image_xrefs = {}
+
+    def _insert_shared_image(self, page, rect, key: str, lines: list, **render_args):
+        xref = self._image_xrefs.get(key)
+        if xref:
+            page.insert_image(rect, xref=xref)
+        else:
+            self._image_xrefs[key] = page.insert_image(rect, stream=render_text_image(lines, **render_args))
+
+    def add_text_page(self, doc):
+        page = doc.new_page()
+        shape = page.new_shape()
+        shape.insert_text((72, 72), random_sentence(self.rng, 4).upper(), fontsize=16)
+        lines = [random_sentence(self.rng, 9) for _ in range(48)]
+        shape.insert_text((72, 102), "\n".join(lines), fontsize=10, lineheight=1.4)
+        shape.commit()
+
+    def add_table_page(self, doc):
+        page = doc.new_page()
+        shape = page.new_shape()
+        shape.insert_text((72, 72), random_sentence(self.rng, 6), fontsize=12)
+        rows = self.rng.randint(8, 20)
+        cols = self.rng.randint(3, 6)
+        x0, y0, cell_width, cell_height = 72, 100, 460 / cols, 20
+        for row in range(rows + 1):
+            shape.draw_line((x0, y0 + row * cell_height), (x0 + cols * cell_width, y0 + row * cell_height))
+        for col in range(cols + 1):
+            shape.draw_line((x0 + col * cell_width, y0), (x0 + col * cell_width, y0 + rows * cell_height))
+        shape.finish(width=0.5)
+        # Satu insert_text per kolom (multi-line) jauh lebih cepat daripada per cell
+        for col in range(cols):
+            values = [f"Header {col + 1}"] + [str(self.rng.randint(0, 99999)) for _ in range(rows - 1)]
+            shape.insert_text(
+                (x0 + col * cell_width + 4, y0 + 14), "\n".join(values), fontsize=9, lineheight=cell_height / 9
+            )
+        shape.commit()
+
+    def add_image_page(self, doc):
+        page = doc.new_page()
+        page.insert_text((72, 72), random_sentence(self.rng, 8), fontsize=11)
+        for index in range(3):
+            rect = fitz.Rect(72, 100 + index * 220, 522, 250 + index * 220)
+            self._insert_shared_image(
+                page, rect, f"image_{index}",
+                [f"Figure {index + 1}", "Scanned caption text", "Total 42 kg"]
+            )
+
+    def add_scanned_page(self, doc):
+        page = doc.new_page()
+        variant = self.rng.randint(0, 3)
+        lines = [f"Scanned document page variant {variant}"] + [
+            " ".join(WORDS[(variant + line) % len(WORDS):][:6]) for line in range(20)
+        ]
+        self._insert_shared_image(
+            page, page.rect, f"scan_{variant}", lines, width=612, height=792, dpi=120
+        )
+
+    def add_page(self, doc, kind: str):
+        getattr(self, f"add_{kind}_page")(doc)
+
+
+def generate_pdf(path: str, kind: str, pages: int, seed: int = 0) -> str:
+    """Generate satu PDF sintetis"""
+    if kind not in DOCUMENT_KINDS:
+        raise ValueError(f"Unknown document kind: {kind}")
+    if not 1 <= pages <= MAX_PAGES:
+        raise ValueError(f"pages must be between 1 and {MAX_PAGES}")
+
+    builder = CorpusBuilder(seed)
+    doc = fitz.open()
+    for page_index in range(pages):
+        builder.add_page(doc, PAGE_KINDS[page_index % len(PAGE_KINDS)] if kind == "mixed" else kind)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def parse_spec(spec: list) -> list:
+    """["text:20", "mixed:2000"] -> [("text", 20), ("mixed", 2000)]"""
+    entries = []
+    for entry in spec:
+        kind, _, pages = entry.partition(":")
+        entries.append((kind, int(pages or 1)))
+    return entries
+
+
+def generate_corpus(directory: str, spec: list = None, seed: int = 0) -> list:
+    """Generate satu PDF per entry spec, return list path"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, (kind, pages) in enumerate(parse_spec(spec or DEFAULT_SPEC)):
+        path = os.path.join(directory, f"{index:02d}_{kind}_{pages}p.pdf")
+        paths.append(generate_pdf(path, kind, pages, seed + index))
+    return paths
+
+
+def collect_pdfs(paths: list) -> list:
+    """Expand file dan directory argumen menjadi list PDF"""
+    pdf_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdf_files.extend(sorted(str(p) for p in Path(path).rglob("*.pdf")))
+        else:
+            pdf_files.append(path)
+    return pdf_files
+
+
+def build_prefilter_corpus(directory: str) -> list:
+    """Corpus kecil untuk table pre-filter: text-only, ruled table, boxed figure dan table tanpa garis"""
+    path = os.path.join(directory, "table_prefilter_sample.pdf")
+    doc = fitz.open()
+
+    # Text-only page
+    page = doc.new_page()
+    for line in range(40):
+        page.insert_text((72, 72 + line * 16), f"Paragraph line {line} lorem ipsum dolor sit amet", fontsize=10)
+
+    # Ruled table page
+    page = doc.new_page()
+    x0, y0 = 72, 100
+    for row in range(6):
+        page.draw_line((x0, y0 + row * 20), (x0 + 400, y0 + row * 20))
+    for col in range(5):
+        page.draw_line((x0 + col * 100, y0), (x0 + col * 100, y0 + 100))
+    for row in range(5):
+        for col in range(4):
+            page.insert_text((x0 + col * 100 + 5, y0 + row * 20 + 14), f"r{row}c{col}", fontsize=9)
+
+    # Boxed figure page (rect border saja, bukan table)
+    page = doc.new_page()
+    page.draw_rect(fitz.Rect(72, 100, 500, 400))
+    page.insert_text((90, 130), "Figure caption inside a border", fontsize=10)
+
+    # Table tanpa garis (pdfplumber default strategy tidak bisa menemukan ini)
+    page = doc.new_page()
+    for row in range(5):
+        for col in range(4):
+            page.insert_text((72 + col * 100, 100 + row * 20), f"v{row}{col}", fontsize=9)
+
+    doc.save(path)
+    doc.close()
+    return [path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate corpus PDF sintetis untuk benchmark")
+    parser.add_argument("output_dir")
+    parser.add_argument("--spec", nargs="+", default=DEFAULT_SPEC, help="Entry kind:pages, kind = " + "|".join(DOCUMENT_KINDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output_dir, args.spec, args.seed)
+    print(json.dumps({"corpus": args.output_dir, "files": paths}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
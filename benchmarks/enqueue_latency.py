@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark enqueue task ke Redis: push_task per task (implementasi lama, satu
+round trip per task) vs RedisQueue.push_tasks (satu transaction untuk semua
+task + job status). Butuh Redis yang bisa diakses sesuai settings (.env).
+
+Task di-push ke queue terpisah yang dihapus setelah benchmark, jadi aman
+dijalankan di samping worker.
+
+Usage:
+    python benchmarks/enqueue_latency.py [--pages 100 2000 10000] [--repeat 5] [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.config import settings
+from shared.models import PageTask, JobStatus, TaskStatus
+from shared.redis_queue import redis_queue
+
+BENCHMARK_QUEUE = "benchmark_enqueue_queue"
+
+
+def build_job(job_id: str, total_pages: int, pages_per_worker: int):
+    """Job status + task list seperti yang dibuat process_pdf_async"""
+    page_numbers = list(range(1, total_pages + 1))
+    tasks = [
+        PageTask(
+            task_id=f"{job_id}_{i}",
+            job_id=job_id,
+            page_numbers=page_numbers[start:start + pages_per_worker],
+            pdf_path=f"/app/uploads/{job_id}.pdf",
+            file_hash="0" * 64
+        )
+        for i, start in enumerate(range(0, total_pages, pages_per_worker))
+    ]
+    job_status = JobStatus(job_id=job_id, status=TaskStatus.PROCESSING, total_pages=total_pages)
+    return job_status, tasks
+
+
+def enqueue_sequential(job_status: JobStatus, tasks):
+    """Implementasi lama: set status lalu LPUSH satu per satu"""
+    redis_queue.set_job_status(job_status.job_id, job_status.model_dump())
+    for task in tasks:
+        redis_queue.push_task(task)
+
+
+def enqueue_pipelined(job_status: JobStatus, tasks):
+    redis_queue.push_tasks(tasks, {job_status.job_id: job_status.model_dump()})
+
+
+def measure(enqueue, total_pages: int, pages_per_worker: int, repeat: int) -> dict:
+    timings = []
+    for run in range(repeat):
+        job_id = f"benchmark-{total_pages}-{run}"
+        job_status, tasks = build_job(job_id, total_pages, pages_per_worker)
+        start = time.perf_counter()
+        enqueue(job_status, tasks)
+        timings.append(time.perf_counter() - start)
+
+        queued = redis_queue.redis_client.llen(BENCHMARK_QUEUE)
+        if queued != len(tasks):
+            raise RuntimeError(f"Expected {len(tasks)} queued tasks, found {queued}")
+        redis_queue.redis_client.delete(BENCHMARK_QUEUE, f"job_status:{job_id}")
+
+    return {
+        "tasks": len(tasks),
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark enqueue latency")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 2000, 10000])
+    parser.add_argument("--pages-per-worker", type=int, default=settings.pages_per_worker)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    args = parser.parse_args()
+
+    if not redis_queue.ping():
+        sys.exit(f"Cannot connect to Redis at {settings.redis_host}:{settings.redis_port}")
+
+    # Semua push masuk ke queue benchmark, bukan queue worker
+    settings.pdf_processing_queue = BENCHMARK_QUEUE
+    # Log per task dari push_task ikut diukur (sama seperti di master), tapi tidak ditampilkan
+    from loguru import logger
+    logger.remove()
+
+    results = []
+    for total_pages in args.pages:
+        sequential = measure(enqueue_sequential, total_pages, args.pages_per_worker, args.repeat)
+        pipelined = measure(enqueue_pipelined, total_pages, args.pages_per_worker, args.repeat)
+        results.append({
+            "pages": total_pages,
+            "tasks": sequential["tasks"],
+            "sequential": sequential,
+            "pipelined": pipelined,
+            "speedup": sequential["median_ms"] / pipelined["median_ms"] if pipelined["median_ms"] else None
+        })
+
+    result = {
+        "benchmark": "enqueue_latency",
+        "redis": f"{settings.redis_host}:{settings.redis_port}",
+        "pages_per_worker": args.pages_per_worker,
+        "repeat": args.repeat,
+        "results": results
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
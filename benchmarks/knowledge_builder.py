@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark knowledge builder: implementasi lama (string += dan regex uncompiled)
+vs shared.knowledge.build_page_knowledge pada halaman padat sintetis.
+
+Usage:
+    python benchmarks/knowledge_builder.py [--spans 3000] [--tables 5] [--repeat 20] [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.models import ExtractedContent, ContentType, CompactTextSpans
+from shared.knowledge import build_page_knowledge
+
+
+def legacy_aggregate_knowledge(content_list):
+    """Salinan implementasi lama PDFExtractor.aggregate_knowledge_from_content sebagai baseline"""
+    import re
+    
+    knowledge_parts = []
+    text_parts = []
+    table_parts = []
+    image_parts = []
+    
+    for content in content_list:
+        if content.content_type == ContentType.TEXT:
+            if isinstance(content.content, str) and content.content.strip():
+                text_parts.append(content.content.strip())
+        elif content.content_type == ContentType.TABLE:
+            if isinstance(content.content, dict):
+                table_data = content.content
+                if "headers" in table_data and "rows" in table_data:
+                    headers = table_data["headers"]
+                    rows = table_data["rows"]
+                    table_text = f"Table: {table_data.get('table_id', 'Unknown')}\n"
+                    if headers:
+                        table_text += " | ".join(str(h) for h in headers) + "\n"
+                        table_text += "-" * (len(" | ".join(str(h) for h in headers))) + "\n"
+                    for row in rows:
+                        if row:
+                            table_text += " | ".join(str(cell) for cell in row) + "\n"
+                    table_parts.append(table_text.strip())
+        elif content.content_type == ContentType.IMAGE:
+            if isinstance(content.content, dict):
+                image_data = content.content
+                if "text_summary" in image_data and image_data["text_summary"]:
+                    image_parts.append(f"Image {image_data.get('image_id', 'Unknown')} Text: {image_data['text_summary']}")
+    
+    if text_parts:
+        knowledge_parts.append("TEXT CONTENT:\n" + "\n".join(text_parts))
+    if table_parts:
+        knowledge_parts.append("TABLE CONTENT:\n" + "\n\n".join(table_parts))
+    if image_parts:
+        knowledge_parts.append("IMAGE TEXT CONTENT:\n" + "\n".join(image_parts))
+    
+    text = "\n\n".join(knowledge_parts)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    lines = text.split('\n')
+    cleaned_lines = []
+    for line in lines:
+        line = line.strip()
+        if len(line) > 2:
+            cleaned_lines.append(line)
+    return '\n'.join(cleaned_lines).strip()
+
+
+def build_dense_page(span_count: int, table_count: int, rows_per_table: int = 40, cols_per_table: int = 8):
+    """Generate content halaman padat: banyak text spans, beberapa table dan image"""
+    text_spans = CompactTextSpans(fonts=["Helvetica", "Helvetica-Bold"])
+    for index in range(span_count):
+        text_spans.text.append(f"Span {index} lorem  ipsum dolor\tsit amet consectetur")
+        text_spans.bbox.extend([72.0, 10.0 + index, 300.0, 20.0 + index])
+        text_spans.font_id.append(index % 2)
+        text_spans.size.append(10.0)
+        text_spans.flags.append(0)
+    
+    content_list = []
+    for table_index in range(table_count):
+        content_list.append(ExtractedContent(
+            content_type=ContentType.TABLE,
+            content={
+                "table_id": f"table_{table_index + 1}",
+                "headers": [f"Header {col}" for col in range(cols_per_table)],
+                "rows": [[f"cell {row}.{col}" for col in range(cols_per_table)] for row in range(rows_per_table)]
+            }
+        ))
+    for image_index in range(5):
+        content_list.append(ExtractedContent(
+            content_type=ContentType.IMAGE,
+            content={"image_id": f"image_{image_index + 1}", "text_summary": "Scanned caption text"}
+        ))
+    
+    return text_spans, content_list
+
+
+def time_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark knowledge builder")
+    parser.add_argument("--spans", type=int, default=3000)
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    args = parser.parse_args()
+    
+    text_spans, content_list = build_dense_page(args.spans, args.tables)
+    
+    # Path lama butuh text spans sebagai ExtractedContent
+    legacy_content = text_spans.to_contents() + content_list
+    
+    legacy_seconds = time_call(lambda: legacy_aggregate_knowledge(legacy_content), args.repeat)
+    builder_seconds = time_call(lambda: build_page_knowledge(content_list, text_spans), args.repeat)
+    
+    legacy_knowledge = legacy_aggregate_knowledge(legacy_content)
+    builder_knowledge = build_page_knowledge(content_list, text_spans)
+    
+    result = {
+        "benchmark": "knowledge_builder",
+        "spans": args.spans,
+        "tables": args.tables,
+        "repeat": args.repeat,
+        "legacy_seconds_per_page": legacy_seconds,
+        "builder_seconds_per_page": builder_seconds,
+        "speedup": legacy_seconds / builder_seconds if builder_seconds else None,
+        "legacy_lines": legacy_knowledge.count("\n") + 1,
+        "builder_lines": builder_knowledge.count("\n") + 1,
+        "legacy_chars": len(legacy_knowledge),
+        "builder_chars": len(builder_knowledge)
+    }
+    
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: throughput, latency, peak RSS dan payload size pada corpus sintetis
+
+Mode:
+    extractor  - PDFExtractor.process_page langsung per halaman (tanpa Redis)
+    e2e        - master (in-process, TestClient) + worker subprocess lewat Redis lokal
+
+Mode e2e memakai Redis DB terpisah (--redis-db, harus kosong) plus uploads/temp/results
+directory sementara, page cache disable, jadi job, worker (set "workers") dan sweeper
+benchmark tidak bercampur dengan deployment lain di Redis server dan checkout yang sama.
+
+Usage:
+    python benchmarks/run_suite.py [--corpus DIR | --spec text:20 mixed:200 ...] [--mode extractor e2e]
+                                   [--workers 2] [--ocr auto] [--redis-db 15] [--baseline old.json] [--output result.json]
+
+Hasil JSON berisi git commit supaya regression bisa dibandingkan antar commit (--baseline).
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import DEFAULT_SPEC, collect_pdfs, generate_corpus
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BENCHMARK_QUEUE = "benchmark_suite_queue"
+BENCHMARK_RESULT_QUEUE = "benchmark_suite_result_queue"
+COMPARED_METRICS = ["pages_per_second", "page_latency_p50", "page_latency_p95", "peak_rss_mb", "payload_bytes"]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    """ru_maxrss dalam KB di Linux (bytes di macOS)"""
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def latency_summary(latencies: list) -> dict:
+    return {
+        "page_latency_p50": percentile(latencies, 50),
+        "page_latency_p95": percentile(latencies, 95),
+        "page_latency_mean": statistics.mean(latencies) if latencies else 0.0
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_extractor(pdf_files: list, profile) -> dict:
+    """Process setiap halaman langsung dengan PDFExtractor"""
+    import fitz
+    from worker_app.main import PDFExtractor
+
+    extractor = PDFExtractor()
+    latencies, payload_bytes, failed = [], 0, 0
+    per_file = []
+
+    start = time.perf_counter()
+    for pdf_path in pdf_files:
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+        file_start = time.perf_counter()
+        for page_number in range(1, page_count + 1):
+            page_start = time.perf_counter()
+            result = extractor.process_page(pdf_path, page_number, profile)
+            latencies.append(time.perf_counter() - page_start)
+            payload_bytes += len(result.model_dump_json())
+            failed += result.status.value == "failed"
+        per_file.append({
+            "file": os.path.basename(pdf_path),
+            "pages": page_count,
+            "seconds": time.perf_counter() - file_start
+        })
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": "extractor",
+        "pages": len(latencies),
+        "failed_pages": failed,
+        "seconds": elapsed,
+        "pages_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        "payload_bytes": payload_bytes,
+        "files": per_file
+    }
+
+
+def start_workers(count: int) -> list:
+    """Worker subprocess memakai environment benchmark (queue terpisah, tanpa metrics server)"""
+    worker_script = os.path.join(PROJECT_ROOT, "worker_app", "main.py")
+    return [
+        subprocess.Popen(
+            [sys.executable, worker_script], cwd=PROJECT_ROOT, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        for _ in range(count)
+    ]
+
+
+def stop_workers(workers: list):
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        try:
+            worker.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+
+
+def run_e2e(pdf_files: list, workers: int, ocr: str, timeout: float) -> dict:
+    """Upload semua PDF ke master dan tunggu sampai semua job selesai"""
+    from fastapi.testclient import TestClient
+    from master_app.main import app, delete_job
+    from shared.config import settings
+    from shared.redis_queue import redis_queue
+
+    if not redis_queue.ping():
+        sys.exit("Cannot connect to Redis for e2e mode")
+    # DB yang sudah berisi key kemungkinan dipakai deployment lain (worker-nya akan ikut terdaftar di set workers)
+    if redis_queue.redis_client.dbsize():
+        sys.exit(f"Redis DB {settings.redis_db} is not empty, choose an unused DB with --redis-db")
+
+    worker_processes = start_workers(workers)
+    jobs = {}
+    try:
+        with TestClient(app) as client:
+            start = time.perf_counter()
+            for pdf_path in pdf_files:
+                with open(pdf_path, "rb") as f:
+                    response = client.post(
+                        "/upload-pdf",
+                        files={"file": (os.path.basename(pdf_path), f, "application/pdf")},
+                        data={"ocr": ocr}
+                    )
+                response.raise_for_status()
+                jobs[response.json()["job_id"]] = {"file": os.path.basename(pdf_path), "uploaded_at": time.perf_counter()}
+
+            pending = set(jobs)
+            deadline = time.time() + timeout
+            while pending and time.time() < deadline:
+                for job_id in list(pending):
+                    status = client.get(f"/job-status/{job_id}", params={"include_results": False}).json()
+                    if status["status"] in ("completed", "failed", "cancelled"):
+                        jobs[job_id].update(status=status["status"], finished_at=time.perf_counter())
+                        pending.discard(job_id)
+                time.sleep(0.2)
+            elapsed = time.perf_counter() - start
+
+            latencies, payload_bytes, wire_bytes, pages, failed = [], 0, 0, 0, 0
+            for job_id, job in jobs.items():
+                if job_id in pending:
+                    continue
+                response = client.get(f"/job-result/{job_id}")
+                payload_bytes += len(response.content)
+                wire_bytes += int(response.headers.get("content-length", len(response.content)))
+                for page in response.json().get("results", []):
+                    pages += 1
+                    failed += page["status"] == "failed"
+                    latencies.append(page["processing_time"])
+                job["seconds"] = job["finished_at"] - job["uploaded_at"]
+    finally:
+        stop_workers(worker_processes)
+        # DELETE /job hanya untuk job aktif (409 untuk job selesai), jadi data job dihapus langsung
+        for job_id in jobs:
+            delete_job(job_id)
+        # Sisa key lain (queue, throughput, quota client) di DB benchmark yang tadinya kosong
+        redis_queue.redis_client.flushdb()
+
+    job_seconds = [job["seconds"] for job in jobs.values() if "seconds" in job]
+    return {
+        "mode": "e2e",
+        "workers": workers,
+        "jobs": len(jobs),
+        "timed_out_jobs": len(pending),
+        "pages": pages,
+        "failed_pages": failed,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+        "job_latency_p50": percentile(job_seconds, 50),
+        "job_latency_p95": percentile(job_seconds, 95),
+        "peak_rss_mb": peak_rss_mb(),
+        "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "payload_bytes": payload_bytes,
+        "payload_wire_bytes": wire_bytes
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Perubahan relatif per mode terhadap hasil benchmark sebelumnya"""
+    comparison = {}
+    for mode, result in current["results"].items():
+        previous = baseline.get("results", {}).get(mode)
+        if not previous:
+            continue
+        comparison[mode] = {
+            metric: {
+                "baseline": previous[metric],
+                "current": result[metric],
+                "change_percent": (result[metric] - previous[metric]) / previous[metric] * 100 if previous[metric] else None
+            }
+            for metric in COMPARED_METRICS
+            if metric in result and metric in previous
+        }
+    return {"baseline_commit": baseline.get("commit"), "modes": comparison}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite PDF extractor")
+    parser.add_argument("--corpus", nargs="+", help="PDF files atau directory; default generate corpus sintetis")
+    parser.add_argument("--spec", nargs="+", default=DEFAULT_SPEC, help="Spec corpus sintetis (kind:pages)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", nargs="+", choices=["extractor", "e2e"], default=["extractor"])
+    parser.add_argument("--workers", type=int, default=2, help="Jumlah worker subprocess untuk mode e2e")
+    parser.add_argument("--ocr", choices=["on", "off", "auto"], default="on")
+    parser.add_argument("--timeout", type=float, default=3600, help="Batas waktu tunggu job e2e (detik)")
+    parser.add_argument("--redis-db", type=int, default=15, help="Redis DB kosong khusus benchmark e2e")
+    parser.add_argument("--baseline", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Environment benchmark harus di-set sebelum shared.config di-import (master in-process dan worker)
+        os.environ.update({
+            "PDF_PROCESSING_QUEUE": BENCHMARK_QUEUE,
+            "RESULT_QUEUE": BENCHMARK_RESULT_QUEUE,
+            "REDIS_DB": str(args.redis_db),
+            "RESULTS_PATH": os.path.join(temp_dir, "results"),
+            "UPLOADS_PATH": os.path.join(temp_dir, "uploads"),
+            "TEMP_PATH": os.path.join(temp_dir, "temp"),
+            "PAGE_CACHE_TTL": "0",
+            "WORKER_METRICS_PORT": "0",
+            "ADMISSION_CONTROL": "false"
+        })
+        from loguru import logger
+        from shared.models import ExtractionProfile, OCRMode
+        logger.remove()
+
+        pdf_files = collect_pdfs(args.corpus) if args.corpus else generate_corpus(
+            os.path.join(temp_dir, "corpus"), args.spec, args.seed
+        )
+
+        results = {}
+        # e2e dijalankan duluan supaya peak RSS master tidak ikut terisi model dari mode extractor
+        if "e2e" in args.mode:
+            results["e2e"] = run_e2e(pdf_files, args.workers, args.ocr, args.timeout)
+        if "extractor" in args.mode:
+            results["extractor"] = run_extractor(pdf_files, ExtractionProfile(ocr=OCRMode(args.ocr)))
+
+    result = {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "corpus": args.corpus or args.spec,
+        "files": len(pdf_files),
+        "ocr": args.ocr,
+        "results": results
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["comparison"] = compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark table pre-filter: precision/recall dan waktu table extraction per halaman
+
+Ground truth adalah hasil pdfplumber (extract_table_content), prediksi adalah
+PDFExtractor.page_may_contain_table. Output berupa JSON supaya bisa dibandingkan antar commit.
+
+Usage:
+    python benchmarks/table_prefilter.py [file.pdf | directory ...] [--output result.json]
+
+Tanpa argumen, benchmark memakai corpus sintetis kecil.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from worker_app.main import PDFExtractor
+from corpus import build_prefilter_corpus, collect_pdfs
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(pdf_files: list) -> dict:
+    extractor = PDFExtractor()
+    pages = []
+    
+    for pdf_path in pdf_files:
+        doc = fitz.open(pdf_path)
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            
+            start = time.perf_counter()
+            predicted = extractor.page_may_contain_table(page)
+            prefilter_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            tables = extractor.extract_table_content(pdf_path, page_index + 1)
+            pdfplumber_seconds = time.perf_counter() - start
+            
+            pages.append({
+                "file": os.path.basename(pdf_path),
+                "page_number": page_index + 1,
+                "has_table": len(tables) > 0,
+                "predicted": predicted,
+                "prefilter_seconds": prefilter_seconds,
+                "pdfplumber_seconds": pdfplumber_seconds
+            })
+        doc.close()
+    
+    true_positive = sum(1 for p in pages if p["predicted"] and p["has_table"])
+    false_positive = sum(1 for p in pages if p["predicted"] and not p["has_table"])
+    false_negative = sum(1 for p in pages if not p["predicted"] and p["has_table"])
+    true_negative = sum(1 for p in pages if not p["predicted"] and not p["has_table"])
+    
+    baseline_times = [p["pdfplumber_seconds"] for p in pages]
+    filtered_times = [
+        p["prefilter_seconds"] + (p["pdfplumber_seconds"] if p["predicted"] else 0.0)
+        for p in pages
+    ]
+    
+    return {
+        "benchmark": "table_prefilter",
+        "files": len(pdf_files),
+        "pages": len(pages),
+        "confusion": {
+            "true_positive": true_positive,
+            "false_positive": false_positive,
+            "false_negative": false_negative,
+            "true_negative": true_negative
+        },
+        "precision": true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0,
+        "recall": true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0,
+        "table_seconds_per_page": {
+            "baseline_mean": statistics.mean(baseline_times) if pages else 0.0,
+            "baseline_p95": percentile(baseline_times, 95),
+            "prefiltered_mean": statistics.mean(filtered_times) if pages else 0.0,
+            "prefiltered_p95": percentile(filtered_times, 95)
+        },
+        "table_seconds_total": {
+            "baseline": sum(baseline_times),
+            "prefiltered": sum(filtered_times)
+        },
+        "page_details": pages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark table pre-filter vs pdfplumber")
+    parser.add_argument("paths", nargs="*", help="PDF files atau directory berisi PDF")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_files = collect_pdfs(args.paths) if args.paths else build_prefilter_corpus(temp_dir)
+        result = run_benchmark(pdf_files)
+    
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
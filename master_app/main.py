@@ -1,13 +1,18 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, Response
 import os
 import uuid
 import shutil
+import hashlib
+import gzip
+import json
+import zipfile
+import tarfile
 from pathlib import Path
 import PyPDF2
-from typing import List
+from typing import List, Optional
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 
 # Import shared modules
@@ -17,9 +22,20 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.config import settings
 from shared.models import (
     PDFUploadResponse, PDFProcessingResult, JobStatus, TaskStatus,
-    PageTask, TaskResult
+    PageTask, TaskResult, PageResult, ContentType, OCRMode, ExtractionProfile,
+    ResultFormat, TextLayout, BatchFileResult, BatchUploadResponse, BatchStatus
 )
-from shared.redis_queue import redis_queue
+from shared.redis_queue import redis_queue, DateTimeEncoder
+from shared.tables import table_records
+from shared.chunking import chunk_document_knowledge
+from shared.result_store import result_store
+from shared.admission import ThroughputTracker, retry_after_seconds
+from shared.tracing import create_tracer, new_traceparent
+from shared.metrics import (
+    master_registry, UPLOADS, QUEUE_DEPTH, JOBS_IN_MEMORY, JOB_DURATION,
+    RESULT_APPLY_SECONDS, PAGES_COMPLETED, THROUGHPUT, WORKERS, WORKER_REQUEUES
+)
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from loguru import logger
 
 # Configure logging
@@ -34,6 +50,27 @@ app = FastAPI(
 # Global storage untuk job status
 jobs_storage = {}
 
+GZIP_MAGIC = b"\x1f\x8b"
+
+UPLOAD_ENDPOINTS = {"/upload-pdf", "/upload-batch"}
+
+TERMINAL_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
+ACTIVE_STATUSES = [TaskStatus.PENDING, TaskStatus.PROCESSING]
+
+# Throughput halaman (dari hasil worker) untuk admission control dan ETA
+throughput = ThroughputTracker(settings.throughput_window_seconds, settings.default_pages_per_second)
+
+# 🔭 Span master (upload, enqueue, apply result); root span job di-record saat job selesai
+tracer = create_tracer("pdf-master")
+
+@app.middleware("http")
+async def count_uploads(request: Request, call_next):
+    """Hitung upload per endpoint dan HTTP status (termasuk yang ditolak admission control)"""
+    response = await call_next(request)
+    if request.url.path in UPLOAD_ENDPOINTS:
+        UPLOADS.labels(request.url.path, str(response.status_code)).inc()
+    return response
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize master app"""
@@ -46,6 +83,7 @@ async def startup_event():
     logger.info(f"Upload directory: {settings.upload_dir}")
     logger.info(f"Temp directory: {settings.temp_dir}")
     logger.info(f"Logs directory: {settings.logs_dir}")
+    logger.info(f"Results directory: {settings.results_dir}")
     
     # Test Redis connection
     if not redis_queue.ping():
@@ -56,6 +94,12 @@ async def startup_event():
     
     # Start background task untuk mengumpulkan hasil
     asyncio.create_task(collect_results_background())
+    
+    # Start background task untuk retention sweeper
+    asyncio.create_task(retention_sweeper_background())
+    
+    # Start background task untuk deteksi worker mati
+    asyncio.create_task(worker_monitor_background())
 
 async def collect_results_background():
     """Background task untuk mengumpulkan hasil dari worker"""
@@ -66,7 +110,16 @@ async def collect_results_background():
             # Get result from queue dengan timeout pendek
             result = redis_queue.get_result(timeout=1)
             if result:
-                await process_worker_result(result)
+                # Waktu result menunggu di result queue sejak worker selesai
+                tracer.record_span(
+                    "result_queue_wait", result.completed_at.timestamp(), time.time(),
+                    parent=result.traceparent, job_id=result.job_id, task_id=result.task_id
+                )
+                with RESULT_APPLY_SECONDS.time(), tracer.span(
+                    "apply_result", parent=result.traceparent,
+                    job_id=result.job_id, task_id=result.task_id, pages=len(result.page_results)
+                ):
+                    await process_worker_result(result)
             else:
                 # Jika tidak ada result, tunggu sebentar
                 await asyncio.sleep(0.1)
@@ -87,18 +140,58 @@ async def process_worker_result(result: TaskResult):
     
     job = JobStatus(**job_status)
     
-    # Add hasil dari worker
-    job.results.extend(result.page_results)
-    job.completed_pages += len(result.page_results)
+    # Job yang sudah di-cancel tidak menerima hasil lagi
+    if job.status == TaskStatus.CANCELLED:
+        logger.info(f"Discarding result for task {result.task_id}: job {job_id} was cancelled")
+        return
     
-    # 📊 Calculate failed pages
-    job.failed_pages = sum(1 for page_result in job.results if page_result.status == TaskStatus.FAILED)
+    # Simpan hasil per halaman; job status sendiri tidak membawa results
+    # (halaman yang sama dikirim ulang tidak dihitung dua kali, begitu juga halaman failed)
+    added_pages, failed_pages = redis_queue.set_job_pages(job_id, result.page_results)
+    job.completed_pages += added_pages
+    throughput.record(added_pages)
+    PAGES_COMPLETED.inc(added_pages)
+    
+    # 🔬 Profile artifact task ini (payload sudah disimpan worker sebelum result di-push)
+    job.profile_artifacts.extend(
+        name for name in result.profile_artifacts if name not in job.profile_artifacts
+    )
+    
+    # 📊 Failed pages dihitung dari set halaman failed job, bukan dijumlah per result
+    if failed_pages is not None:
+        job.failed_pages = failed_pages
     
     # Check if semua halaman sudah selesai
     if job.completed_pages >= job.total_pages:
         job.status = TaskStatus.COMPLETED
         job.completed_at = datetime.now()
+        record_job_finished(job)
         logger.info(f"Job {job_id} completed successfully - {job.completed_pages}/{job.total_pages} pages, {job.failed_pages} failed")
+        
+        # 🧩 Precompute RAG chunks, final result dan knowledge sekali saat job selesai
+        with tracer.span("materialize_results", job_id=job_id):
+            job_with_results = with_job_results(job)
+            chunks = store_job_chunks(job_with_results)
+            payloads = materialize_job_outputs(job_with_results)
+            payloads.update(load_profile_artifacts(job))
+        
+        # 💾 Spill ke result store supaya result tetap bisa diambil setelah key Redis expire
+        # (tanpa spill result hanya ada di key Redis ber-TTL, jadi source PDF tidak dihapus di sini)
+        results_persisted = False
+        if settings.result_spill:
+            with tracer.span("spill_results", job_id=job_id):
+                results_persisted = result_store.put_job(
+                    job_id,
+                    job.model_dump(mode="json"),
+                    [page_result.model_dump(mode="json") for page_result in job_with_results.results],
+                    chunks,
+                    payloads,
+                    settings.result_retention_seconds
+                )
+        
+        # Source PDF tidak dibutuhkan lagi setelah result tersimpan (kecuali ada upload retention)
+        if results_persisted and settings.upload_retention_seconds <= 0:
+            remove_job_upload(job_id)
     
     # Update job status di Redis
     job_data = job.model_dump()
@@ -107,6 +200,224 @@ async def process_worker_result(result: TaskResult):
     # Store in memory untuk quick access
     jobs_storage[job_id] = job
 
+def record_job_finished(job: JobStatus):
+    """Metric durasi job dan root span job (upload sampai status final)"""
+    duration = (job.completed_at - job.created_at).total_seconds()
+    JOB_DURATION.labels(job.status.value).observe(duration)
+    tracer.record_span(
+        "job", job.created_at.timestamp(), job.completed_at.timestamp(),
+        span_context=job.traceparent,
+        error=None if job.status == TaskStatus.COMPLETED else job.status.value,
+        job_id=job.job_id, status=job.status.value,
+        total_pages=job.total_pages, failed_pages=job.failed_pages
+    )
+
+def load_job_page_numbers(job_id: str) -> List[int]:
+    """Nomor halaman yang tersimpan, dari Redis atau result store kalau key Redis sudah expire"""
+    page_numbers = redis_queue.get_job_page_numbers(job_id)
+    if not page_numbers:
+        page_numbers = result_store.get_page_numbers(job_id)
+    return page_numbers
+
+def load_job_pages(job_id: str, page_numbers: Optional[List[int]] = None) -> List[dict]:
+    """Page results (dict) dari Redis atau result store kalau key Redis sudah expire"""
+    pages = redis_queue.get_job_pages(job_id, page_numbers)
+    if not pages:
+        pages = result_store.get_pages(job_id, page_numbers)
+    return pages
+
+def load_job_payload(job_id: str, name: str) -> Optional[bytes]:
+    """Payload pre-serialized dari Redis atau result store"""
+    payload = redis_queue.get_job_payload(job_id, name)
+    if payload is None:
+        payload = result_store.get_payload(job_id, name)
+    return payload
+
+def load_profile_artifacts(job: JobStatus) -> dict:
+    """Payload profile artifact job dari Redis, ikut disimpan ke result store saat job selesai"""
+    artifacts = {}
+    for name in job.profile_artifacts:
+        payload = redis_queue.get_job_payload(job.job_id, name)
+        if payload is not None:
+            artifacts[name] = payload
+    return artifacts
+
+def load_job_results(job_id: str, page_numbers: Optional[List[int]] = None) -> List[PageResult]:
+    """Load page results dari per-page storage"""
+    return [PageResult(**page_data) for page_data in load_job_pages(job_id, page_numbers)]
+
+def with_job_results(job: JobStatus) -> JobStatus:
+    """Return copy job status dengan semua page results dari per-page storage"""
+    return job.model_copy(update={"results": load_job_results(job.job_id)})
+
+def store_job_chunks(job: JobStatus) -> List[dict]:
+    """Chunk knowledge semua halaman dan simpan di Redis untuk endpoint /job-chunks"""
+    sorted_results = sorted(job.results, key=lambda x: x.page_number)
+    try:
+        chunks = chunk_document_knowledge(
+            (page_result.page_number, page_result.knowledge) for page_result in sorted_results
+        )
+    except ValueError as e:
+        logger.error(f"Failed to chunk knowledge for job {job.job_id}: {e}")
+        return []
+    redis_queue.set_job_chunks(job.job_id, chunks)
+    logger.info(f"Stored {len(chunks)} knowledge chunks for job {job.job_id}")
+    return chunks
+
+def remove_job_upload(job_id: str) -> bool:
+    """Hapus PDF upload milik job"""
+    file_path = os.path.join(settings.upload_dir, f"{job_id}.pdf")
+    if not os.path.exists(file_path):
+        return False
+    os.remove(file_path)
+    return True
+
+def delete_job(job_id: str):
+    """Hapus semua data job: result store, key Redis, PDF upload dan entry memory"""
+    result_store.delete_job(job_id)
+    redis_queue.delete_job_data(job_id)
+    remove_job_upload(job_id)
+    jobs_storage.pop(job_id, None)
+
+def sweep_expired_jobs() -> int:
+    """Hapus job yang retention-nya lewat dan evict job lama dari memory, return jumlah job yang dihapus"""
+    expired_jobs = result_store.expired_jobs()
+    for job_id in expired_jobs:
+        delete_job(job_id)
+        logger.info(f"Job {job_id} expired and removed")
+    
+    # Job terminal tidak perlu di memory lagi, status tetap bisa di-load dari Redis atau result store
+    cutoff = datetime.now() - timedelta(seconds=settings.job_ttl_seconds)
+    for job_id, job in list(jobs_storage.items()):
+        if job.status in TERMINAL_STATUSES and job.completed_at and job.completed_at <= cutoff:
+            del jobs_storage[job_id]
+    
+    return len(expired_jobs)
+
+def sweep_job_files() -> int:
+    """Hapus PDF upload yang sudah tidak dibutuhkan dan temp file sisa upload yang gagal"""
+    removed = 0
+    now = time.time()
+    
+    for entry in os.scandir(settings.upload_dir):
+        if not entry.is_file() or not entry.name.endswith(".pdf"):
+            continue
+        job_id = entry.name[:-len(".pdf")]
+        job = find_job_status(job_id)
+        if job is None:
+            # Orphan (misal master restart atau status sudah expire), beri grace period dulu
+            expired = now - entry.stat().st_mtime > settings.job_ttl_seconds
+        else:
+            # Job completed yang result-nya tidak ada di result store (spill disable/gagal) tetap butuh
+            # source PDF selama job status masih ada; setelah expire ditangani sebagai orphan di atas
+            expired = (
+                job.status in TERMINAL_STATUSES
+                and job.completed_at is not None
+                and job.completed_at.timestamp() + settings.upload_retention_seconds <= now
+                and (job.status != TaskStatus.COMPLETED or result_store.has_job(job_id))
+            )
+        if expired:
+            os.remove(entry.path)
+            removed += 1
+            logger.info(f"Removed upload for job {job_id}")
+    
+    for entry in os.scandir(settings.temp_dir):
+        if entry.is_file() and now - entry.stat().st_mtime > settings.stale_temp_seconds:
+            os.remove(entry.path)
+            removed += 1
+            logger.info(f"Removed stale temp file {entry.name}")
+    
+    return removed
+
+def disk_status(path: str) -> dict:
+    """Free space filesystem tempat path berada"""
+    usage = shutil.disk_usage(path)
+    free_percent = usage.free / usage.total * 100 if usage.total else 0.0
+    return {
+        "path": path,
+        "total_bytes": usage.total,
+        "free_bytes": usage.free,
+        "free_percent": round(free_percent, 2),
+        "under_pressure": usage.free < settings.min_free_disk_bytes or free_percent < settings.min_free_disk_percent
+    }
+
+def check_disk_pressure(incoming_bytes: int = 0):
+    """Tolak upload (503 + Retry-After) kalau disk upload/result hampir penuh"""
+    for path in {settings.upload_dir, settings.temp_dir, settings.results_dir}:
+        status = disk_status(path)
+        if status["under_pressure"] or status["free_bytes"] - incoming_bytes < settings.min_free_disk_bytes:
+            logger.warning(f"Rejecting upload: disk pressure on {path} ({status['free_bytes']} bytes free)")
+            raise HTTPException(
+                status_code=503,
+                detail="Server is low on disk space, please retry later",
+                headers={"Retry-After": str(settings.disk_pressure_retry_after)}
+            )
+
+async def retention_sweeper_background():
+    """Background task untuk menghapus job yang sudah expire"""
+    logger.info("Starting retention sweeper background task")
+    
+    while True:
+        try:
+            sweep_expired_jobs()
+            sweep_job_files()
+        except Exception as e:
+            logger.error(f"Error in retention sweeper: {e}")
+        await asyncio.sleep(settings.retention_sweep_interval)
+
+def fail_requeued_task(task: PageTask, worker_id: str):
+    """Task yang sudah terlalu sering membuat worker mati: laporkan semua halamannya failed"""
+    for subtask in task.bundle or [task]:
+        redis_queue.push_result(TaskResult(
+            task_id=subtask.task_id,
+            job_id=subtask.job_id,
+            page_results=[
+                PageResult(
+                    page_number=page_number,
+                    content=[],
+                    processing_time=0,
+                    status=TaskStatus.FAILED,
+                    error_message=f"Worker died while processing page (task requeued {task.requeue_count} times)"
+                )
+                for page_number in subtask.page_numbers
+            ],
+            worker_id=worker_id,
+            traceparent=subtask.traceparent
+        ))
+
+def requeue_dead_workers() -> int:
+    """Requeue task in-flight milik worker yang heartbeat-nya expire, return jumlah worker mati"""
+    dead_workers = [worker_id for worker_id, heartbeat in redis_queue.get_workers().items() if heartbeat is None]
+    for worker_id in dead_workers:
+        for task in redis_queue.take_worker_tasks(worker_id):
+            if not task.bundle and redis_queue.is_job_cancelled(task.job_id):
+                WORKER_REQUEUES.labels("cancelled").inc()
+                continue
+            if task.requeue_count >= settings.max_task_requeues:
+                logger.error(f"Task {task.task_id} of dead worker {worker_id} exceeded {settings.max_task_requeues} requeues, failing its pages")
+                fail_requeued_task(task, worker_id)
+                WORKER_REQUEUES.labels("failed").inc()
+                continue
+            # Halaman yang sudah sempat di-report tidak dihitung dua kali (set_job_pages)
+            task.requeue_count += 1
+            redis_queue.requeue_task(task)
+            WORKER_REQUEUES.labels("requeued").inc()
+            logger.warning(f"Requeued task {task.task_id} of dead worker {worker_id} (attempt {task.requeue_count})")
+        redis_queue.remove_worker(worker_id)
+        logger.warning(f"Worker {worker_id} missed heartbeats and was removed")
+    return len(dead_workers)
+
+async def worker_monitor_background():
+    """Background task untuk requeue task milik worker yang mati"""
+    logger.info("Starting worker monitor background task")
+    
+    while True:
+        try:
+            requeue_dead_workers()
+        except Exception as e:
+            logger.error(f"Error in worker monitor: {e}")
+        await asyncio.sleep(settings.worker_monitor_interval)
+
 def get_pdf_page_count(file_path: str) -> int:
     """Get jumlah halaman dari PDF"""
     try:
@@ -117,105 +428,273 @@ def get_pdf_page_count(file_path: str) -> int:
         logger.error(f"Error getting page count: {e}")
         raise HTTPException(status_code=400, detail="Invalid PDF file")
 
-def split_pages_for_workers(total_pages: int, pages_per_worker: int = None) -> List[List[int]]:
+def split_pages_for_workers(page_numbers: List[int], pages_per_worker: int = None) -> List[List[int]]:
     """Split halaman untuk workers"""
     if pages_per_worker is None:
         pages_per_worker = settings.pages_per_worker
     
     page_groups = []
-    for i in range(0, total_pages, pages_per_worker):
-        end_page = min(i + pages_per_worker, total_pages)
-        page_numbers = list(range(i + 1, end_page + 1))  # PDF pages are 1-indexed
-        page_groups.append(page_numbers)
+    for i in range(0, len(page_numbers), pages_per_worker):
+        page_groups.append(page_numbers[i:i + pages_per_worker])
     
     return page_groups
 
+def build_extraction_profile(
+    content_types: str,
+    page_from: Optional[int],
+    page_to: Optional[int],
+    ocr: OCRMode,
+    dpi: Optional[int],
+    text_layout: TextLayout = TextLayout.SPANS
+) -> ExtractionProfile:
+    """Build dan validate extraction profile dari form upload"""
+    try:
+        requested_types = [
+            ContentType(content_type.strip().lower())
+            for content_type in content_types.split(",")
+            if content_type.strip()
+        ]
+    except ValueError:
+        valid_types = ", ".join(content_type.value for content_type in ContentType)
+        raise HTTPException(status_code=400, detail=f"Invalid content_types. Valid values: {valid_types}")
+    
+    if not requested_types:
+        raise HTTPException(status_code=400, detail="content_types must not be empty")
+    
+    if page_from is not None and page_from < 1:
+        raise HTTPException(status_code=400, detail="page_from must be >= 1")
+    
+    if page_to is not None and page_to < 1:
+        raise HTTPException(status_code=400, detail="page_to must be >= 1")
+    
+    if page_from is not None and page_to is not None and page_to < page_from:
+        raise HTTPException(status_code=400, detail="page_to must be >= page_from")
+    
+    if dpi is not None and dpi < 36:
+        raise HTTPException(status_code=400, detail="dpi must be >= 36")
+    
+    return ExtractionProfile(
+        content_types=list(dict.fromkeys(requested_types)),
+        page_from=page_from,
+        page_to=page_to,
+        ocr=ocr,
+        dpi=dpi,
+        text_layout=text_layout
+    )
+
+def client_identity(request: Request) -> str:
+    """Client untuk quota: header X-Client-ID, fallback ke IP"""
+    client_id = request.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "unknown"
+
+def check_admission(client_id: str, new_pages: int = 0) -> dict:
+    """Tolak upload kalau queue/backlog terlalu dalam (503) atau quota client habis (429)
+    
+    Return snapshot backlog (posisi dan ETA) untuk job yang diterima.
+    """
+    active_jobs = [job for job in jobs_storage.values() if job.status in ACTIVE_STATUSES]
+    backlog_pages = sum(max(job.total_pages - job.completed_pages, 0) for job in active_jobs)
+    pages_per_second = throughput.pages_per_second()
+    admission = {
+        "queue_position": len(active_jobs),
+        "eta_seconds": round((backlog_pages + new_pages) / pages_per_second, 1)
+    }
+    
+    if not settings.admission_control:
+        return admission
+    
+    queue_depth = redis_queue.get_queue_depth()
+    if queue_depth >= settings.max_queue_depth:
+        excess_pages = (queue_depth - settings.max_queue_depth + 1) * settings.pages_per_worker
+        raise admission_error(503, f"Processing queue is full ({queue_depth} tasks)", excess_pages, pages_per_second)
+    
+    # Backlog kosong selalu menerima job, seberapa besar pun (begitu juga quota client)
+    backlog_limit_pages = settings.max_backlog_seconds * pages_per_second
+    if backlog_pages and backlog_pages + new_pages > backlog_limit_pages:
+        raise admission_error(
+            503,
+            f"Estimated backlog too long ({backlog_pages / pages_per_second:.0f}s)",
+            backlog_pages + new_pages - backlog_limit_pages,
+            pages_per_second
+        )
+    
+    client_pages = sum(
+        max(job.total_pages - job.completed_pages, 0) for job in active_jobs if job.client_id == client_id
+    )
+    if client_pages and client_pages + new_pages > settings.client_max_active_pages:
+        raise admission_error(
+            429,
+            f"Client quota exceeded ({client_pages} pages in progress, limit {settings.client_max_active_pages})",
+            client_pages + new_pages - settings.client_max_active_pages,
+            pages_per_second
+        )
+    
+    return admission
+
+def admission_error(status_code: int, detail: str, excess_pages: float, pages_per_second: float) -> HTTPException:
+    """HTTPException dengan Retry-After = waktu sampai backlog turun sebanyak excess_pages"""
+    retry_after = retry_after_seconds(excess_pages, pages_per_second)
+    logger.warning(f"Rejecting upload ({status_code}): {detail}, retry after {retry_after}s")
+    return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+def save_upload_stream(source, temp_path: str) -> str:
+    """Tulis stream upload ke temp_path dengan limit ukuran, return SHA-256 (dipakai worker untuk page cache)"""
+    file_hasher = hashlib.sha256()
+    written_bytes = 0
+    with open(temp_path, "wb") as buffer:
+        while chunk := source.read(1024 * 1024):
+            written_bytes += len(chunk)
+            if written_bytes > settings.max_file_size:
+                raise HTTPException(status_code=400, detail="File too large")
+            file_hasher.update(chunk)
+            buffer.write(chunk)
+    return file_hasher.hexdigest()
+
 @app.post("/upload-pdf", response_model=PDFUploadResponse)
 async def upload_pdf(
+    request: Request,
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    content_types: str = Form("text,table,image"),
+    page_from: Optional[int] = Form(None),
+    page_to: Optional[int] = Form(None),
+    ocr: OCRMode = Form(OCRMode.ON),
+    dpi: Optional[int] = Form(None),
+    text_layout: TextLayout = Form(TextLayout.SPANS),
+    profiling: bool = Form(False)
 ):
-    """Upload PDF dan mulai processing"""
+    """Upload PDF dan mulai processing
+    
+    profiling=true menjalankan setiap task job dengan cProfile + tracemalloc di worker,
+    artifact-nya bisa di-download lewat /job-profile/{job_id}/artifacts.
+    """
     
     # Validate file
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
-    if file.size > settings.max_file_size:
+    if file.size and file.size > settings.max_file_size:
         raise HTTPException(status_code=400, detail="File too large")
     
+    extraction_profile = build_extraction_profile(content_types, page_from, page_to, ocr, dpi, text_layout)
+    
+    # 💽 Backpressure sebelum disk penuh dan worker mulai gagal
+    check_disk_pressure(file.size or 0)
+    
+    # 🚦 Cek murah sebelum file ditulis; dicek ulang setelah jumlah halaman diketahui
+    client_id = client_identity(request)
+    check_admission(client_id)
+    
     # Generate job ID
     job_id = str(uuid.uuid4())
     
-    # Save uploaded file
+    # Upload ditulis ke temp dulu, baru dipindah ke upload dir setelah valid
+    temp_path = os.path.join(settings.temp_dir, f"{job_id}.pdf.part")
     file_path = os.path.join(settings.upload_dir, f"{job_id}.pdf")
     
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get total pages
-        total_pages = get_pdf_page_count(file_path)
-        
-        # Create job status
-        job_status = JobStatus(
-            job_id=job_id,
-            status=TaskStatus.PENDING,
-            total_pages=total_pages
-        )
-        
-        # Store job status
-        job_data = job_status.model_dump()
-        redis_queue.set_job_status(job_id, job_data)
-        jobs_storage[job_id] = job_status
-        
-        # Start processing in background
-        background_tasks.add_task(process_pdf_async, job_id, file_path, total_pages)
-        
-        logger.info(f"PDF uploaded successfully: job_id={job_id}, pages={total_pages}")
-        
-        return PDFUploadResponse(
-            job_id=job_id,
-            total_pages=total_pages,
-            status=TaskStatus.PENDING,
-            message=f"PDF uploaded successfully. Processing {total_pages} pages."
-        )
-        
-    except Exception as e:
-        logger.error(f"Error uploading PDF: {e}")
-        # Cleanup
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+    # 🔭 Root context job: span upload, enqueue dan worker menjadi descendant root span job
+    job_traceparent = new_traceparent()
+    with tracer.span("upload_pdf", parent=job_traceparent, job_id=job_id) as upload_span:
+        try:
+            file_hash = save_upload_stream(file.file, temp_path)
+            
+            # Get total pages
+            document_pages = get_pdf_page_count(temp_path)
+            page_numbers = extraction_profile.resolve_pages(document_pages)
+            if not page_numbers:
+                raise HTTPException(status_code=400, detail=f"Page range is outside document ({document_pages} pages)")
+            total_pages = len(page_numbers)
+            upload_span.set_attribute("pages", total_pages)
+            admission = check_admission(client_id, total_pages)
+            
+            shutil.move(temp_path, file_path)
+            
+            # Create job status
+            job_status = JobStatus(
+                job_id=job_id,
+                status=TaskStatus.PENDING,
+                total_pages=total_pages,
+                extraction_profile=extraction_profile,
+                client_id=client_id,
+                traceparent=job_traceparent
+            )
+            
+            # Store job status
+            job_data = job_status.model_dump()
+            redis_queue.set_job_status(job_id, job_data)
+            jobs_storage[job_id] = job_status
+            
+            # Start processing in background
+            background_tasks.add_task(process_pdf_async, job_id, file_path, page_numbers, extraction_profile, file_hash, profiling)
+            
+            logger.info(f"PDF uploaded successfully: job_id={job_id}, pages={total_pages}/{document_pages}")
+            
+            return PDFUploadResponse(
+                job_id=job_id,
+                total_pages=total_pages,
+                status=TaskStatus.PENDING,
+                message=f"PDF uploaded successfully. Processing {total_pages} pages.",
+                queue_position=admission["queue_position"],
+                eta_seconds=admission["eta_seconds"]
+            )
+            
+        except HTTPException:
+            # Cleanup
+            for path in (temp_path, file_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        except Exception as e:
+            logger.error(f"Error uploading PDF: {e}")
+            # Cleanup
+            for path in (temp_path, file_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
-async def process_pdf_async(job_id: str, file_path: str, total_pages: int):
+async def process_pdf_async(
+    job_id: str,
+    file_path: str,
+    page_numbers: List[int],
+    extraction_profile: ExtractionProfile,
+    file_hash: Optional[str] = None,
+    profiling: bool = False
+):
     """Process PDF secara async"""
     try:
-        # Update job status to processing
-        job_status = jobs_storage[job_id]
-        job_status.status = TaskStatus.PROCESSING
-        job_data = job_status.model_dump()
-        redis_queue.set_job_status(job_id, job_data)
-        
         # Split pages untuk workers
-        page_groups = split_pages_for_workers(total_pages)
+        page_groups = split_pages_for_workers(page_numbers)
         
-        logger.info(f"Splitting {total_pages} pages into {len(page_groups)} tasks for job {job_id}")
+        logger.info(f"Splitting {len(page_numbers)} pages into {len(page_groups)} tasks for job {job_id}")
         
-        # Send tasks ke workers
-        for i, page_numbers in enumerate(page_groups):
-            task = PageTask(
+        tasks = [
+            PageTask(
                 task_id=f"{job_id}_{i}",
                 job_id=job_id,
-                page_numbers=page_numbers,
-                pdf_path=file_path
+                page_numbers=task_pages,
+                pdf_path=file_path,
+                file_hash=file_hash,
+                extraction_profile=extraction_profile,
+                profiling=profiling,
+                traceparent=jobs_storage[job_id].traceparent
             )
-            
-            success = redis_queue.push_task(task)
-            if not success:
-                logger.error(f"Failed to push task {task.task_id}")
-            else:
-                logger.info(f"Task {task.task_id} sent to workers for pages {page_numbers}")
+            for i, task_pages in enumerate(page_groups)
+        ]
+        
+        # Status PROCESSING dan semua task ditulis dalam satu transaction (satu round trip)
+        job_status = jobs_storage[job_id]
+        processing_status = job_status.model_copy(update={"status": TaskStatus.PROCESSING})
+        with tracer.span("enqueue_tasks", parent=job_status.traceparent, job_id=job_id, tasks=len(tasks)):
+            pushed = redis_queue.push_tasks(tasks, {job_id: processing_status.model_dump()})
+        if pushed:
+            job_status.status = TaskStatus.PROCESSING
+            logger.info(f"{len(tasks)} tasks sent to workers for job {job_id}")
+        elif redis_queue.is_job_cancelled(job_id):
+            logger.info(f"Job {job_id} cancelled before its tasks were sent")
+        else:
+            raise Exception(f"Failed to push {len(tasks)} tasks")
         
     except Exception as e:
         logger.error(f"Error processing PDF async: {e}")
@@ -223,12 +702,308 @@ async def process_pdf_async(job_id: str, file_path: str, total_pages: int):
         job_status = jobs_storage.get(job_id)
         if job_status:
             job_status.status = TaskStatus.FAILED
+            job_status.completed_at = datetime.now()
+            record_job_finished(job_status)
             job_data = job_status.model_dump()
             redis_queue.set_job_status(job_id, job_data)
 
-@app.get("/job-status/{job_id}", response_model=JobStatus)
-async def get_job_status(job_id: str):
-    """Get status dari job"""
+def iter_batch_sources(files: List[UploadFile]):
+    """Yield (filename, stream, error) untuk setiap PDF di batch, termasuk isi archive zip/tar"""
+    for upload in files:
+        filename = upload.filename or "upload"
+        lower_name = filename.lower()
+        try:
+            if lower_name.endswith(".pdf"):
+                yield filename, upload.file, None
+            elif lower_name.endswith(".zip"):
+                with zipfile.ZipFile(upload.file) as archive:
+                    for member in archive.infolist():
+                        if member.is_dir() or not member.filename.lower().endswith(".pdf") or member.filename.startswith("__MACOSX/"):
+                            continue
+                        with archive.open(member) as member_file:
+                            yield member.filename, member_file, None
+            elif lower_name.endswith((".tar", ".tar.gz", ".tgz")):
+                with tarfile.open(fileobj=upload.file, mode="r:*") as archive:
+                    for member in archive:
+                        if not member.isfile() or not member.name.lower().endswith(".pdf"):
+                            continue
+                        yield member.name, archive.extractfile(member), None
+            else:
+                yield filename, None, "File must be a PDF, zip or tar archive"
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            yield filename, None, f"Invalid archive: {e}"
+
+def build_batch_tasks(batch_id: str, batch_jobs: List[dict], extraction_profile: ExtractionProfile) -> List[PageTask]:
+    """Split dokumen besar per pages_per_worker, dokumen kecil digabung dalam bundle task"""
+    tasks = []
+    bundle = []
+    bundle_pages = 0
+    
+    def flush_bundle():
+        if len(bundle) == 1:
+            tasks.append(bundle[0])
+        elif bundle:
+            tasks.append(PageTask(
+                task_id=f"{batch_id}_bundle_{len(tasks)}",
+                job_id=batch_id,
+                page_numbers=[],
+                pdf_path="",
+                extraction_profile=extraction_profile,
+                bundle=list(bundle)
+            ))
+        bundle.clear()
+    
+    for batch_job in batch_jobs:
+        page_groups = split_pages_for_workers(batch_job["page_numbers"])
+        job_tasks = [
+            PageTask(
+                task_id=f"{batch_job['job_id']}_{i}",
+                job_id=batch_job["job_id"],
+                page_numbers=task_pages,
+                pdf_path=batch_job["file_path"],
+                file_hash=batch_job["file_hash"],
+                extraction_profile=extraction_profile,
+                traceparent=batch_job["traceparent"]
+            )
+            for i, task_pages in enumerate(page_groups)
+        ]
+        if len(batch_job["page_numbers"]) >= settings.pages_per_worker:
+            tasks.extend(job_tasks)
+            continue
+        
+        bundle.extend(job_tasks)
+        bundle_pages += len(batch_job["page_numbers"])
+        if bundle_pages >= settings.pages_per_worker:
+            flush_bundle()
+            bundle_pages = 0
+    
+    flush_bundle()
+    return tasks
+
+def batch_ttl() -> Optional[int]:
+    """Batch record hidup selama job-nya masih bisa diambil"""
+    if settings.result_spill:
+        return settings.result_retention_seconds or None
+    return settings.job_ttl_seconds
+
+@app.post("/upload-batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    content_types: str = Form("text,table,image"),
+    page_from: Optional[int] = Form(None),
+    page_to: Optional[int] = Form(None),
+    ocr: OCRMode = Form(OCRMode.ON),
+    dpi: Optional[int] = Form(None),
+    text_layout: TextLayout = Form(TextLayout.SPANS)
+):
+    """Upload banyak PDF (multipart dan/atau zip/tar) sebagai satu batch
+    
+    Semua job status dan task ditulis dalam satu Redis transaction; file yang
+    tidak valid dilaporkan per file tanpa menggagalkan batch.
+    """
+    extraction_profile = build_extraction_profile(content_types, page_from, page_to, ocr, dpi, text_layout)
+    
+    check_disk_pressure(sum(upload.size or 0 for upload in files))
+    client_id = client_identity(request)
+    check_admission(client_id)
+    
+    batch_id = str(uuid.uuid4())
+    file_results = []
+    batch_jobs = []
+    enqueued = False
+    
+    try:
+        for filename, source, error in iter_batch_sources(files):
+            if len(file_results) >= settings.batch_max_files:
+                raise HTTPException(status_code=400, detail=f"Too many files in batch (max {settings.batch_max_files})")
+            
+            if error:
+                file_results.append(BatchFileResult(filename=filename, status=TaskStatus.FAILED, error=error))
+                continue
+            
+            job_id = str(uuid.uuid4())
+            temp_path = os.path.join(settings.temp_dir, f"{job_id}.pdf.part")
+            try:
+                file_hash = save_upload_stream(source, temp_path)
+                document_pages = get_pdf_page_count(temp_path)
+                page_numbers = extraction_profile.resolve_pages(document_pages)
+                if not page_numbers:
+                    raise HTTPException(status_code=400, detail=f"Page range is outside document ({document_pages} pages)")
+            except Exception as e:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                file_results.append(BatchFileResult(filename=filename, status=TaskStatus.FAILED, error=error))
+                continue
+            
+            batch_jobs.append({
+                "job_id": job_id,
+                "traceparent": new_traceparent(),
+                "temp_path": temp_path,
+                "file_path": os.path.join(settings.upload_dir, f"{job_id}.pdf"),
+                "file_hash": file_hash,
+                "page_numbers": page_numbers
+            })
+            file_results.append(BatchFileResult(
+                filename=filename,
+                job_id=job_id,
+                status=TaskStatus.PROCESSING,
+                total_pages=len(page_numbers)
+            ))
+        
+        if not batch_jobs:
+            raise HTTPException(status_code=400, detail="No valid PDF in batch")
+        
+        total_pages = sum(len(batch_job["page_numbers"]) for batch_job in batch_jobs)
+        check_admission(client_id, total_pages)
+        
+        for batch_job in batch_jobs:
+            shutil.move(batch_job["temp_path"], batch_job["file_path"])
+        
+        # Job langsung PROCESSING karena task-nya di-push bersamaan dengan status
+        job_statuses = {}
+        for batch_job in batch_jobs:
+            job_status = JobStatus(
+                job_id=batch_job["job_id"],
+                status=TaskStatus.PROCESSING,
+                total_pages=len(batch_job["page_numbers"]),
+                extraction_profile=extraction_profile,
+                client_id=client_id,
+                traceparent=batch_job["traceparent"]
+            )
+            job_statuses[job_status.job_id] = job_status
+        
+        tasks = build_batch_tasks(batch_id, batch_jobs, extraction_profile)
+        with tracer.span("enqueue_batch", batch_id=batch_id, jobs=len(batch_jobs), tasks=len(tasks)):
+            pushed = redis_queue.push_tasks(tasks, {job_id: job.model_dump() for job_id, job in job_statuses.items()})
+        if not pushed:
+            raise HTTPException(status_code=500, detail="Failed to enqueue batch")
+        enqueued = True
+        jobs_storage.update(job_statuses)
+        
+        redis_queue.set_batch(batch_id, {
+            "batch_id": batch_id,
+            "client_id": client_id,
+            "created_at": datetime.now(),
+            "files": [file_result.model_dump(include={"filename", "job_id", "total_pages", "error"}) for file_result in file_results]
+        }, ttl=batch_ttl())
+        
+        logger.info(f"Batch {batch_id} uploaded: {len(batch_jobs)} jobs, {total_pages} pages, {len(tasks)} tasks")
+        
+        return BatchUploadResponse(
+            batch_id=batch_id,
+            total_jobs=len(batch_jobs),
+            total_pages=total_pages,
+            files=file_results,
+            message=f"Batch uploaded successfully. Processing {len(batch_jobs)} PDFs ({total_pages} pages)."
+        )
+    
+    except Exception:
+        # Cleanup (juga untuk error Redis atau archive), termasuk job yang sudah sempat di-enqueue
+        for batch_job in batch_jobs:
+            if enqueued:
+                redis_queue.cancel_job(batch_job["job_id"])
+                redis_queue.remove_job_tasks(batch_job["job_id"])
+                redis_queue.delete_job_data(batch_job["job_id"])
+                jobs_storage.pop(batch_job["job_id"], None)
+            for path in (batch_job["temp_path"], batch_job["file_path"]):
+                if os.path.exists(path):
+                    os.remove(path)
+        raise
+
+def load_job_statuses(job_ids: List[str]) -> dict:
+    """Job status untuk banyak job: memory, lalu satu MGET ke Redis, lalu result store"""
+    statuses = {job_id: jobs_storage[job_id] for job_id in job_ids if job_id in jobs_storage}
+    missing_ids = [job_id for job_id in job_ids if job_id not in statuses]
+    for job_id, job_status_data in redis_queue.get_job_statuses(missing_ids).items():
+        statuses[job_id] = JobStatus(**job_status_data)
+    for job_id in missing_ids:
+        if job_id not in statuses:
+            job_status_data = result_store.get_job_status(job_id)
+            if job_status_data:
+                statuses[job_id] = JobStatus(**job_status_data)
+    return statuses
+
+@app.get("/batch-status/{batch_id}", response_model=BatchStatus)
+async def get_batch_status(batch_id: str):
+    """Aggregate status semua job dalam batch"""
+    
+    batch = redis_queue.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    job_ids = [batch_file["job_id"] for batch_file in batch["files"] if batch_file.get("job_id")]
+    statuses = load_job_statuses(job_ids)
+    
+    file_results = []
+    jobs_by_status = {}
+    for batch_file in batch["files"]:
+        job_id = batch_file.get("job_id")
+        if not job_id:
+            file_results.append(BatchFileResult(filename=batch_file["filename"], status=TaskStatus.FAILED, error=batch_file.get("error")))
+            continue
+        
+        job_status = statuses.get(job_id)
+        if job_status is None:
+            file_result = BatchFileResult(
+                filename=batch_file["filename"],
+                job_id=job_id,
+                status=TaskStatus.FAILED,
+                total_pages=batch_file["total_pages"],
+                error="Job status not found (expired)"
+            )
+        else:
+            file_result = BatchFileResult(
+                filename=batch_file["filename"],
+                job_id=job_id,
+                status=job_status.status,
+                total_pages=job_status.total_pages,
+                completed_pages=job_status.completed_pages,
+                failed_pages=job_status.failed_pages
+            )
+        file_results.append(file_result)
+        jobs_by_status[file_result.status.value] = jobs_by_status.get(file_result.status.value, 0) + 1
+    
+    # Batch masih jalan selama ada job aktif; failed hanya kalau tidak ada job yang completed
+    if any(status.value in jobs_by_status for status in ACTIVE_STATUSES):
+        batch_status = TaskStatus.PROCESSING
+    elif TaskStatus.COMPLETED.value in jobs_by_status:
+        batch_status = TaskStatus.COMPLETED
+    else:
+        batch_status = TaskStatus.FAILED
+    
+    job_results = [file_result for file_result in file_results if file_result.job_id]
+    return BatchStatus(
+        batch_id=batch_id,
+        status=batch_status,
+        total_jobs=len(job_results),
+        jobs_by_status=jobs_by_status,
+        total_pages=sum(file_result.total_pages for file_result in job_results),
+        completed_pages=sum(file_result.completed_pages for file_result in job_results),
+        failed_pages=sum(file_result.failed_pages for file_result in job_results),
+        created_at=batch["created_at"],
+        files=file_results
+    )
+
+def attach_table_records(page_results: List[PageResult]) -> List[PageResult]:
+    """Tambahkan "data" records ke setiap table (copy, data di storage tidak diubah)"""
+    expanded_results = []
+    
+    for page_result in page_results:
+        expanded_content = []
+        for content in page_result.content:
+            if content.content_type == ContentType.TABLE and isinstance(content.content, dict):
+                content = content.model_copy(update={
+                    "content": {**content.content, "data": table_records(content.content)}
+                })
+            expanded_content.append(content)
+        expanded_results.append(page_result.model_copy(update={"content": expanded_content}))
+    
+    return expanded_results
+
+def find_job_status(job_id: str) -> Optional[JobStatus]:
+    """Cari job status (tanpa page results) di memory, Redis lalu result store"""
     
     # Try memory first
     if job_id in jobs_storage:
@@ -241,19 +1016,48 @@ async def get_job_status(job_id: str):
         jobs_storage[job_id] = job_status  # Cache in memory
         return job_status
     
-    raise HTTPException(status_code=404, detail="Job not found")
-
-@app.get("/job-result/{job_id}", response_model=PDFProcessingResult)
-async def get_job_result(job_id: str):
-    """Get hasil lengkap dari job"""
+    # Try result store (job lama yang key Redis-nya sudah expire)
+    job_status_data = result_store.get_job_status(job_id)
+    if job_status_data:
+        return JobStatus(**job_status_data)
     
-    job_status = await get_job_status(job_id)
+    return None
+
+async def load_job_status(job_id: str) -> JobStatus:
+    """Load job status (tanpa page results), 404 kalau tidak ada"""
+    job_status = find_job_status(job_id)
+    if job_status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status
+
+@app.get("/job-status/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str, include_results: bool = True, format: ResultFormat = ResultFormat.LEGACY):
+    """Get status dari job
     
-    if job_status.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
-        raise HTTPException(status_code=400, detail="Job not yet completed")
+    include_results=false skip load page results, cocok untuk polling progress.
+    format=legacy (default) meng-expand text_spans ke content seperti sebelum encoding kolom.
+    """
+    job_status = await load_job_status(job_id)
+    if not include_results:
+        return job_status
+    job_status = with_job_results(job_status)
+    if format == ResultFormat.LEGACY:
+        job_status.results = [page_result.expanded() for page_result in job_status.results]
+    return job_status
+
+def build_processing_result(
+    job_status: JobStatus,
+    format: ResultFormat = ResultFormat.LEGACY,
+    include_table_data: bool = False
+) -> PDFProcessingResult:
+    """Build PDFProcessingResult lengkap dari job status"""
     
     # Sort hasil berdasarkan page number
     sorted_results = sorted(job_status.results, key=lambda x: x.page_number)
+    if format == ResultFormat.LEGACY:
+        sorted_results = [page_result.expanded() for page_result in sorted_results]
+    if include_table_data:
+        sorted_results = attach_table_records(sorted_results)
     
     processing_time = 0
     if job_status.completed_at and job_status.created_at:
@@ -261,7 +1065,7 @@ async def get_job_result(job_id: str):
     
     # 🤖 Create processing result dengan knowledge aggregation
     result = PDFProcessingResult(
-        job_id=job_id,
+        job_id=job_status.job_id,
         status=job_status.status,
         total_pages=job_status.total_pages,
         completed_pages=job_status.completed_pages,
@@ -279,14 +1083,8 @@ async def get_job_result(job_id: str):
     
     return result
 
-@app.get("/job-knowledge/{job_id}")
-async def get_job_knowledge(job_id: str):
-    """Get aggregated knowledge content untuk RAG consumption"""
-    
-    job_status = await get_job_status(job_id)
-    
-    if job_status.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
-        raise HTTPException(status_code=400, detail="Job not yet completed")
+def build_job_knowledge(job_status: JobStatus) -> dict:
+    """Build aggregated knowledge payload dari job status"""
     
     # Sort hasil berdasarkan page number
     sorted_results = sorted(job_status.results, key=lambda x: x.page_number)
@@ -309,7 +1107,7 @@ async def get_job_knowledge(job_id: str):
     ])
     
     return {
-        "job_id": job_id,
+        "job_id": job_status.job_id,
         "status": job_status.status,
         "total_pages": job_status.total_pages,
         "processed_pages": len(page_knowledge),
@@ -321,14 +1119,419 @@ async def get_job_knowledge(job_id: str):
         "completed_at": job_status.completed_at
     }
 
+def result_payload_name(format: ResultFormat, include_table_data: bool) -> str:
+    """Nama payload memoized untuk variant /job-result"""
+    return f"result:{format.value}:{int(include_table_data)}"
+
+def encode_payload(json_bytes: bytes) -> bytes:
+    """Compress payload JSON kalau RESULT_COMPRESSION aktif"""
+    if settings.result_compression:
+        return gzip.compress(json_bytes, compresslevel=6)
+    return json_bytes
+
+def payload_response(request: Request, payload: bytes) -> Response:
+    """Serve payload pre-serialized apa adanya, tanpa validasi ulang lewat Pydantic"""
+    is_gzip = payload[:2] == GZIP_MAGIC
+    if is_gzip and "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=payload, media_type="application/json", headers={"Content-Encoding": "gzip"})
+    if is_gzip:
+        payload = gzip.decompress(payload)
+    return Response(content=payload, media_type="application/json")
+
+def materialize_job_outputs(job: JobStatus) -> dict:
+    """Serialize final result dan knowledge sekali saat job selesai, return payloads per nama"""
+    result = build_processing_result(job)
+    knowledge = build_job_knowledge(job)
+    payloads = {
+        result_payload_name(ResultFormat.LEGACY, False): encode_payload(result.model_dump_json().encode()),
+        "knowledge": encode_payload(json.dumps(knowledge, cls=DateTimeEncoder).encode())
+    }
+    for name, payload in payloads.items():
+        redis_queue.set_job_payload(job.job_id, name, payload)
+    logger.info(f"Materialized result and knowledge payloads for job {job.job_id}")
+    return payloads
+
+CONTENT_PROJECTION_FIELDS = {"bbox", "confidence", "metadata"}
+PAGE_PROJECTION_FIELDS = {"knowledge", "text_spans", "error_message", "timings", "stats", "attempts"}
+
+def parse_csv_param(value: Optional[str]) -> List[str]:
+    """Parse query param comma-separated"""
+    if not value:
+        return []
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+def project_page(
+    page_data: dict,
+    wanted_types: Optional[set],
+    excluded_fields: set,
+    format: ResultFormat,
+    include_table_data: bool
+) -> dict:
+    """Filter content type dan buang field yang tidak diminta dari satu page result"""
+    if format == ResultFormat.LEGACY and page_data.get("text_spans"):
+        page_data = PageResult(**page_data).expanded().model_dump(mode="json")
+    
+    content = page_data.get("content", [])
+    if wanted_types is not None:
+        content = [item for item in content if item["content_type"] in wanted_types]
+        if ContentType.TEXT.value not in wanted_types:
+            page_data["text_spans"] = None
+    
+    projected_content = []
+    for item in content:
+        item = {key: value for key, value in item.items() if key not in excluded_fields}
+        if include_table_data and item["content_type"] == ContentType.TABLE.value and isinstance(item["content"], dict):
+            item["content"] = {**item["content"], "data": table_records(item["content"])}
+        projected_content.append(item)
+    page_data["content"] = projected_content
+    
+    # Field yang sama juga dibuang dari encoding kolom
+    text_spans = page_data.get("text_spans")
+    if text_spans:
+        if "bbox" in excluded_fields:
+            text_spans.pop("bbox", None)
+        if "metadata" in excluded_fields:
+            for key in ("fonts", "font_id", "size", "flags"):
+                text_spans.pop(key, None)
+    
+    for field in PAGE_PROJECTION_FIELDS & excluded_fields:
+        page_data.pop(field, None)
+    
+    return page_data
+
+def build_result_page(
+    job_status: JobStatus,
+    from_page: Optional[int],
+    to_page: Optional[int],
+    content_types: Optional[str],
+    exclude_fields: Optional[str],
+    format: ResultFormat,
+    include_table_data: bool
+) -> Response:
+    """Build sebagian result (page range + filter + projection) langsung dari per-page storage"""
+    wanted_types = None
+    if content_types:
+        wanted_types = set(parse_csv_param(content_types))
+        invalid_types = wanted_types - {content_type.value for content_type in ContentType}
+        if invalid_types:
+            raise HTTPException(status_code=400, detail=f"Invalid content_types: {', '.join(sorted(invalid_types))}")
+    
+    excluded_fields = set(parse_csv_param(exclude_fields))
+    invalid_fields = excluded_fields - CONTENT_PROJECTION_FIELDS - PAGE_PROJECTION_FIELDS
+    if invalid_fields:
+        raise HTTPException(status_code=400, detail=f"Invalid exclude_fields: {', '.join(sorted(invalid_fields))}")
+    
+    if from_page is not None and to_page is not None and to_page < from_page:
+        raise HTTPException(status_code=400, detail="to_page must be >= from_page")
+    
+    page_numbers = [
+        page_number for page_number in load_job_page_numbers(job_status.job_id)
+        if (from_page is None or page_number >= from_page) and (to_page is None or page_number <= to_page)
+    ]
+    pages = [
+        project_page(page_data, wanted_types, excluded_fields, format, include_table_data)
+        for page_data in load_job_pages(job_status.job_id, page_numbers)
+    ]
+    
+    processing_time = 0
+    if job_status.completed_at and job_status.created_at:
+        processing_time = (job_status.completed_at - job_status.created_at).total_seconds()
+    
+    result = {
+        "job_id": job_status.job_id,
+        "status": job_status.status,
+        "total_pages": job_status.total_pages,
+        "completed_pages": job_status.completed_pages,
+        "failed_pages": job_status.failed_pages,
+        "processing_time": processing_time,
+        "from_page": from_page,
+        "to_page": to_page,
+        "returned_pages": len(pages),
+        "results": pages,
+        "created_at": job_status.created_at,
+        "completed_at": job_status.completed_at
+    }
+    return Response(content=json.dumps(result, cls=DateTimeEncoder), media_type="application/json")
+
+@app.get("/job-result/{job_id}", response_model=PDFProcessingResult)
+async def get_job_result(
+    request: Request,
+    job_id: str,
+    include_table_data: bool = False,
+    format: ResultFormat = ResultFormat.LEGACY,
+    from_page: Optional[int] = None,
+    to_page: Optional[int] = None,
+    content_types: Optional[str] = None,
+    exclude_fields: Optional[str] = None
+):
+    """Get hasil lengkap dari job
+    
+    include_table_data=true menambahkan "data" (list of dict per row) ke setiap table.
+    format=compact mengembalikan text spans dalam encoding kolom (text_spans) tanpa expand.
+    from_page/to_page, content_types (misal "text,table") dan exclude_fields
+    (misal "metadata,bbox") hanya me-load dan mengembalikan bagian yang diminta.
+    """
+    
+    job_status = await load_job_status(job_id)
+    
+    if job_status.status == TaskStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail="Job was cancelled")
+    
+    if job_status.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
+        raise HTTPException(status_code=400, detail="Job not yet completed")
+    
+    # Page range, filter dan projection di-build dari per-page storage, hanya untuk halaman yang diminta
+    if from_page is not None or to_page is not None or content_types or exclude_fields:
+        return build_result_page(job_status, from_page, to_page, content_types, exclude_fields, format, include_table_data)
+    
+    if job_status.status == TaskStatus.FAILED:
+        return build_processing_result(with_job_results(job_status), format, include_table_data)
+    
+    # Result completed job di-serve dari payload memoized; variant non-default di-memoize saat pertama diminta
+    payload_name = result_payload_name(format, include_table_data)
+    payload = load_job_payload(job_id, payload_name)
+    if payload is None:
+        result = build_processing_result(with_job_results(job_status), format, include_table_data)
+        payload = encode_payload(result.model_dump_json().encode())
+        redis_queue.set_job_payload(job_id, payload_name, payload)
+    
+    return payload_response(request, payload)
+
+@app.get("/job-knowledge/{job_id}")
+async def get_job_knowledge(request: Request, job_id: str):
+    """Get aggregated knowledge content untuk RAG consumption"""
+    
+    job_status = await load_job_status(job_id)
+    
+    if job_status.status == TaskStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail="Job was cancelled")
+    
+    if job_status.status not in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
+        raise HTTPException(status_code=400, detail="Job not yet completed")
+    
+    if job_status.status == TaskStatus.FAILED:
+        return build_job_knowledge(with_job_results(job_status))
+    
+    payload = load_job_payload(job_id, "knowledge")
+    if payload is None:
+        payload = encode_payload(json.dumps(build_job_knowledge(with_job_results(job_status)), cls=DateTimeEncoder).encode())
+        redis_queue.set_job_payload(job_id, "knowledge", payload)
+    
+    return payload_response(request, payload)
+
+def build_job_profile(job_status: JobStatus, pages: List[dict], top: int) -> dict:
+    """Aggregate timing per stage dan stats dari page results, plus halaman paling lambat"""
+    stage_totals = {}
+    stage_max = {}
+    stats_totals = {}
+    extraction_levels = {}
+    for page in pages:
+        # Hanya halaman completed: halaman failed/cancelled tidak punya level ekstraksi yang berhasil
+        if page["status"] == TaskStatus.COMPLETED and page.get("extraction_level"):
+            level = page["extraction_level"]
+            extraction_levels[level] = extraction_levels.get(level, 0) + 1
+        for stage, seconds in page.get("timings", {}).items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+            stage_max[stage] = max(stage_max.get(stage, 0.0), seconds)
+        for stat, value in page.get("stats", {}).items():
+            stats_totals[stat] = stats_totals.get(stat, 0) + value
+    
+    total_stage_time = sum(stage_totals.values())
+    stages = [
+        {
+            "stage": stage,
+            "total_seconds": round(total, 4),
+            "mean_seconds": round(total / len(pages), 4),
+            "max_seconds": round(stage_max[stage], 4),
+            "share": round(total / total_stage_time, 4) if total_stage_time else 0.0
+        }
+        for stage, total in sorted(stage_totals.items(), key=lambda item: item[1], reverse=True)
+    ]
+    
+    slowest_pages = []
+    for page in sorted(pages, key=lambda page: page["processing_time"], reverse=True)[:top]:
+        timings = page.get("timings", {})
+        slowest_pages.append({
+            "page_number": page["page_number"],
+            "status": page["status"],
+            "processing_time": round(page["processing_time"], 4),
+            "slowest_stage": max(timings, key=timings.get) if timings else None,
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            "stats": page.get("stats", {})
+        })
+    
+    processing_times = [page["processing_time"] for page in pages]
+    return {
+        "job_id": job_status.job_id,
+        "status": job_status.status,
+        "total_pages": job_status.total_pages,
+        "profiled_pages": len(pages),
+        "total_page_seconds": round(sum(processing_times), 4),
+        "mean_page_seconds": round(sum(processing_times) / len(pages), 4) if pages else 0.0,
+        "stages": stages,
+        "stats": stats_totals,
+        "extraction_levels": extraction_levels,  # Halaman per level ekstraksi, selain "full" = hasil retry degraded
+        "slowest_pages": slowest_pages
+    }
+
+@app.get("/job-profile/{job_id}")
+async def get_job_profile(job_id: str, top: int = 10):
+    """Breakdown waktu per stage dan halaman paling lambat (juga untuk job yang masih berjalan)"""
+    
+    if top < 1 or top > 100:
+        raise HTTPException(status_code=400, detail="top must be between 1 and 100")
+    
+    job_status = await load_job_status(job_id)
+    return build_job_profile(job_status, load_job_pages(job_id), top)
+
+@app.get("/job-profile/{job_id}/artifacts")
+async def list_profile_artifacts(job_id: str):
+    """List artifact cProfile/tracemalloc job (upload dengan profiling=true atau kena sampling)"""
+    
+    job_status = await load_job_status(job_id)
+    return {
+        "job_id": job_id,
+        "artifacts": [
+            {"name": name, "url": f"/job-profile/{job_id}/artifacts/{name}"}
+            for name in job_status.profile_artifacts
+        ]
+    }
+
+@app.get("/job-profile/{job_id}/artifacts/{name}")
+async def download_profile_artifact(job_id: str, name: str):
+    """Download satu artifact: .pstats (pstats.Stats / snakeviz) atau .txt (report text)"""
+    
+    job_status = await load_job_status(job_id)
+    if name not in job_status.profile_artifacts:
+        raise HTTPException(status_code=404, detail="Profile artifact not found")
+    
+    payload = load_job_payload(job_id, name)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Profile artifact expired")
+    
+    media_type = "text/plain; charset=utf-8" if name.endswith(".txt") else "application/octet-stream"
+    return Response(
+        content=payload,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}"'}
+    )
+
+@app.get("/job-chunks/{job_id}")
+async def get_job_chunks(job_id: str, offset: int = 0, limit: int = 100):
+    """Get precomputed knowledge chunks (paginated) untuk RAG ingestion"""
+    
+    if offset < 0 or limit < 1 or limit > 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 1000")
+    
+    job_status = await load_job_status(job_id)
+    
+    if job_status.status != TaskStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Job not yet completed")
+    
+    total_chunks = redis_queue.count_job_chunks(job_id)
+    if total_chunks is not None:
+        chunks = redis_queue.get_job_chunks(job_id, offset, limit) if total_chunks else []
+    else:
+        # Chunks sudah tidak ada di Redis: ambil dari result store, atau build ulang sekali
+        all_chunks = result_store.get_chunks(job_id)
+        if all_chunks is None:
+            all_chunks = store_job_chunks(with_job_results(job_status))
+        total_chunks = len(all_chunks)
+        chunks = all_chunks[offset:offset + limit]
+    
+    return {
+        "job_id": job_id,
+        "total_chunks": total_chunks,
+        "offset": offset,
+        "limit": limit,
+        "chunk_size": settings.chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+        "chunk_unit": settings.chunk_unit,
+        "chunks": chunks
+    }
+
+@app.delete("/job/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel job, hapus pending tasks dan beri sinyal ke worker untuk berhenti"""
+    
+    job_status = await load_job_status(job_id)
+    
+    if job_status.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
+        raise HTTPException(status_code=409, detail=f"Job already {job_status.status.value}")
+    
+    # Set flag dulu supaya process_pdf_async dan worker berhenti, lalu bersihkan queue
+    redis_queue.cancel_job(job_id)
+    removed_tasks = redis_queue.remove_job_tasks(job_id)
+    
+    job_status.status = TaskStatus.CANCELLED
+    job_status.completed_at = datetime.now()
+    record_job_finished(job_status)
+    job_data = job_status.model_dump()
+    redis_queue.set_job_status(job_id, job_data)
+    jobs_storage[job_id] = job_status
+    
+    logger.info(f"Job {job_id} cancelled - {removed_tasks} pending tasks removed")
+    
+    return {
+        "job_id": job_id,
+        "status": job_status.status,
+        "removed_tasks": removed_tasks,
+        "message": f"Job cancelled. {removed_tasks} pending tasks removed from queue."
+    }
+
+@app.get("/workers")
+async def list_workers():
+    """Worker terdaftar beserta heartbeat terakhir; worker tanpa heartbeat menunggu di-reap monitor"""
+    workers = []
+    for worker_id, heartbeat in redis_queue.get_workers().items():
+        if heartbeat is None:
+            workers.append({"worker_id": worker_id, "alive": False, "status": "dead"})
+        else:
+            workers.append({**heartbeat, "alive": True})
+    
+    alive_workers = [worker for worker in workers if worker["alive"]]
+    return {
+        "total": len(workers),
+        "alive": len(alive_workers),
+        "busy": sum(1 for worker in alive_workers if worker["status"] == "busy"),
+        "pages_per_second": round(sum(worker["pages_per_second"] for worker in alive_workers), 3),
+        "queue_depth": redis_queue.get_queue_depth(),
+        "workers": workers
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics master"""
+    for queue_name in (settings.pdf_processing_queue, settings.result_queue):
+        QUEUE_DEPTH.labels(queue_name).set(redis_queue.get_queue_depth(queue_name))
+    
+    status_counts = {status.value: 0 for status in TaskStatus}
+    for job in jobs_storage.values():
+        status_counts[job.status.value] += 1
+    for status, count in status_counts.items():
+        JOBS_IN_MEMORY.labels(status).set(count)
+    
+    THROUGHPUT.set(throughput.pages_per_second())
+    
+    worker_counts = {"idle": 0, "busy": 0, "draining": 0, "dead": 0}
+    for heartbeat in redis_queue.get_workers().values():
+        worker_status = heartbeat["status"] if heartbeat else "dead"
+        worker_counts[worker_status] = worker_counts.get(worker_status, 0) + 1
+    for worker_status, count in worker_counts.items():
+        WORKERS.labels(worker_status).set(count)
+    
+    return Response(content=generate_latest(master_registry), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     redis_status = redis_queue.ping()
+    upload_disk = disk_status(settings.upload_dir)
     
     return {
         "status": "healthy" if redis_status else "unhealthy",
         "redis": redis_status,
+        "disk": upload_disk,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -0,0 +1,49 @@
+import math
+import time
+from collections import deque
+from typing import Optional
+
+class ThroughputTracker:
+    """Estimasi pages/sec dari halaman yang selesai dalam sliding window terakhir"""
+
+    def __init__(self, window_seconds: float = 60.0, default_rate: float = 1.0):
+        self.window_seconds = window_seconds
+        self.default_rate = default_rate
+        self.last_rate: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self._events = deque()  # (timestamp, pages)
+        self._window_pages = 0
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._events and self._events[0][0] < cutoff:
+            _, pages = self._events.popleft()
+            self._window_pages -= pages
+
+    def record(self, pages: int, now: Optional[float] = None):
+        """Catat halaman yang selesai"""
+        if pages <= 0:
+            return
+        now = now or time.time()
+        if self.started_at is None:
+            self.started_at = now
+        self._events.append((now, pages))
+        self._window_pages += pages
+        self._evict(now)
+
+    def pages_per_second(self, now: Optional[float] = None) -> float:
+        """Rate saat ini; window kosong (idle/stall) memakai rate terakhir atau default"""
+        now = now or time.time()
+        self._evict(now)
+        if not self._window_pages:
+            return self.last_rate or self.default_rate
+        # Sebelum window penuh, bagi dengan umur tracker (minimal 5 detik supaya tidak spike)
+        elapsed = min(self.window_seconds, max(now - self.started_at, 5.0))
+        self.last_rate = self._window_pages / elapsed
+        return self.last_rate
+
+def retry_after_seconds(excess_pages: float, pages_per_second: float, max_seconds: int = 3600) -> int:
+    """Berapa detik sampai backlog turun sebanyak excess_pages"""
+    if pages_per_second <= 0:
+        return max_seconds
+    return max(1, min(max_seconds, math.ceil(excess_pages / pages_per_second)))
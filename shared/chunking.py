@@ -0,0 +1,162 @@
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+from .config import settings
+
+# Approximate tokenizer: kata dan tanda baca dihitung sebagai token masing-masing
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\S+")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+CHUNK_UNITS = ("chars", "tokens")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count tanpa dependency tokenizer"""
+    return len(_TOKEN_RE.findall(text))
+
+
+class _Measure:
+    def __init__(self, text: str, unit: str):
+        self.text = text
+        self.unit = unit
+    
+    def of(self, start: int, end: int) -> int:
+        if self.unit == "tokens":
+            return count_tokens(self.text[start:end])
+        return end - start
+
+
+def _split_units(text: str, start: int, end: int, chunk_size: int, measure: _Measure) -> List[Tuple[int, int, int]]:
+    """Split rentang text menjadi unit (start, end, size) yang masing-masing <= chunk_size
+    
+    Urutan preferensi boundary: paragraf/table (baris kosong), baris (row table), kata, karakter.
+    """
+    size = measure.of(start, end)
+    if size <= chunk_size:
+        return [(start, end, size)]
+    
+    units = []
+    segment = text[start:end]
+    
+    # 1. Paragraf / table block
+    if _PARAGRAPH_BREAK_RE.search(segment):
+        position = 0
+        for match in _PARAGRAPH_BREAK_RE.finditer(segment):
+            if match.start() > position:
+                units.extend(_split_units(text, start + position, start + match.start(), chunk_size, measure))
+            position = match.end()
+        if position < len(segment):
+            units.extend(_split_units(text, start + position, end, chunk_size, measure))
+        return units
+    
+    # 2. Baris (row table tidak pernah dipotong di tengah kalau muat)
+    if "\n" in segment:
+        position = 0
+        for line in segment.split("\n"):
+            if line.strip():
+                units.extend(_split_units(text, start + position, start + position + len(line), chunk_size, measure))
+            position += len(line) + 1
+        return units
+    
+    # 3. Kata, lalu karakter untuk kata yang lebih panjang dari chunk_size
+    for match in _WORD_RE.finditer(segment):
+        word_start, word_end = start + match.start(), start + match.end()
+        word_size = measure.of(word_start, word_end)
+        if word_size <= chunk_size:
+            units.append((word_start, word_end, word_size))
+        else:
+            step = max(chunk_size, 1) if measure.unit == "chars" else max(len(match.group()) // word_size * chunk_size, 1)
+            for piece_start in range(word_start, word_end, step):
+                piece_end = min(piece_start + step, word_end)
+                units.append((piece_start, piece_end, measure.of(piece_start, piece_end)))
+    return units
+
+
+def chunk_page_knowledge(
+    page_number: int,
+    knowledge: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    unit: str = "chars"
+) -> List[Dict[str, Any]]:
+    """Chunk knowledge satu halaman; offset relatif terhadap knowledge halaman tersebut"""
+    if unit not in CHUNK_UNITS:
+        raise ValueError(f"Invalid chunk unit: {unit}")
+    if not knowledge.strip():
+        return []
+    
+    measure = _Measure(knowledge, unit)
+    units = _split_units(knowledge, 0, len(knowledge), chunk_size, measure)
+    chunks = []
+    
+    def extend_size(current_size: int, first: int, new_last: int) -> int:
+        """Ukuran chunk units[first..new_last] dari ukuran sebelumnya (running sum)"""
+        if unit == "chars":
+            return units[new_last][1] - units[first][0]
+        return current_size + units[new_last][2]
+    
+    first = 0
+    while first < len(units):
+        # Greedy: tambah unit selama chunk masih muat
+        last = first
+        size = units[first][2]
+        while last + 1 < len(units):
+            next_size = extend_size(size, first, last + 1)
+            if next_size > chunk_size:
+                break
+            size = next_size
+            last += 1
+        
+        start_offset, end_offset = units[first][0], units[last][1]
+        chunk_text = knowledge[start_offset:end_offset]
+        chunks.append({
+            "page_number": page_number,
+            "text": chunk_text,
+            "start_offset": start_offset,
+            "end_offset": end_offset,
+            "char_count": len(chunk_text),
+            "token_count": count_tokens(chunk_text)
+        })
+        
+        if last + 1 >= len(units):
+            break
+        
+        # Overlap: chunk berikutnya mulai dari unit paling awal yang ekor-nya masih muat di chunk_overlap,
+        # dan overlap plus unit baru pertama harus muat di chunk_size (kalau tidak, chunk berikutnya hanya
+        # berisi overlap, duplikat dari chunk ini)
+        next_first = last + 1
+        overlap_size = 0
+        while next_first - 1 > first:
+            candidate = next_first - 1
+            if unit == "chars":
+                candidate_size = units[last][1] - units[candidate][0]
+                with_next_size = units[last + 1][1] - units[candidate][0]
+            else:
+                candidate_size = overlap_size + units[candidate][2]
+                with_next_size = candidate_size + units[last + 1][2]
+            if candidate_size > chunk_overlap or with_next_size > chunk_size:
+                break
+            overlap_size = candidate_size
+            next_first = candidate
+        first = next_first
+    
+    return chunks
+
+
+def chunk_document_knowledge(
+    page_knowledge: Iterable[Tuple[int, str]],
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    unit: str = None
+) -> List[Dict[str, Any]]:
+    """Chunk knowledge seluruh dokumen per halaman, chunk tidak pernah melintasi halaman"""
+    chunk_size = chunk_size or settings.chunk_size
+    chunk_overlap = settings.chunk_overlap if chunk_overlap is None else chunk_overlap
+    unit = unit or settings.chunk_unit
+    
+    chunks = []
+    for page_number, knowledge in page_knowledge:
+        for chunk in chunk_page_knowledge(page_number, knowledge, chunk_size, chunk_overlap, unit):
+            chunk["chunk_index"] = len(chunks)
+            chunks.append(chunk)
+    return chunks
@@ -20,9 +20,31 @@ class Settings(BaseSettings):
     
     # Worker Configuration
     worker_concurrency: int = 4
+    worker_metrics_port: int = 9100  # Port HTTP /metrics Prometheus di worker, 0 = disable
+    worker_heartbeat_interval: int = 5  # Interval heartbeat worker ke Redis (detik)
+    worker_heartbeat_ttl: int = 30  # Worker tanpa heartbeat selama ini dianggap mati, task-nya di-requeue
+    worker_monitor_interval: int = 10  # Interval master mengecek worker mati (detik)
+    max_task_requeues: int = 2  # Task yang worker-nya mati lebih dari ini ditandai failed (poison task)
+    worker_max_rss_mb: int = 0  # Worker restart sendiri (re-exec) di antara task kalau RSS melewati ini, 0 = disable
+    
+    # Supervisor Configuration (autoscale worker process di satu host, worker_app/supervisor.py)
+    supervisor_min_workers: int = 1
+    supervisor_max_workers: int = 4
+    supervisor_interval: float = 5.0  # Interval evaluasi scaling (detik)
+    supervisor_tasks_per_worker: int = 4  # Target task di queue per worker; lebih dari ini = scale up
+    supervisor_max_backlog_age: float = 60.0  # Task tertua di queue lebih tua dari ini = scale up (latency SLO)
+    supervisor_scale_up_step: int = 2  # Maksimum worker baru per evaluasi
+    supervisor_scale_up_cooldown: float = 30.0  # Jeda minimum antar scale up (detik)
+    supervisor_scale_down_cooldown: float = 300.0  # Jeda sejak scaling terakhir sebelum worker idle di-retire
+    supervisor_max_cpu_percent: float = 85.0  # Tidak scale up kalau CPU host di atas ini
+    supervisor_min_free_memory_mb: int = 1024  # RAM yang harus tetap tersisa setelah worker baru jalan
+    supervisor_worker_memory_mb: int = 1024  # Estimasi RSS worker sebelum ada heartbeat (model OCR cukup besar)
+    supervisor_drain_timeout: float = 300.0  # Worker yang belum selesai drain setelah ini di-kill (task-nya di-requeue master)
+    supervisor_metrics_port: int = 9200  # Port HTTP /metrics Prometheus supervisor, 0 = disable
     
     # File Upload Configuration
     max_file_size: int = 100 * 1024 * 1024  # 100MB
+    batch_max_files: int = 1000  # Maksimum PDF per /upload-batch (termasuk isi archive)
     
     # 🔧 Path configuration dengan absolute path
     @property
@@ -33,18 +55,25 @@ class Settings(BaseSettings):
     
     @property
     def upload_dir(self) -> str:
-        """Upload directory path (absolute)"""
-        upload_path = self.project_root / "uploads"
-        upload_path.mkdir(exist_ok=True)  # Create if not exists
+        """Upload directory path (absolute), bisa di-override dengan UPLOADS_PATH"""
+        upload_path = Path(self.uploads_path) if self.uploads_path else self.project_root / "uploads"
+        upload_path.mkdir(parents=True, exist_ok=True)  # Create if not exists
         return str(upload_path)
     
     @property
     def temp_dir(self) -> str:
-        """Temp directory path (absolute)"""
-        temp_path = self.project_root / "temp"
-        temp_path.mkdir(exist_ok=True)  # Create if not exists
+        """Temp directory path (absolute), bisa di-override dengan TEMP_PATH"""
+        temp_path = Path(self.temp_path) if self.temp_path else self.project_root / "temp"
+        temp_path.mkdir(parents=True, exist_ok=True)  # Create if not exists
         return str(temp_path)
     
+    @property
+    def results_dir(self) -> str:
+        """Directory result store (cold tier), bisa di-override dengan RESULTS_PATH"""
+        results_path = Path(self.results_path) if self.results_path else self.project_root / "results"
+        results_path.mkdir(parents=True, exist_ok=True)
+        return str(results_path)
+    
     @property
     def logs_dir(self) -> str:
         """Logs directory path (absolute)"""
@@ -54,6 +83,62 @@ class Settings(BaseSettings):
     
     # Processing Configuration
     pages_per_worker: int = 5  # Berapa halaman per worker
+    ocr_auto_min_text_chars: int = 100  # OCR mode auto: OCR kalau native text lebih sedikit dari ini
+    page_cache_ttl: int = 86400  # TTL page result cache (detik), 0 = disable
+    table_prefilter: bool = True  # Skip pdfplumber di halaman tanpa garis table
+    compact_text_spans: bool = True  # Kirim text spans dalam encoding kolom (CompactTextSpans)
+    max_image_pixels: int = 25_000_000  # Image lebih besar di-downscale sebelum OCR (render di resolusi target), 0 = tanpa batas
+    page_time_budget: float = 0  # Soft budget per halaman (detik): table/OCR di-skip setelah lewat, 0 = tanpa batas
+    page_timeout: float = 300  # Hard timeout per halaman (detik) di process terpisah, halaman di-fail dan process di-recycle; 0 = inline tanpa timeout
+    page_max_attempts: int = 4  # Attempt maksimum per halaman (full + retry degraded), 1 = tanpa retry
+    page_retry_levels: str = "no_tables,text_only,rasterized_ocr"  # Urutan level retry setelah attempt full
+    page_retry_backoff: float = 0.5  # Jeda sebelum retry pertama (detik), dikali 2 tiap retry berikutnya
+    page_retry_backoff_max: float = 5.0  # Jeda maksimum antar retry (detik)
+    page_retry_timeout: float = 60  # PAGE_TIMEOUT untuk attempt retry, supaya halaman hang cepat dapat hasil degraded
+    page_retry_rasterize_dpi: int = 150  # DPI render halaman untuk level rasterized_ocr
+    
+    # RAG Chunking Configuration (chunk dibuat sekali saat job selesai)
+    chunk_size: int = 1000
+    chunk_overlap: int = 100
+    chunk_unit: str = "chars"  # chars | tokens
+    
+    # Result Configuration
+    result_compression: bool = True  # Gzip payload result/knowledge yang di-materialize
+    
+    # Retention Configuration
+    job_ttl_seconds: int = 3600  # TTL semua key job di Redis (hot tier)
+    result_spill: bool = True  # Simpan output job completed ke result store di disk (cold tier)
+    result_retention_seconds: int = 7 * 86400  # Umur result di disk sebelum dihapus sweeper, 0 = simpan selamanya
+    retention_sweep_interval: int = 300  # Interval sweeper (detik)
+    results_path: Optional[str] = None  # Default: {project_root}/results
+    
+    # File Lifecycle Configuration
+    upload_retention_seconds: int = 0  # 0 = hapus PDF upload begitu result tersimpan, >0 = simpan N detik setelah job selesai
+    stale_temp_seconds: int = 3600  # Temp file upload lebih tua dari ini dihapus sweeper
+    min_free_disk_bytes: int = 1024 * 1024 * 1024  # Upload ditolak (503) kalau free space di bawah ini
+    min_free_disk_percent: float = 5.0  # ... atau free space di bawah persentase ini
+    disk_pressure_retry_after: int = 60  # Retry-After (detik) saat disk pressure
+    uploads_path: Optional[str] = None  # Default: {project_root}/uploads
+    temp_path: Optional[str] = None  # Default: {project_root}/temp
+    
+    # Admission Control Configuration
+    admission_control: bool = True
+    max_queue_depth: int = 10000  # Task di pdf_processing_queue, di atas ini upload ditolak (503)
+    max_backlog_seconds: int = 3600  # Estimasi waktu habiskan backlog, di atas ini upload ditolak (503)
+    client_max_active_pages: int = 2000  # Halaman pending/processing per client, di atas ini 429
+    throughput_window_seconds: int = 60  # Window untuk estimasi pages/sec
+    default_pages_per_second: float = 2.0  # Estimasi awal sebelum ada halaman yang selesai
+    
+    # Profiling Configuration (per job lewat flag upload, atau sampling)
+    profiling_sample_rate: int = 0  # Profile 1 dari N task di worker, 0 = hanya job dengan profiling=true
+    profiling_top: int = 40  # Jumlah fungsi/alokasi teratas di report text
+    profiling_traceback_frames: int = 1  # Frame per alokasi tracemalloc (lebih banyak = lebih lambat)
+    
+    # Tracing Configuration (span dari upload sampai result di-apply)
+    tracing_exporter: str = "none"  # none | file (JSONL) | otlp (OTLP/HTTP JSON)
+    tracing_file_path: Optional[str] = None  # Default: {logs_dir}/traces.jsonl
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_flush_interval: float = 2.0  # Interval export batch span (detik)
     
     # Logging
     log_level: str = "INFO"
@@ -0,0 +1,106 @@
+from typing import Any, Dict, Iterable, List, Optional
+from .models import ContentType, ExtractedContent, CompactTextSpans
+
+
+def normalize_fragment(text: Any) -> str:
+    """Normalize satu fragment text (span, cell, OCR text) menjadi satu baris
+    
+    Semua whitespace di-collapse menjadi satu spasi. str.split() tanpa argumen jauh lebih
+    cepat daripada regex per fragment. Line break hanya dibuat oleh builder, jadi struktur
+    baris (misal row table) tetap terjaga.
+    """
+    if text is None:
+        return ""
+    return " ".join(str(text).split())
+
+
+class KnowledgeBuilder:
+    """Single-pass builder untuk knowledge text per halaman
+    
+    Setiap fragment dinormalisasi sekali saat ditambahkan dan di-append ke list,
+    string final hanya di-join sekali di build(). Urutan text mengikuti urutan input
+    (reading order dari extractor), row table tetap di baris masing-masing.
+    """
+    
+    def __init__(self):
+        self._text_lines: List[str] = []
+        self._table_blocks: List[str] = []
+        self._image_lines: List[str] = []
+    
+    def add_text(self, text: Any):
+        line = normalize_fragment(text)
+        if line:
+            self._text_lines.append(line)
+    
+    def add_text_spans(self, text_spans: CompactTextSpans):
+        for text in text_spans.text:
+            self.add_text(text)
+    
+    def add_table(self, table_data: Dict[str, Any]):
+        if "headers" not in table_data or "rows" not in table_data:
+            return
+        
+        lines = [f"Table: {table_data.get('table_id', 'Unknown')}"]
+        
+        headers = table_data["headers"]
+        if headers:
+            header_line = " | ".join(normalize_fragment(header) for header in headers)
+            lines.append(header_line)
+            lines.append("-" * len(header_line))
+        
+        for row in table_data["rows"]:
+            if row:
+                lines.append(" | ".join(normalize_fragment(cell) for cell in row))
+        
+        self._table_blocks.append("\n".join(lines))
+    
+    def add_image(self, image_data: Dict[str, Any]):
+        image_text = normalize_fragment(image_data.get("text_summary"))
+        
+        # Fallback ke detail extracted text kalau summary tidak ada
+        if not image_text and image_data.get("extracted_text"):
+            image_text = normalize_fragment(" ".join(
+                str(text_item["text"])
+                for text_item in image_data["extracted_text"]
+                if isinstance(text_item, dict) and "text" in text_item
+            ))
+        
+        if image_text:
+            self._image_lines.append(f"Image {image_data.get('image_id', 'Unknown')} Text: {image_text}")
+    
+    def add_content(self, content: ExtractedContent):
+        if content.content_type == ContentType.TEXT:
+            if isinstance(content.content, str):
+                self.add_text(content.content)
+        elif content.content_type == ContentType.TABLE:
+            if isinstance(content.content, dict):
+                self.add_table(content.content)
+        elif content.content_type == ContentType.IMAGE:
+            if isinstance(content.content, dict):
+                self.add_image(content.content)
+    
+    def build(self) -> str:
+        sections = []
+        if self._text_lines:
+            sections.append("TEXT CONTENT:\n" + "\n".join(self._text_lines))
+        if self._table_blocks:
+            sections.append("TABLE CONTENT:\n" + "\n\n".join(self._table_blocks))
+        if self._image_lines:
+            sections.append("IMAGE TEXT CONTENT:\n" + "\n".join(self._image_lines))
+        return "\n\n".join(sections)
+
+
+def build_page_knowledge(
+    content_list: Iterable[ExtractedContent],
+    text_spans: Optional[CompactTextSpans] = None
+) -> str:
+    """Build knowledge text untuk RAG dari hasil ekstraksi satu halaman"""
+    builder = KnowledgeBuilder()
+    
+    if text_spans is not None:
+        builder.add_text_spans(text_spans)
+    
+    for content in content_list:
+        builder.add_content(content)
+    
+    return builder.build()
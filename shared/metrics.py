@@ -0,0 +1,130 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Registry terpisah supaya /metrics master tidak ikut expose metric worker (dan sebaliknya)
+master_registry = CollectorRegistry()
+worker_registry = CollectorRegistry()
+supervisor_registry = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+JOB_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+# 📊 Master metrics
+UPLOADS = Counter(
+    "pdf_uploads_total", "Upload requests by endpoint and HTTP status",
+    ["endpoint", "status"], registry=master_registry
+)
+QUEUE_DEPTH = Gauge(
+    "pdf_queue_depth", "Items waiting in Redis queues",
+    ["queue"], registry=master_registry
+)
+JOBS_IN_MEMORY = Gauge(
+    "pdf_jobs_in_memory", "Jobs held in master memory by status",
+    ["status"], registry=master_registry
+)
+JOB_DURATION = Histogram(
+    "pdf_job_duration_seconds", "Time from upload until the job reaches a final state",
+    ["status"], buckets=JOB_DURATION_BUCKETS, registry=master_registry
+)
+RESULT_APPLY_SECONDS = Histogram(
+    "pdf_result_apply_seconds", "Time to apply one worker result on the master",
+    buckets=LATENCY_BUCKETS, registry=master_registry
+)
+PAGES_COMPLETED = Counter(
+    "pdf_pages_completed_total", "Pages reported back by workers",
+    registry=master_registry
+)
+THROUGHPUT = Gauge(
+    "pdf_throughput_pages_per_second", "Recent pages/sec used for admission control",
+    registry=master_registry
+)
+WORKERS = Gauge(
+    "pdf_workers", "Registered workers by heartbeat status (idle/busy/draining/dead)",
+    ["status"], registry=master_registry
+)
+WORKER_REQUEUES = Counter(
+    "pdf_worker_task_requeues_total", "In-flight tasks of dead workers by outcome (requeued/failed/cancelled)",
+    ["outcome"], registry=master_registry
+)
+
+# 📊 Worker metrics
+STAGE_SECONDS = Histogram(
+    "pdf_worker_stage_seconds", "Exclusive time per processing stage",
+    ["stage"], buckets=LATENCY_BUCKETS, registry=worker_registry
+)
+PAGE_SECONDS = Histogram(
+    "pdf_worker_page_seconds", "Total processing time per page",
+    buckets=LATENCY_BUCKETS, registry=worker_registry
+)
+PAGES_PROCESSED = Counter(
+    "pdf_worker_pages_total", "Pages processed by status",
+    ["status"], registry=worker_registry
+)
+PAGE_CACHE = Counter(
+    "pdf_worker_page_cache_total", "Page cache lookups by result (hit/miss)",
+    ["result"], registry=worker_registry
+)
+PAGE_LIMITS = Counter(
+    "pdf_worker_page_limits_total", "Per-page resource limits hit, by limit (image_pixels/time_budget) and action (downscaled/skipped)",
+    ["limit", "action"], registry=worker_registry
+)
+PAGE_EXECUTOR_RECYCLES = Counter(
+    "pdf_worker_page_executor_recycles_total", "Page process executors killed and replaced, by reason (timeout/crashed)",
+    ["reason"], registry=worker_registry
+)
+PAGE_RETRIES = Counter(
+    "pdf_worker_page_retries_total", "Page retry attempts after a failed page, by extraction level and status",
+    ["level", "status"], registry=worker_registry
+)
+
+# 📊 Supervisor metrics (autoscaler worker lokal)
+SUPERVISOR_WORKERS = Gauge(
+    "pdf_supervisor_workers", "Worker processes managed by the supervisor by state (running/draining)",
+    ["state"], registry=supervisor_registry
+)
+SUPERVISOR_DESIRED_WORKERS = Gauge(
+    "pdf_supervisor_desired_workers", "Worker count wanted by the last scaling evaluation",
+    registry=supervisor_registry
+)
+SUPERVISOR_QUEUE_DEPTH = Gauge(
+    "pdf_supervisor_queue_depth", "Processing queue depth seen by the supervisor",
+    registry=supervisor_registry
+)
+SUPERVISOR_BACKLOG_AGE = Gauge(
+    "pdf_supervisor_backlog_age_seconds", "Age of the oldest task in the processing queue",
+    registry=supervisor_registry
+)
+SUPERVISOR_DECISIONS = Counter(
+    "pdf_supervisor_scaling_decisions_total", "Scaling actions taken by action and reason",
+    ["action", "reason"], registry=supervisor_registry
+)
+SUPERVISOR_BLOCKED = Counter(
+    "pdf_supervisor_scaling_blocked_total", "Wanted scale-ups not taken by reason (cooldown/cpu/memory/max_workers)",
+    ["reason"], registry=supervisor_registry
+)
+
+class StageTimer:
+    """Ukur waktu per stage; stage nested tidak dihitung dua kali (waktu parent = exclusive)"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._child_time = [0.0]
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        self._child_time.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            child_time = self._child_time.pop()
+            self._child_time[-1] += elapsed
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - child_time
+
+def observe_stage_timings(timings: Dict[str, float]):
+    """Masukkan timing per stage satu halaman ke histogram worker"""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 import uuid
+import hashlib
+import json
 from datetime import datetime
 
 class ContentType(str, Enum):
@@ -14,13 +16,79 @@ class TaskStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class OCRMode(str, Enum):
+    ON = "on"        # OCR semua image
+    OFF = "off"      # Image hanya dilaporkan tanpa OCR
+    AUTO = "auto"    # OCR hanya kalau halaman minim native text
+
+class TextLayout(str, Enum):
+    SPANS = "spans"    # Satu item per span PyMuPDF (span pendek <= 2 karakter di-skip)
+    BLOCKS = "blocks"  # Span digabung menjadi line dan block dalam reading order
+
+class ExtractionLevel(str, Enum):
+    """Level ekstraksi halaman, diturunkan bertahap saat halaman gagal dan di-retry"""
+    FULL = "full"                      # Sesuai extraction profile request
+    NO_TABLES = "no_tables"            # Tanpa table (pdfplumber)
+    TEXT_ONLY = "text_only"            # Native text saja, tanpa image/OCR
+    RASTERIZED_OCR = "rasterized_ocr"  # Halaman di-render dan di-OCR sebagai satu image
+
+class ExtractionProfile(BaseModel):
+    """Profile ekstraksi per request supaya worker tidak mengerjakan hal yang tidak dibutuhkan"""
+    content_types: List[ContentType] = [ContentType.TEXT, ContentType.TABLE, ContentType.IMAGE]
+    page_from: Optional[int] = None  # 1-indexed, inclusive
+    page_to: Optional[int] = None    # 1-indexed, inclusive
+    ocr: OCRMode = OCRMode.ON
+    dpi: Optional[int] = None  # Max resolusi image untuk OCR, None = resolusi asli
+    text_layout: TextLayout = TextLayout.SPANS
+    rasterize: bool = False  # Text dari OCR halaman yang di-render (level RASTERIZED_OCR), bukan native text
+    
+    def wants(self, content_type: ContentType) -> bool:
+        """Check apakah content type diminta"""
+        return content_type in self.content_types
+    
+    def resolve_pages(self, total_pages: int) -> List[int]:
+        """Resolve page range menjadi list halaman (1-indexed)"""
+        first_page = max(self.page_from if self.page_from is not None else 1, 1)
+        last_page = min(self.page_to if self.page_to is not None else total_pages, total_pages)
+        return list(range(first_page, last_page + 1))
+    
+    def cache_key(self) -> str:
+        """Key stabil untuk setting yang mempengaruhi hasil ekstraksi per halaman"""
+        key_data = {
+            "content_types": sorted(content_type.value for content_type in self.content_types),
+            "ocr": self.ocr.value,
+            "dpi": self.dpi,
+            "text_layout": self.text_layout.value
+        }
+        if self.rasterize:
+            key_data["rasterize"] = True  # Key profile lama tidak berubah
+        return hashlib.sha1(json.dumps(key_data, sort_keys=True).encode()).hexdigest()[:12]
+    
+    def degrade(self, level: ExtractionLevel, rasterize_dpi: Optional[int] = None) -> "ExtractionProfile":
+        """Copy profile untuk level ekstraksi yang lebih ringan (retry halaman gagal)"""
+        if level == ExtractionLevel.FULL:
+            return self
+        if level == ExtractionLevel.NO_TABLES:
+            content_types = [content_type for content_type in self.content_types if content_type != ContentType.TABLE]
+            return self.model_copy(update={"content_types": content_types or [ContentType.TEXT]})
+        if level == ExtractionLevel.TEXT_ONLY:
+            return self.model_copy(update={"content_types": [ContentType.TEXT]})
+        return self.model_copy(update={"content_types": [ContentType.TEXT], "dpi": rasterize_dpi, "rasterize": True})
 
 class PageTask(BaseModel):
     task_id: str
     job_id: str
     page_numbers: List[int]
     pdf_path: str
-    created_at: datetime = datetime.now()
+    file_hash: Optional[str] = None  # SHA-256 dari PDF, untuk page cache
+    extraction_profile: ExtractionProfile = Field(default_factory=ExtractionProfile)
+    bundle: List["PageTask"] = []  # Dokumen kecil digabung jadi satu task; worker push satu result per subtask
+    profiling: bool = False  # Worker jalankan task dengan cProfile + tracemalloc
+    traceparent: Optional[str] = None  # W3C trace context job (lihat shared/tracing.py)
+    requeue_count: int = 0  # Berapa kali task di-requeue karena worker-nya mati
+    created_at: datetime = Field(default_factory=datetime.now)
     
     class Config:
         json_encoders = {
@@ -34,20 +102,77 @@ class ExtractedContent(BaseModel):
     confidence: Optional[float] = None  # Confidence score untuk OCR
     metadata: Optional[Dict[str, Any]] = None
 
+class ResultFormat(str, Enum):
+    LEGACY = "legacy"    # Text spans di-expand menjadi list ExtractedContent
+    COMPACT = "compact"  # Text spans tetap dalam encoding kolom (CompactTextSpans)
+
+class CompactTextSpans(BaseModel):
+    """Encoding kolom untuk text spans: parallel arrays + font dictionary per halaman"""
+    fonts: List[str] = []      # Font dictionary, di-refer oleh font_id
+    text: List[str] = []
+    bbox: List[float] = []     # Flat [x0, y0, x1, y1, x0, y0, ...], 4 nilai per span
+    font_id: List[int] = []
+    size: List[float] = []
+    flags: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self.text)
+    
+    def to_contents(self) -> List[ExtractedContent]:
+        """Expand ke list ExtractedContent (format legacy)"""
+        contents = []
+        for index, text in enumerate(self.text):
+            contents.append(ExtractedContent(
+                content_type=ContentType.TEXT,
+                content=text,
+                bbox=self.bbox[index * 4:index * 4 + 4],
+                confidence=1.0,
+                metadata={
+                    "font": self.fonts[self.font_id[index]],
+                    "size": self.size[index],
+                    "flags": self.flags[index]
+                }
+            ))
+        return contents
+
+class PageAttempt(BaseModel):
+    """Satu attempt ekstraksi halaman (hanya dicatat kalau halaman di-retry)"""
+    level: ExtractionLevel
+    status: TaskStatus
+    processing_time: float
+    error_message: Optional[str] = None
+
 class PageResult(BaseModel):
     page_number: int
     content: List[ExtractedContent]
+    text_spans: Optional[CompactTextSpans] = None  # Text dalam encoding kolom, lihat ResultFormat
     knowledge: str = ""  # 🆕 Aggregated text content for RAG
     processing_time: float
     status: TaskStatus
     error_message: Optional[str] = None
+    timings: Dict[str, float] = {}  # Detik per stage (open/text/table/image/ocr/knowledge), exclusive
+    stats: Dict[str, int] = {}  # Counter per halaman, misal text_spans, tables, images, ocr_pixels
+    extraction_level: Optional[ExtractionLevel] = ExtractionLevel.FULL  # Level attempt yang berhasil (< full = degraded), None = semua attempt gagal
+    attempts: List[PageAttempt] = []  # Riwayat attempt kalau halaman di-retry
+    retryable: bool = Field(default=True, exclude=True)  # Internal worker: False = error permanen, tidak di-retry
+    
+    def expanded(self) -> "PageResult":
+        """Return copy dengan text_spans di-expand ke content (format legacy)"""
+        if self.text_spans is None:
+            return self
+        return self.model_copy(update={
+            "content": self.text_spans.to_contents() + self.content,
+            "text_spans": None
+        })
 
 class TaskResult(BaseModel):
     task_id: str
     job_id: str
     page_results: List[PageResult]
     worker_id: str
-    completed_at: datetime = datetime.now()
+    profile_artifacts: List[str] = []  # Nama payload profile yang disimpan worker untuk task ini
+    traceparent: Optional[str] = None  # Context span process_task di worker
+    completed_at: datetime = Field(default_factory=datetime.now)
     
     class Config:
         json_encoders = {
@@ -60,20 +185,73 @@ class JobStatus(BaseModel):
     total_pages: int
     completed_pages: int = 0
     failed_pages: int = 0
-    created_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
     results: List[PageResult] = []
+    extraction_profile: ExtractionProfile = Field(default_factory=ExtractionProfile)
+    client_id: Optional[str] = None
+    profile_artifacts: List[str] = []  # Payload profile (cProfile/tracemalloc) dari worker, lihat /job-profile/{id}/artifacts
+    traceparent: Optional[str] = None  # Context root span job; semua span job menjadi descendant-nya
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class WorkerHeartbeat(BaseModel):
+    """Status worker yang dikirim periodik ke Redis (key expire kalau worker mati)"""
+    worker_id: str
+    hostname: str
+    pid: int
+    status: str  # idle | busy | draining
+    started_at: datetime
+    last_seen: datetime = Field(default_factory=datetime.now)
+    current_task_id: Optional[str] = None
+    current_job_id: Optional[str] = None
+    current_task_pages: int = 0
+    current_task_started_at: Optional[datetime] = None
+    tasks_processed: int = 0
+    pages_processed: int = 0
+    pages_per_second: float = 0.0  # Throughput dalam window terakhir
+    rss_bytes: int = 0
+    cpu_percent: float = 0.0  # Sejak heartbeat sebelumnya, bisa > 100 untuk multi-core
+    cache_hits: int = 0
+    cache_misses: int = 0
+
 class PDFUploadResponse(BaseModel):
     job_id: str
     total_pages: int
     status: TaskStatus
     message: str
+    queue_position: Optional[int] = None  # Jumlah job aktif di depan job ini
+    eta_seconds: Optional[float] = None  # Estimasi sampai job selesai, berdasarkan throughput terakhir
+
+class BatchFileResult(BaseModel):
+    filename: str
+    job_id: Optional[str] = None
+    status: TaskStatus
+    total_pages: int = 0
+    completed_pages: int = 0
+    failed_pages: int = 0
+    error: Optional[str] = None
+
+class BatchUploadResponse(BaseModel):
+    batch_id: str
+    total_jobs: int
+    total_pages: int
+    files: List[BatchFileResult]
+    message: str
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    status: TaskStatus
+    total_jobs: int
+    jobs_by_status: Dict[str, int]
+    total_pages: int
+    completed_pages: int
+    failed_pages: int
+    created_at: datetime
+    files: List[BatchFileResult]
 
 class PDFProcessingResult(BaseModel):
     job_id: str
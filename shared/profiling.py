@@ -0,0 +1,61 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import tracemalloc
+from typing import Dict
+
+def should_profile_task(requested: bool, sample_rate: int) -> bool:
+    """Profile kalau diminta job, atau sampling 1 dari N task (0 = sampling disable)"""
+    if requested:
+        return True
+    return sample_rate > 0 and random.randrange(sample_rate) == 0
+
+class TaskProfiler:
+    """cProfile + tracemalloc di sekitar satu task; hasil berupa artifact bytes per extension"""
+
+    def __init__(self, top: int = 40, traceback_frames: int = 1):
+        self.top = top
+        self.traceback_frames = traceback_frames
+        self.profiler = cProfile.Profile()
+        self.snapshot = None
+        self.peak_memory = 0
+        self._tracemalloc_owner = False
+
+    def __enter__(self):
+        # Jangan ganggu tracemalloc yang sudah dijalankan pihak lain (misal PYTHONTRACEMALLOC)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            self._tracemalloc_owner = True
+        tracemalloc.reset_peak()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._tracemalloc_owner:
+            tracemalloc.stop()
+        return False
+
+    def report(self) -> str:
+        """Ringkasan text: fungsi teratas (cumulative) dan alokasi memory teratas per baris"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        stream.write(f"\nPeak traced memory: {self.peak_memory / (1024 * 1024):.1f} MiB\n")
+        stream.write(f"Top {self.top} allocations by line (still allocated at end of task):\n")
+        for stat in self.snapshot.statistics("lineno")[:self.top]:
+            stream.write(f"{stat}\n")
+        return stream.getvalue()
+
+    def artifacts(self) -> Dict[str, bytes]:
+        """.pstats bisa dibuka dengan pstats.Stats / snakeviz, .txt untuk dibaca langsung"""
+        self.profiler.create_stats()
+        return {
+            "pstats": marshal.dumps(self.profiler.stats),
+            "txt": self.report().encode()
+        }
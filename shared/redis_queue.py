@@ -3,9 +3,9 @@ import json
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from .config import settings
-from .models import PageTask, TaskResult
+from .models import PageTask, TaskResult, PageResult, TaskStatus
 from loguru import logger
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -76,6 +76,14 @@ class RedisQueue:
             password=settings.redis_password,
             decode_responses=True
         )
+        # Client terpisah untuk payload binary (misal result yang sudah di-gzip)
+        self.binary_client = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            password=settings.redis_password,
+            decode_responses=False
+        )
     
     def _clean_data_for_serialization(self, data: Any) -> Any:
         """Clean data untuk memastikan bisa di-serialize ke JSON"""
@@ -124,16 +132,86 @@ class RedisQueue:
             logger.error(f"Failed to push task {task.task_id}: {e}")
             return False
     
-    def get_task(self, timeout: int = 10) -> Optional[PageTask]:
-        """Get task from processing queue (blocking)"""
+    def push_tasks(self, tasks: List[PageTask], job_statuses: Optional[Dict[str, dict]] = None) -> bool:
+        """Push banyak task (satu LPUSH) plus job status dalam satu transaction
+        
+        Cancel flag job di-WATCH: kalau job di-cancel sebelum EXEC, tidak ada yang ditulis dan return False.
+        """
+        job_statuses = job_statuses or {}
         try:
-            result = self.redis_client.brpop(settings.pdf_processing_queue, timeout=timeout)
-            if result:
-                _, task_data = result
-                # Parse JSON and handle datetime
-                parsed_data = json.loads(task_data)
-                parsed_data = self._parse_datetime_fields(parsed_data)
-                task = PageTask(**parsed_data)
+            task_data = []
+            for task in tasks:
+                cleaned_data = self._clean_data_for_serialization(task.model_dump())
+                task_data.append(json.dumps(cleaned_data, cls=DateTimeEncoder))
+            status_data = {}
+            for job_id, job_data in job_statuses.items():
+                cleaned_data = self._clean_data_for_serialization(job_data)
+                status_data[f"job_status:{job_id}"] = json.dumps(cleaned_data, cls=DateTimeEncoder)
+            
+            with self.redis_client.pipeline() as pipe:
+                cancel_keys = [f"job_cancelled:{job_id}" for job_id in job_statuses]
+                if cancel_keys:
+                    pipe.watch(*cancel_keys)
+                    if pipe.exists(*cancel_keys):
+                        logger.info(f"Not pushing {len(tasks)} tasks: job cancelled")
+                        return False
+                pipe.multi()
+                for key, json_data in status_data.items():
+                    pipe.set(key, json_data, ex=settings.job_ttl_seconds)
+                if task_data:
+                    pipe.lpush(settings.pdf_processing_queue, *task_data)
+                pipe.execute()
+            logger.info(f"{len(tasks)} tasks pushed to queue")
+            return True
+        except redis.WatchError:
+            logger.info(f"Not pushing {len(tasks)} tasks: job cancelled during enqueue")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to push {len(tasks)} tasks: {e}")
+            return False
+    
+    def get_queue_depth(self, queue_name: Optional[str] = None) -> int:
+        """Jumlah item yang menunggu di queue (default processing queue)"""
+        queue_name = queue_name or settings.pdf_processing_queue
+        try:
+            return self.redis_client.llen(queue_name)
+        except Exception as e:
+            logger.error(f"Failed to get depth of {queue_name}: {e}")
+            return 0
+    
+    def get_backlog_age(self) -> float:
+        """Umur (detik) task tertua di processing queue, yaitu task yang diambil worker berikutnya"""
+        try:
+            task_data = self.redis_client.lindex(settings.pdf_processing_queue, -1)
+            if not task_data:
+                return 0.0
+            created_at = datetime.fromisoformat(json.loads(task_data)["created_at"])
+            return max(0.0, (datetime.now() - created_at).total_seconds())
+        except Exception as e:
+            logger.error(f"Failed to get backlog age: {e}")
+            return 0.0
+    
+    def _parse_task(self, task_data: str) -> PageTask:
+        parsed_data = json.loads(task_data)
+        parsed_data = self._parse_datetime_fields(parsed_data)
+        return PageTask(**parsed_data)
+    
+    def get_task(self, timeout: int = 10, worker_id: Optional[str] = None) -> Optional[PageTask]:
+        """Get task from processing queue (blocking)
+        
+        Dengan worker_id, task dipindah atomik (BLMOVE) ke processing_queue:{worker_id} sampai
+        di-ack, supaya master bisa requeue task milik worker yang mati.
+        """
+        try:
+            if worker_id:
+                task_data = self.redis_client.blmove(
+                    settings.pdf_processing_queue, self.worker_processing_key(worker_id), timeout, "RIGHT", "LEFT"
+                )
+            else:
+                result = self.redis_client.brpop(settings.pdf_processing_queue, timeout=timeout)
+                task_data = result[1] if result else None
+            if task_data:
+                task = self._parse_task(task_data)
                 logger.info(f"Task {task.task_id} retrieved from queue")
                 return task
             return None
@@ -141,6 +219,89 @@ class RedisQueue:
             logger.error(f"Failed to get task from queue: {e}")
             return None
     
+    @staticmethod
+    def worker_processing_key(worker_id: str) -> str:
+        return f"processing_queue:{worker_id}"
+    
+    def ack_task(self, worker_id: str) -> bool:
+        """Task in-flight worker selesai (worker hanya memegang satu item queue dalam satu waktu)"""
+        try:
+            self.redis_client.delete(self.worker_processing_key(worker_id))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to ack task for worker {worker_id}: {e}")
+            return False
+    
+    def set_worker_heartbeat(self, worker_id: str, heartbeat: dict, ttl: int) -> bool:
+        """Heartbeat worker (expire kalau worker berhenti mengirim) plus registrasi di set workers"""
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.set(f"worker_heartbeat:{worker_id}", json.dumps(heartbeat, cls=DateTimeEncoder), ex=ttl)
+            pipeline.sadd("workers", worker_id)
+            pipeline.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send heartbeat for worker {worker_id}: {e}")
+            return False
+    
+    def get_workers(self) -> Dict[str, Optional[dict]]:
+        """Semua worker terdaftar -> heartbeat terakhir (None kalau heartbeat sudah expire)"""
+        try:
+            worker_ids = sorted(self.redis_client.smembers("workers"))
+            if not worker_ids:
+                return {}
+            heartbeats = self.redis_client.mget([f"worker_heartbeat:{worker_id}" for worker_id in worker_ids])
+            return {
+                worker_id: json.loads(heartbeat) if heartbeat else None
+                for worker_id, heartbeat in zip(worker_ids, heartbeats)
+            }
+        except Exception as e:
+            logger.error(f"Failed to get workers: {e}")
+            return {}
+    
+    def remove_worker(self, worker_id: str) -> bool:
+        """Hapus heartbeat dan registrasi worker"""
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.delete(f"worker_heartbeat:{worker_id}")
+            pipeline.srem("workers", worker_id)
+            pipeline.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to remove worker {worker_id}: {e}")
+            return False
+    
+    def take_worker_tasks(self, worker_id: str) -> List[PageTask]:
+        """Ambil (dan hapus) task in-flight milik worker dalam satu transaction"""
+        key = self.worker_processing_key(worker_id)
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.lrange(key, 0, -1)
+            pipeline.delete(key)
+            task_data, _ = pipeline.execute()
+        except Exception as e:
+            logger.error(f"Failed to take tasks of worker {worker_id}: {e}")
+            return []
+        
+        tasks = []
+        for item in task_data:
+            try:
+                tasks.append(self._parse_task(item))
+            except Exception as e:
+                logger.error(f"Dropping unparseable in-flight task of worker {worker_id}: {e}")
+        return tasks
+    
+    def requeue_task(self, task: PageTask) -> bool:
+        """Push task ke depan processing queue (diambil berikutnya, sebelum task baru)"""
+        try:
+            cleaned_data = self._clean_data_for_serialization(task.model_dump())
+            self.redis_client.rpush(settings.pdf_processing_queue, json.dumps(cleaned_data, cls=DateTimeEncoder))
+            logger.info(f"Task {task.task_id} requeued")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to requeue task {task.task_id}: {e}")
+            return False
+    
     def push_result(self, result: TaskResult) -> bool:
         """Push result to result queue"""
         try:
@@ -185,7 +346,7 @@ class RedisQueue:
             # Clean data dan use custom encoder untuk handle datetime dan numpy types
             cleaned_data = self._clean_data_for_serialization(status_data)
             json_data = json.dumps(cleaned_data, cls=DateTimeEncoder)
-            self.redis_client.set(key, json_data, ex=3600)  # Expire in 1 hour
+            self.redis_client.set(key, json_data, ex=settings.job_ttl_seconds)
             logger.debug(f"Job status saved for {job_id}")
             return True
         except Exception as e:
@@ -207,6 +368,247 @@ class RedisQueue:
             logger.error(f"Failed to get job status for {job_id}: {e}")
             return None
     
+    def get_job_statuses(self, job_ids: List[str]) -> Dict[str, dict]:
+        """Get banyak job status sekaligus (MGET), job yang tidak ada tidak dikembalikan"""
+        statuses = {}
+        if not job_ids:
+            return statuses
+        try:
+            keys = [f"job_status:{job_id}" for job_id in job_ids]
+            for job_id, status_data in zip(job_ids, self.redis_client.mget(keys)):
+                if status_data:
+                    statuses[job_id] = self._parse_datetime_fields(json.loads(status_data))
+        except Exception as e:
+            logger.error(f"Failed to get {len(job_ids)} job statuses: {e}")
+        return statuses
+    
+    def set_batch(self, batch_id: str, batch_data: dict, ttl: Optional[int] = None) -> bool:
+        """Store batch record (job ids per file), ttl None = tanpa expire"""
+        try:
+            key = f"batch:{batch_id}"
+            self.redis_client.set(key, json.dumps(batch_data, cls=DateTimeEncoder), ex=ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set batch {batch_id}: {e}")
+            return False
+    
+    def get_batch(self, batch_id: str) -> Optional[dict]:
+        """Get batch record"""
+        try:
+            key = f"batch:{batch_id}"
+            batch_data = self.redis_client.get(key)
+            if batch_data:
+                return self._parse_datetime_fields(json.loads(batch_data))
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get batch {batch_id}: {e}")
+            return None
+    
+    def cancel_job(self, job_id: str) -> bool:
+        """Set cancellation flag supaya worker berhenti memproses job"""
+        try:
+            key = f"job_cancelled:{job_id}"
+            self.redis_client.set(key, "1", ex=settings.job_ttl_seconds)
+            logger.info(f"Cancellation flag set for job {job_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set cancellation flag for {job_id}: {e}")
+            return False
+    
+    def is_job_cancelled(self, job_id: str) -> bool:
+        """Check apakah job sudah di-cancel"""
+        try:
+            key = f"job_cancelled:{job_id}"
+            return bool(self.redis_client.exists(key))
+        except Exception as e:
+            logger.error(f"Failed to check cancellation flag for {job_id}: {e}")
+            return False
+    
+    def remove_job_tasks(self, job_id: str) -> int:
+        """Remove pending tasks milik job dari processing queue, termasuk subtask job di dalam bundle"""
+        removed = 0
+        try:
+            pending_tasks = self.redis_client.lrange(settings.pdf_processing_queue, 0, -1)
+            for task_data in pending_tasks:
+                # Cheap substring check sebelum parse JSON
+                if job_id not in task_data:
+                    continue
+                try:
+                    parsed_data = json.loads(task_data)
+                except ValueError:
+                    continue
+                if parsed_data.get("job_id") == job_id:
+                    removed += self.redis_client.lrem(settings.pdf_processing_queue, 1, task_data)
+                elif parsed_data.get("bundle"):
+                    removed += self._remove_bundle_subtasks(task_data, parsed_data, job_id)
+            logger.info(f"Removed {removed} pending tasks for job {job_id}")
+        except Exception as e:
+            logger.error(f"Failed to remove pending tasks for {job_id}: {e}")
+        return removed
+    
+    def _remove_bundle_subtasks(self, task_data: str, parsed_data: dict, job_id: str) -> int:
+        """Tulis ulang bundle di queue tanpa subtask milik job (posisi bundle di queue tetap)
+        
+        Kalau bundle sudah diambil worker, tidak ada yang diubah; worker mengecek cancel per subtask.
+        """
+        subtasks = parsed_data["bundle"]
+        remaining = [subtask for subtask in subtasks if subtask.get("job_id") != job_id]
+        if len(remaining) == len(subtasks):
+            return 0
+        
+        pipe = self.redis_client.pipeline()  # MULTI: insert versi baru dan hapus versi lama secara atomik
+        if remaining:
+            parsed_data["bundle"] = remaining
+            pipe.linsert(settings.pdf_processing_queue, "BEFORE", task_data, json.dumps(parsed_data, cls=DateTimeEncoder))
+        pipe.lrem(settings.pdf_processing_queue, 1, task_data)
+        removed = pipe.execute()[-1]
+        return len(subtasks) - len(remaining) if removed else 0
+    
+    def get_cached_page(self, file_hash: str, profile_key: str, page_number: int) -> Optional[dict]:
+        """Get cached page result untuk file + extraction profile yang sama"""
+        try:
+            key = f"page_cache:{file_hash}:{profile_key}:{page_number}"
+            cached_data = self.redis_client.get(key)
+            if cached_data:
+                return json.loads(cached_data)
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get cached page {page_number} for {file_hash}: {e}")
+            return None
+    
+    def set_cached_page(self, file_hash: str, profile_key: str, page_number: int, page_data: dict) -> bool:
+        """Store page result di cache, key dipisah per extraction profile"""
+        if settings.page_cache_ttl <= 0:
+            return False
+        try:
+            key = f"page_cache:{file_hash}:{profile_key}:{page_number}"
+            cleaned_data = self._clean_data_for_serialization(page_data)
+            json_data = json.dumps(cleaned_data, cls=DateTimeEncoder)
+            self.redis_client.set(key, json_data, ex=settings.page_cache_ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to cache page {page_number} for {file_hash}: {e}")
+            return False
+    
+    def set_job_pages(self, job_id: str, page_results: List[PageResult]) -> Tuple[int, Optional[int]]:
+        """Store page results per halaman di Redis hash
+        
+        Return (jumlah halaman baru, total halaman failed job). Halaman failed dicatat di set terpisah,
+        jadi result yang dikirim ulang (atau halaman yang berhasil setelah requeue) tidak dihitung dua kali.
+        Total failed None kalau Redis error.
+        """
+        try:
+            key = f"job_pages:{job_id}"
+            failed_key = f"job_failed_pages:{job_id}"
+            page_data = {}
+            failed_pages = []
+            other_pages = []
+            for page_result in page_results:
+                cleaned_data = self._clean_data_for_serialization(page_result.model_dump())
+                page_data[str(page_result.page_number)] = json.dumps(cleaned_data, cls=DateTimeEncoder)
+                if page_result.status == TaskStatus.FAILED:
+                    failed_pages.append(page_result.page_number)
+                else:
+                    other_pages.append(page_result.page_number)
+            
+            pipe = self.redis_client.pipeline()
+            pipe.hset(key, mapping=page_data)
+            pipe.expire(key, settings.job_ttl_seconds)
+            if failed_pages:
+                pipe.sadd(failed_key, *failed_pages)
+            if other_pages:
+                pipe.srem(failed_key, *other_pages)
+            pipe.expire(failed_key, settings.job_ttl_seconds)
+            pipe.scard(failed_key)
+            results = pipe.execute()
+            logger.debug(f"Stored {len(page_data)} pages for {job_id}")
+            return results[0], results[-1]
+        except Exception as e:
+            logger.error(f"Failed to store pages for {job_id}: {e}")
+            return 0, None
+    
+    def get_job_page_numbers(self, job_id: str) -> List[int]:
+        """Get nomor halaman yang sudah tersimpan untuk job"""
+        try:
+            key = f"job_pages:{job_id}"
+            return sorted(int(page_number) for page_number in self.redis_client.hkeys(key))
+        except Exception as e:
+            logger.error(f"Failed to get page numbers for {job_id}: {e}")
+            return []
+    
+    def get_job_pages(self, job_id: str, page_numbers: Optional[List[int]] = None) -> List[dict]:
+        """Get page results (dict) untuk job, hanya halaman yang diminta kalau page_numbers diisi"""
+        try:
+            key = f"job_pages:{job_id}"
+            if page_numbers is None:
+                page_data = list(self.redis_client.hgetall(key).values())
+            elif page_numbers:
+                page_data = self.redis_client.hmget(key, [str(page_number) for page_number in page_numbers])
+            else:
+                page_data = []
+            pages = [json.loads(data) for data in page_data if data]
+            return sorted(pages, key=lambda page: page["page_number"])
+        except Exception as e:
+            logger.error(f"Failed to get pages for {job_id}: {e}")
+            return []
+    
+    def set_job_chunks(self, job_id: str, chunks: List[dict]) -> bool:
+        """Store precomputed knowledge chunks sebagai Redis list (satu JSON per chunk)"""
+        try:
+            key = f"job_chunks:{job_id}"
+            pipe = self.redis_client.pipeline()
+            pipe.delete(key)
+            if chunks:
+                pipe.rpush(key, *[json.dumps(chunk) for chunk in chunks])
+                pipe.expire(key, settings.job_ttl_seconds)
+            pipe.execute()
+            logger.debug(f"Stored {len(chunks)} chunks for {job_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store chunks for {job_id}: {e}")
+            return False
+    
+    def get_job_chunks(self, job_id: str, offset: int, limit: int) -> List[dict]:
+        """Get satu halaman chunks (LRANGE), tanpa load semua chunk"""
+        try:
+            key = f"job_chunks:{job_id}"
+            chunk_data = self.redis_client.lrange(key, offset, offset + limit - 1)
+            return [json.loads(chunk) for chunk in chunk_data]
+        except Exception as e:
+            logger.error(f"Failed to get chunks for {job_id}: {e}")
+            return []
+    
+    def count_job_chunks(self, job_id: str) -> Optional[int]:
+        """Jumlah chunks tersimpan, None kalau chunks belum/tidak ada di Redis"""
+        try:
+            key = f"job_chunks:{job_id}"
+            if not self.redis_client.exists(key):
+                return None
+            return self.redis_client.llen(key)
+        except Exception as e:
+            logger.error(f"Failed to count chunks for {job_id}: {e}")
+            return None
+    
+    def set_job_payload(self, job_id: str, name: str, payload: bytes) -> bool:
+        """Store payload pre-serialized (JSON bytes, optional gzip) untuk job"""
+        try:
+            key = f"job_payload:{job_id}:{name}"
+            self.binary_client.set(key, payload, ex=settings.job_ttl_seconds)
+            logger.debug(f"Stored payload {name} for {job_id} ({len(payload)} bytes)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store payload {name} for {job_id}: {e}")
+            return False
+    
+    def get_job_payload(self, job_id: str, name: str) -> Optional[bytes]:
+        """Get payload pre-serialized untuk job"""
+        try:
+            key = f"job_payload:{job_id}:{name}"
+            return self.binary_client.get(key)
+        except Exception as e:
+            logger.error(f"Failed to get payload {name} for {job_id}: {e}")
+            return None
+    
     def _parse_datetime_fields(self, data: dict) -> dict:
         """Parse datetime string fields back to datetime objects"""
         datetime_fields = ['created_at', 'completed_at']
@@ -223,6 +625,22 @@ class RedisQueue:
         
         return data
     
+    def delete_job_data(self, job_id: str) -> int:
+        """Delete semua key Redis milik job (status, pages, chunks, payloads, cancel flag)"""
+        try:
+            keys = [
+                f"job_status:{job_id}",
+                f"job_cancelled:{job_id}",
+                f"job_pages:{job_id}",
+                f"job_failed_pages:{job_id}",
+                f"job_chunks:{job_id}",
+            ]
+            keys.extend(self.redis_client.scan_iter(match=f"job_payload:{job_id}:*"))
+            return self.redis_client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Failed to delete Redis data for {job_id}: {e}")
+            return 0
+    
     def delete_job_status(self, job_id: str) -> bool:
         """Delete job status from Redis"""
         try:
@@ -0,0 +1,186 @@
+import os
+import re
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from .config import settings
+from loguru import logger
+
+# Layout per job:
+#   {results_dir}/{job_id}/manifest.json    -> ditulis terakhir, tanda job sudah lengkap tersimpan
+#   {results_dir}/{job_id}/status.json      -> job status (tanpa results)
+#   {results_dir}/{job_id}/pages.json.gz    -> list page result dict
+#   {results_dir}/{job_id}/chunks.json.gz   -> list knowledge chunks
+#   {results_dir}/{job_id}/payload-*.bin    -> payload pre-serialized (bytes apa adanya, biasanya gzip)
+
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+class LocalResultStore:
+    """Cold tier untuk result job yang sudah selesai, disimpan sebagai file di local disk
+
+    Interface-nya sengaja sederhana (put/get per job + manifest) supaya bisa
+    diganti object store tanpa mengubah master app.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _job_dir(self, job_id: str) -> Optional[str]:
+        """Path directory job, None kalau job_id tidak valid (cegah path traversal)"""
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        return os.path.join(self.root_dir, job_id)
+
+    def _write_atomic(self, path: str, data: bytes):
+        """Tulis ke temp file di directory yang sama lalu rename, reader tidak pernah melihat file setengah jadi"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _read(self, job_id: str, name: str) -> Optional[bytes]:
+        job_dir = self._job_dir(job_id)
+        if job_dir is None:
+            return None
+        path = os.path.join(job_dir, name)
+        try:
+            with open(path, "rb") as stored_file:
+                return stored_file.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _payload_file(name: str) -> str:
+        return "payload-" + name.replace(":", "_") + ".bin"
+
+    def put_job(
+        self,
+        job_id: str,
+        status_data: dict,
+        pages: List[dict],
+        chunks: List[dict],
+        payloads: dict,
+        retention_seconds: int
+    ) -> bool:
+        """Simpan semua output job; manifest ditulis terakhir sebagai commit marker"""
+        job_dir = self._job_dir(job_id)
+        if job_dir is None:
+            logger.error(f"Refusing to store results for invalid job_id: {job_id!r}")
+            return False
+
+        try:
+            os.makedirs(job_dir, exist_ok=True)
+            files = {
+                "status.json": json.dumps(status_data, default=str).encode(),
+                "pages.json.gz": gzip.compress(json.dumps(pages, default=str).encode(), compresslevel=6),
+                "chunks.json.gz": gzip.compress(json.dumps(chunks).encode(), compresslevel=6),
+            }
+            for name, payload in payloads.items():
+                files[self._payload_file(name)] = payload
+
+            for file_name, data in files.items():
+                self._write_atomic(os.path.join(job_dir, file_name), data)
+
+            stored_at = datetime.now()
+            manifest = {
+                "job_id": job_id,
+                "stored_at": stored_at.isoformat(),
+                "expires_at": (stored_at + timedelta(seconds=retention_seconds)).isoformat() if retention_seconds > 0 else None,
+                "page_numbers": sorted(page["page_number"] for page in pages),
+                "files": {file_name: len(data) for file_name, data in files.items()}
+            }
+            self._write_atomic(os.path.join(job_dir, "manifest.json"), json.dumps(manifest).encode())
+            logger.info(f"Stored results for job {job_id} ({sum(manifest['files'].values())} bytes)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store results for job {job_id}: {e}")
+            return False
+
+    def get_manifest(self, job_id: str) -> Optional[dict]:
+        """Manifest job, None kalau job tidak (lengkap) tersimpan"""
+        data = self._read(job_id, "manifest.json")
+        return json.loads(data) if data else None
+
+    def has_job(self, job_id: str) -> bool:
+        return self.get_manifest(job_id) is not None
+
+    def get_job_status(self, job_id: str) -> Optional[dict]:
+        if not self.has_job(job_id):
+            return None
+        data = self._read(job_id, "status.json")
+        return json.loads(data) if data else None
+
+    def get_page_numbers(self, job_id: str) -> List[int]:
+        manifest = self.get_manifest(job_id)
+        return manifest["page_numbers"] if manifest else []
+
+    def get_pages(self, job_id: str, page_numbers: Optional[List[int]] = None) -> List[dict]:
+        """Page results dari disk; seluruh file di-decompress, filter halaman dilakukan setelahnya"""
+        if not self.has_job(job_id):
+            return []
+        data = self._read(job_id, "pages.json.gz")
+        if not data:
+            return []
+        pages = json.loads(gzip.decompress(data))
+        if page_numbers is not None:
+            wanted = set(page_numbers)
+            pages = [page for page in pages if page["page_number"] in wanted]
+        return pages
+
+    def get_chunks(self, job_id: str) -> Optional[List[dict]]:
+        if not self.has_job(job_id):
+            return None
+        data = self._read(job_id, "chunks.json.gz")
+        return json.loads(gzip.decompress(data)) if data else None
+
+    def get_payload(self, job_id: str, name: str) -> Optional[bytes]:
+        if not self.has_job(job_id):
+            return None
+        return self._read(job_id, self._payload_file(name))
+
+    def list_jobs(self) -> Iterator[str]:
+        """Job id yang punya directory di store (termasuk yang belum lengkap)"""
+        if not os.path.isdir(self.root_dir):
+            return
+        for entry in os.scandir(self.root_dir):
+            if entry.is_dir() and JOB_ID_PATTERN.fullmatch(entry.name):
+                yield entry.name
+
+    def expired_jobs(self, now: Optional[datetime] = None) -> List[str]:
+        """Job yang retention-nya sudah lewat"""
+        now = now or datetime.now()
+        expired = []
+        for job_id in self.list_jobs():
+            manifest = self.get_manifest(job_id)
+            if manifest is None:
+                continue
+            expires_at = manifest.get("expires_at")
+            if expires_at and datetime.fromisoformat(expires_at) <= now:
+                expired.append(job_id)
+        return expired
+
+    def delete_job(self, job_id: str) -> bool:
+        job_dir = self._job_dir(job_id)
+        if job_dir is None or not os.path.isdir(job_dir):
+            return False
+        try:
+            # Hapus manifest dulu supaya job langsung dianggap tidak ada
+            manifest_path = os.path.join(job_dir, "manifest.json")
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            shutil.rmtree(job_dir)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete stored results for job {job_id}: {e}")
+            return False
+
+# Global result store instance
+result_store = LocalResultStore(settings.results_dir)
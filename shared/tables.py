@@ -0,0 +1,35 @@
+from typing import Any, Dict, List, Optional
+
+
+def normalize_headers(raw_headers: List[Optional[Any]]) -> List[str]:
+    """Normalize header row: kosong/None diganti column_N, duplicate diberi suffix _2, _3, dst."""
+    headers = []
+    used_names = set()
+    
+    for index, header in enumerate(raw_headers):
+        name = " ".join(str(header).split()) if header is not None else ""
+        if not name:
+            name = f"column_{index + 1}"
+        
+        unique_name = name
+        suffix = 2
+        while unique_name in used_names:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        
+        used_names.add(unique_name)
+        headers.append(unique_name)
+    
+    return headers
+
+
+def table_records(table_content: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate records (list of dict per row) dari table content, hanya saat diminta"""
+    headers = table_content.get("headers") or []
+    records = []
+    
+    for row in table_content.get("rows") or []:
+        padded_row = list(row) + [None] * (len(headers) - len(row))
+        records.append(dict(zip(headers, padded_row)))
+    
+    return records
@@ -0,0 +1,278 @@
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from .config import settings
+from loguru import logger
+
+# Span aktif di context (thread / asyncio task) saat ini, untuk parent span berikutnya
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    """W3C traceparent: version-trace_id-span_id-flags"""
+    return f"00-{trace_id}-{span_id}-01"
+
+def new_traceparent() -> str:
+    """Context untuk trace baru (misal root span job yang di-record saat job selesai)"""
+    return format_traceparent(new_trace_id(), new_span_id())
+
+def parse_traceparent(traceparent: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return (trace_id, span_id), None kalau kosong atau tidak valid"""
+    if not traceparent:
+        return None
+    parts = traceparent.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+class Span:
+    """Satu span OpenTelemetry-style (waktu dalam detik unix)"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        start_time: Optional[float] = None,
+        attributes: Optional[dict] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id or new_span_id()
+        self.parent_id = parent_id
+        self.start_time = start_time or time.time()
+        self.end_time: Optional[float] = None
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.error = str(error)
+
+    def to_dict(self, service_name: str) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "service": service_name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) * 1000, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+class JsonlSpanExporter:
+    """Append satu JSON object per span ke file lokal"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: List[Span], service_name: str):
+        lines = "".join(json.dumps(span.to_dict(service_name), default=str) + "\n" for span in spans)
+        with open(self.path, "a") as f:
+            f.write(lines)
+
+class OtlpHttpSpanExporter:
+    """POST span ke collector OTLP/HTTP (encoding JSON), misal http://localhost:4318/v1/traces"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    @staticmethod
+    def _attribute(key: str, value) -> dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _otlp_span(self, span: Span) -> dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(span.start_time * 1e9)),
+            "endTimeUnixNano": str(int(span.end_time * 1e9)),
+            "attributes": [self._attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    def export(self, spans: List[Span], service_name: str):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "pdf-extractor"},
+                    "spans": [self._otlp_span(span) for span in spans]
+                }]
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+def build_exporter():
+    """Exporter dari settings; None = tracing tidak di-export (context tetap dipropagasi)"""
+    if settings.tracing_exporter == "file":
+        return JsonlSpanExporter(settings.tracing_file_path or os.path.join(settings.logs_dir, "traces.jsonl"))
+    if settings.tracing_exporter == "otlp":
+        return OtlpHttpSpanExporter(settings.tracing_otlp_endpoint)
+    return None
+
+class Tracer:
+    """Buat span dan export secara batch di background thread"""
+
+    def __init__(
+        self, service_name: str, exporter=None, flush_interval: float = 2.0, max_batch: int = 512, max_pending: int = 8192
+    ):
+        self.service_name = service_name
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending  # Collector lambat/mati: span di atas ini di-drop, bukan ditumpuk di memory
+        self._pending: List[Span] = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if exporter is not None:
+            atexit.register(self.flush)
+
+    def _resolve_parent(self, parent: Optional[str]) -> Tuple[str, Optional[str]]:
+        """(trace_id, parent_span_id) dari traceparent eksplisit, span aktif, atau trace baru"""
+        context = parse_traceparent(parent)
+        if context:
+            return context
+        current = _current_span.get()
+        if current is not None:
+            return current.trace_id, current.span_id
+        return new_trace_id(), None
+
+    def start_span(self, name: str, parent: Optional[str] = None, **attributes) -> Span:
+        trace_id, parent_id = self._resolve_parent(parent)
+        return Span(name, trace_id, parent_id=parent_id, attributes=attributes)
+
+    def end_span(self, span: Span, end_time: Optional[float] = None):
+        span.end_time = end_time or time.time()
+        self._record(span)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[str] = None, **attributes):
+        """Span untuk block kode; span di dalamnya otomatis jadi child"""
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def record_span(
+        self,
+        name: str,
+        start_time: float,
+        end_time: float,
+        parent: Optional[str] = None,
+        span_context: Optional[str] = None,
+        error: Optional[str] = None,
+        **attributes
+    ) -> Span:
+        """Record span yang waktunya sudah diketahui (misal queue wait)
+
+        span_context memberi span ini trace_id/span_id yang sudah dipropagasi sebelumnya
+        (root span job); tanpa itu span menjadi child dari parent / span aktif.
+        """
+        context = parse_traceparent(span_context)
+        if context:
+            span = Span(name, context[0], span_id=context[1], start_time=start_time, attributes=attributes)
+        else:
+            trace_id, parent_id = self._resolve_parent(parent)
+            span = Span(name, trace_id, parent_id=parent_id, start_time=start_time, attributes=attributes)
+        span.error = error
+        self.end_span(span, max(end_time, start_time))
+        return span
+
+    def _record(self, span: Span):
+        if self.exporter is None:
+            return
+        # Export selalu di background thread: exporter OTLP melakukan HTTP request yang bisa blocking,
+        # dan span dicatat dari event loop master serta loop worker
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return
+            self._pending.append(span)
+            flush_now = len(self._pending) >= self.max_batch
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="span-exporter", daemon=True)
+                self._flusher.start()
+        if flush_now:
+            self._wakeup.set()
+
+    def _flush_loop(self):
+        while True:
+            # Bangun tiap flush_interval, atau lebih cepat kalau batch sudah penuh
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Export semua span pending; span di-drop kalau exporter gagal (tracing tidak boleh ganggu processing)
+
+        Dipanggil background thread, saat exit dan sebelum worker re-exec; bukan dari jalur record span.
+        """
+        with self._lock:
+            spans, self._pending = self._pending, []
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning(f"Dropped {dropped} spans: export queue full ({self.max_pending})")
+        if not spans or self.exporter is None:
+            return
+        for index in range(0, len(spans), self.max_batch):
+            batch = spans[index:index + self.max_batch]
+            try:
+                self.exporter.export(batch, self.service_name)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+def create_tracer(service_name: str) -> Tracer:
+    return Tracer(service_name, build_exporter(), settings.tracing_flush_interval)
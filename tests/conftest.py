@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Test import modul shared/ dan worker_app/ dari project root, sama seperti master dan worker
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """redis_queue di atas fakeredis (in-memory) untuk test logic Redis tanpa server Redis"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from shared.redis_queue import redis_queue
+    
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_queue, "redis_client", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_queue, "binary_client", fakeredis.FakeRedis(server=server))
+    return redis_queue.redis_client
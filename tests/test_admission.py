@@ -0,0 +1,58 @@
+import pytest
+
+from shared.admission import ThroughputTracker, retry_after_seconds
+
+
+@pytest.mark.parametrize("excess, rate, expected", [
+    (100, 10.0, 10),
+    (101, 10.0, 11),  # Dibulatkan ke atas
+    (0.5, 10.0, 1),  # Minimal 1 detik
+    (10_000_000, 1.0, 3600),  # Dibatasi max_seconds
+    (100, 0.0, 3600),  # Rate nol: tunggu maksimum
+])
+def test_retry_after_seconds(excess, rate, expected):
+    assert retry_after_seconds(excess, rate) == expected
+
+
+def test_retry_after_seconds_custom_max():
+    assert retry_after_seconds(1000, 1.0, max_seconds=120) == 120
+
+
+def test_tracker_uses_default_rate_before_any_pages():
+    tracker = ThroughputTracker(window_seconds=60, default_rate=2.5)
+    assert tracker.pages_per_second(now=1000.0) == 2.5
+    
+    tracker.record(0, now=1000.0)
+    assert tracker.started_at is None
+
+
+def test_tracker_rate_before_window_is_full():
+    tracker = ThroughputTracker(window_seconds=60)
+    tracker.record(10, now=1000.0)
+    # Umur tracker minimal 5 detik supaya tidak spike
+    assert tracker.pages_per_second(now=1001.0) == pytest.approx(2.0)
+    
+    tracker.record(20, now=1020.0)
+    assert tracker.pages_per_second(now=1020.0) == pytest.approx(1.5)
+
+
+def test_tracker_sliding_window():
+    tracker = ThroughputTracker(window_seconds=60)
+    tracker.record(60, now=1000.0)
+    tracker.record(30, now=1070.0)
+    # Event pada t=1000 sudah keluar dari window
+    assert tracker.pages_per_second(now=1080.0) == pytest.approx(0.5)
+
+
+def test_tracker_keeps_last_rate_when_idle():
+    tracker = ThroughputTracker(window_seconds=60, default_rate=1.0)
+    tracker.record(120, now=1000.0)
+    assert tracker.pages_per_second(now=1060.0) == pytest.approx(2.0)
+    # Window kosong: jangan jatuh ke default, pakai rate terakhir
+    assert tracker.pages_per_second(now=1200.0) == pytest.approx(2.0)
+
+
+def test_retry_after_from_tracker():
+    tracker = ThroughputTracker(window_seconds=60)
+    tracker.record(120, now=1000.0)
+    assert retry_after_seconds(50, tracker.pages_per_second(now=1060.0)) == 25
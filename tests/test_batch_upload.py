@@ -0,0 +1,168 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+
+import fitz
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import ExtractionProfile, PageTask
+from shared.redis_queue import redis_queue
+
+
+def pdf_bytes(pages=1):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def upload(filename, data):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_bytes(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_iter_batch_sources():
+    files = [
+        upload("a.pdf", b"%PDF-a"),
+        upload("docs.zip", zip_bytes({"b.pdf": b"%PDF-b", "notes.txt": b"x", "__MACOSX/._b.pdf": b"x", "sub/c.PDF": b"%PDF-c"})),
+        upload("docs.tar.gz", tar_bytes({"d.pdf": b"%PDF-d", "e.txt": b"x"})),
+        upload("image.png", b"png"),
+        upload("broken.zip", b"not a zip"),
+    ]
+    
+    sources = [
+        (filename, source.read() if source else None, error)
+        for filename, source, error in master_main.iter_batch_sources(files)
+    ]
+    
+    assert sources[:4] == [
+        ("a.pdf", b"%PDF-a", None),
+        ("b.pdf", b"%PDF-b", None),
+        ("sub/c.PDF", b"%PDF-c", None),
+        ("d.pdf", b"%PDF-d", None),
+    ]
+    assert sources[4] == ("image.png", None, "File must be a PDF, zip or tar archive")
+    assert sources[5][0] == "broken.zip" and sources[5][2].startswith("Invalid archive")
+    assert len(sources) == 6
+
+
+def batch_job(job_id, pages):
+    return {
+        "job_id": job_id, "traceparent": None, "file_path": f"{job_id}.pdf", "file_hash": None,
+        "page_numbers": list(range(1, pages + 1))
+    }
+
+
+def test_build_batch_tasks_bundles_small_documents(monkeypatch):
+    monkeypatch.setattr(settings, "pages_per_worker", 5)
+    jobs = [batch_job("big", 7), batch_job("s1", 2), batch_job("s2", 2), batch_job("s3", 1), batch_job("s4", 1)]
+    
+    tasks = master_main.build_batch_tasks("batch", jobs, ExtractionProfile())
+    
+    assert [(task.job_id, task.page_numbers) for task in tasks[:2]] == [("big", [1, 2, 3, 4, 5]), ("big", [6, 7])]
+    # s1..s3 (5 halaman) menjadi satu bundle, s4 sisa sendiri tidak dibungkus bundle
+    assert tasks[2].job_id == "batch" and [subtask.job_id for subtask in tasks[2].bundle] == ["s1", "s2", "s3"]
+    assert (tasks[3].job_id, tasks[3].bundle) == ("s4", [])
+    assert len(tasks) == 4
+
+
+def queued_tasks(client):
+    return [json.loads(task_data) for task_data in client.lrange(settings.pdf_processing_queue, 0, -1)]
+
+
+def test_remove_job_tasks_rewrites_bundles(fake_redis):
+    def subtask(job_id):
+        return PageTask(task_id=f"{job_id}_0", job_id=job_id, page_numbers=[1], pdf_path=f"{job_id}.pdf")
+    
+    redis_queue.push_task(PageTask(task_id="mixed", job_id="batch", page_numbers=[], pdf_path="", bundle=[
+        subtask("job-1"), subtask("job-2")
+    ]))
+    redis_queue.push_task(subtask("job-3"))
+    redis_queue.push_task(PageTask(task_id="only", job_id="batch", page_numbers=[], pdf_path="", bundle=[
+        subtask("job-1")
+    ]))
+    
+    assert redis_queue.remove_job_tasks("job-1") == 2
+    
+    # Bundle tanpa subtask dihapus, bundle lain tetap di posisinya
+    tasks = queued_tasks(fake_redis)
+    assert [task["task_id"] for task in tasks] == ["job-3_0", "mixed"]
+    assert [subtask["job_id"] for subtask in tasks[1]["bundle"]] == ["job-2"]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, fake_redis):
+    monkeypatch.setattr(settings, "uploads_path", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "temp_path", str(tmp_path / "temp"))
+    monkeypatch.setattr(settings, "pages_per_worker", 5)
+    monkeypatch.setattr(master_main, "jobs_storage", {})
+    # Tanpa "with": startup event (background task dan cek Redis) tidak dijalankan
+    return TestClient(master_main.app, raise_server_exceptions=False)
+
+
+def post_batch(client):
+    files = [
+        ("files", ("a.pdf", pdf_bytes(2), "application/pdf")),
+        ("files", ("more.zip", zip_bytes({"b.pdf": pdf_bytes(1)}), "application/zip")),
+        ("files", ("notes.txt", b"text", "text/plain")),
+    ]
+    return client.post("/upload-batch", files=files, data={"content_types": "text"})
+
+
+def test_upload_batch_enqueues_valid_files(client, fake_redis):
+    response = post_batch(client)
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_jobs"], body["total_pages"]) == (2, 3)
+    assert [(item["filename"], item["status"]) for item in body["files"]] == [
+        ("a.pdf", "processing"), ("b.pdf", "processing"), ("notes.txt", "failed")
+    ]
+    
+    job_ids = [item["job_id"] for item in body["files"][:2]]
+    assert sorted(os.listdir(settings.upload_dir)) == sorted(f"{job_id}.pdf" for job_id in job_ids)
+    assert os.listdir(settings.temp_dir) == []
+    tasks = queued_tasks(fake_redis)
+    assert len(tasks) == 1 and [subtask["job_id"] for subtask in tasks[0]["bundle"]] == job_ids
+    assert all(redis_queue.get_job_status(job_id)["status"] == "processing" for job_id in job_ids)
+    assert client.get(f"/batch-status/{body['batch_id']}").json()["total_jobs"] == 2
+
+
+def test_upload_batch_cleans_up_after_enqueue_failure(monkeypatch, client, fake_redis):
+    def fail_set_batch(*args, **kwargs):
+        raise RuntimeError("redis went away")
+    
+    monkeypatch.setattr(redis_queue, "set_batch", fail_set_batch)
+    
+    response = post_batch(client)
+    
+    assert response.status_code == 500
+    assert queued_tasks(fake_redis) == []
+    assert fake_redis.keys("job_status:*") == []
+    assert os.listdir(settings.upload_dir) == [] and os.listdir(settings.temp_dir) == []
+    assert master_main.jobs_storage == {}
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import JobStatus, PageResult, PageTask, TaskResult, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+@pytest.fixture
+def jobs_storage(monkeypatch):
+    storage = {}
+    monkeypatch.setattr(master_main, "jobs_storage", storage)
+    return storage
+
+
+def save_job(job_id, status=TaskStatus.PROCESSING, total_pages=3):
+    job = JobStatus(job_id=job_id, status=status, total_pages=total_pages)
+    redis_queue.set_job_status(job_id, job.model_dump())
+    return job
+
+
+def queued_job_ids(client):
+    return [json.loads(task_data)["job_id"] for task_data in client.lrange(settings.pdf_processing_queue, 0, -1)]
+
+
+def test_cancel_removes_pending_tasks_and_sets_flag(fake_redis, jobs_storage):
+    save_job("job-1")
+    for index, job_id in enumerate(["job-1", "job-2", "job-1"]):
+        redis_queue.push_task(PageTask(task_id=f"task_{index}", job_id=job_id, page_numbers=[1], pdf_path="a.pdf"))
+    
+    response = asyncio.run(master_main.cancel_job("job-1"))
+    
+    assert response["status"] == TaskStatus.CANCELLED
+    assert response["removed_tasks"] == 2
+    assert queued_job_ids(fake_redis) == ["job-2"]
+    assert redis_queue.is_job_cancelled("job-1")
+    assert not redis_queue.is_job_cancelled("job-2")
+    assert redis_queue.get_job_status("job-1")["status"] == TaskStatus.CANCELLED
+    assert jobs_storage["job-1"].completed_at is not None
+
+
+def test_cancel_finished_job_conflicts(fake_redis, jobs_storage):
+    save_job("job-1", status=TaskStatus.COMPLETED)
+    
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(master_main.cancel_job("job-1"))
+    assert error.value.status_code == 409
+    assert not redis_queue.is_job_cancelled("job-1")
+
+
+def test_result_of_cancelled_job_is_discarded(fake_redis, jobs_storage):
+    save_job("job-1", status=TaskStatus.CANCELLED)
+    result = TaskResult(
+        task_id="task_1", job_id="job-1", worker_id="worker_1",
+        page_results=[PageResult(page_number=1, content=[], processing_time=0.1, status=TaskStatus.COMPLETED)]
+    )
+    
+    asyncio.run(master_main.process_worker_result(result))
+    
+    assert redis_queue.get_job_page_numbers("job-1") == []
+    assert redis_queue.get_job_status("job-1")["completed_pages"] == 0
+
+
+def test_worker_stops_between_pages(monkeypatch, fake_redis):
+    pytest.importorskip("easyocr")  # Diimport worker_app.main
+    from worker_app.main import PDFExtractor
+    
+    extractor = PDFExtractor()
+    processed = []
+    
+    def run_page_with_retry(task, page_number, isolate=True):
+        processed.append(page_number)
+        redis_queue.cancel_job(task.job_id)  # Job di-cancel selama halaman pertama diproses
+        return PageResult(page_number=page_number, content=[], processing_time=0.1, status=TaskStatus.COMPLETED)
+    
+    monkeypatch.setattr(extractor, "run_page_with_retry", run_page_with_retry)
+    task = PageTask(task_id="task_1", job_id="job-1", page_numbers=[1, 2, 3], pdf_path="a.pdf")
+    
+    result = extractor.process_task(task, isolate=False)
+    
+    assert processed == [1]
+    assert [(page.page_number, page.status) for page in result.page_results] == [
+        (1, TaskStatus.COMPLETED), (2, TaskStatus.CANCELLED), (3, TaskStatus.CANCELLED)
+    ]
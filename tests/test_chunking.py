@@ -0,0 +1,96 @@
+import pytest
+
+from shared.chunking import chunk_page_knowledge, chunk_document_knowledge, count_tokens
+
+
+def measure(text: str, unit: str) -> int:
+    return count_tokens(text) if unit == "tokens" else len(text)
+
+
+def assert_valid_chunks(knowledge, chunks, chunk_size, unit):
+    """Offset cocok dengan text, tiap chunk muat, dan tiap chunk menambah text baru"""
+    assert chunks
+    for chunk in chunks:
+        assert knowledge[chunk["start_offset"]:chunk["end_offset"]] == chunk["text"]
+        assert measure(chunk["text"], unit) <= chunk_size
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current["start_offset"] > previous["start_offset"]
+        assert current["end_offset"] > previous["end_offset"]
+    # Semua kata masuk ke minimal satu chunk
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk["start_offset"], chunk["end_offset"]))
+    assert all(index in covered for index, char in enumerate(knowledge) if not char.isspace())
+
+
+@pytest.mark.parametrize("unit", ["chars", "tokens"])
+def test_chunks_respect_size_and_cover_text(unit):
+    knowledge = " ".join(f"word{index}" for index in range(200))
+    chunks = chunk_page_knowledge(1, knowledge, 50, 10, unit)
+    assert_valid_chunks(knowledge, chunks, 50, unit)
+    assert all(chunk["page_number"] == 1 for chunk in chunks)
+
+
+def test_overlap_repeats_tail_of_previous_chunk():
+    knowledge = " ".join(f"w{index:02d}" for index in range(30))
+    chunks = chunk_page_knowledge(1, knowledge, 20, 8, "chars")
+    assert_valid_chunks(knowledge, chunks, 20, "chars")
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current["start_offset"] < previous["end_offset"]
+        assert previous["end_offset"] - current["start_offset"] <= 8
+
+
+def test_overlap_skipped_when_next_unit_does_not_fit():
+    # Overlap "dddd" + kata 17 karakter = 22 > 20, chunk berikutnya tidak boleh hanya berisi "dddd"
+    knowledge = "aaaa bbbb cccc dddd " + "e" * 17 + " ffff"
+    chunks = chunk_page_knowledge(1, knowledge, 20, 10, "chars")
+    assert_valid_chunks(knowledge, chunks, 20, "chars")
+    assert [chunk["text"] for chunk in chunks] == ["aaaa bbbb cccc dddd", "e" * 17, "ffff"]
+
+
+def test_overlap_skipped_when_next_unit_does_not_fit_tokens():
+    knowledge = "one two three four five six seven eight nine ten " + " ".join(["x"] * 3) + "\n\n" + "a b c d e f g h i"
+    chunks = chunk_page_knowledge(1, knowledge, 10, 4, "tokens")
+    assert_valid_chunks(knowledge, chunks, 10, "tokens")
+
+
+@pytest.mark.parametrize("unit, word", [("chars", "x" * 95), ("tokens", "-" * 95)])
+def test_oversized_word_is_split(unit, word):
+    # Kata lebih panjang dari chunk_size dipotong per karakter (tanda baca = satu token per karakter)
+    knowledge = f"start {word} end"
+    chunks = chunk_page_knowledge(1, knowledge, 20, 5, unit)
+    assert_valid_chunks(knowledge, chunks, 20, unit)
+    assert len(chunks) >= 5
+
+
+def test_table_rows_are_not_cut():
+    rows = [f"row{index} | value {index} | other {index}" for index in range(20)]
+    knowledge = "Intro paragraph text.\n\nTable: table_1\nname | value | other\n-----\n" + "\n".join(rows)
+    chunks = chunk_page_knowledge(1, knowledge, 80, 20, "chars")
+    assert_valid_chunks(knowledge, chunks, 80, "chars")
+    lines = set(knowledge.split("\n"))
+    for chunk in chunks:
+        for line in chunk["text"].split("\n"):
+            assert line in lines or line == ""
+
+
+def test_short_and_empty_knowledge():
+    assert chunk_page_knowledge(1, "   \n ", 100, 10) == []
+    chunks = chunk_page_knowledge(3, "short text", 100, 10)
+    assert [(chunk["text"], chunk["start_offset"], chunk["end_offset"]) for chunk in chunks] == [("short text", 0, 10)]
+
+
+def test_invalid_unit():
+    with pytest.raises(ValueError):
+        chunk_page_knowledge(1, "text", 100, 10, "lines")
+
+
+def test_document_chunks_do_not_cross_pages():
+    pages = [(1, "alpha beta gamma " * 10), (2, ""), (3, "delta epsilon " * 10)]
+    chunks = chunk_document_knowledge(pages, chunk_size=40, chunk_overlap=10, unit="chars")
+    assert [chunk["chunk_index"] for chunk in chunks] == list(range(len(chunks)))
+    assert {chunk["page_number"] for chunk in chunks} == {1, 3}
+    for page_number, knowledge in pages:
+        page_chunks = [chunk for chunk in chunks if chunk["page_number"] == page_number]
+        for chunk in page_chunks:
+            assert knowledge[chunk["start_offset"]:chunk["end_offset"]] == chunk["text"]
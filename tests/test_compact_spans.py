@@ -0,0 +1,106 @@
+import asyncio
+
+import fitz
+import pytest
+
+import master_app.main as master_main
+from shared.models import (
+    CompactTextSpans, ContentType, ExtractedContent, JobStatus, PageResult, ResultFormat, TaskStatus
+)
+
+SPANS = [
+    {"text": "Heading text", "bbox": (72.0, 60.0, 200.0, 80.0), "font": "Helvetica-Bold", "size": 18.0, "flags": 20},
+    {"text": "Body paragraph", "bbox": (72.0, 90.0, 300.0, 102.0), "font": "Times-Roman", "size": 11.0, "flags": 4},
+    {"text": "Second heading", "bbox": (72.0, 120.0, 220.0, 140.0), "font": "Helvetica-Bold", "size": 18.0, "flags": 20},
+]
+
+
+def legacy_contents(spans):
+    """Output per span sebelum encoding kolom (satu ExtractedContent per span)"""
+    return [
+        ExtractedContent(
+            content_type=ContentType.TEXT,
+            content=span["text"],
+            bbox=list(span["bbox"]),
+            confidence=1.0,
+            metadata={"font": span["font"], "size": span["size"], "flags": span["flags"]}
+        )
+        for span in spans
+    ]
+
+
+def compact_spans():
+    return CompactTextSpans(
+        fonts=["Helvetica-Bold", "Times-Roman"],
+        text=[span["text"] for span in SPANS],
+        bbox=[value for span in SPANS for value in span["bbox"]],
+        font_id=[0, 1, 0],
+        size=[span["size"] for span in SPANS],
+        flags=[span["flags"] for span in SPANS]
+    )
+
+
+def test_to_contents_matches_legacy_output():
+    spans = compact_spans()
+    assert len(spans) == 3
+    assert spans.to_contents() == legacy_contents(SPANS)
+
+
+def test_expanded_round_trip_through_json():
+    table = ExtractedContent(content_type=ContentType.TABLE, content={"headers": ["a"], "rows": [["1"]]})
+    page = PageResult(
+        page_number=1, content=[table], text_spans=compact_spans(), knowledge="", processing_time=0.1,
+        status=TaskStatus.COMPLETED
+    )
+    
+    restored = PageResult.model_validate_json(page.model_dump_json())
+    expanded = restored.expanded()
+    
+    assert expanded.text_spans is None
+    assert expanded.content == legacy_contents(SPANS) + [table]
+    assert PageResult(page_number=1, content=[], processing_time=0, status=TaskStatus.FAILED).expanded().content == []
+
+
+def test_worker_spans_match_legacy_extraction(tmp_path):
+    pytest.importorskip("easyocr")  # Diimport worker_app.main
+    from worker_app.main import PDFExtractor
+    
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Heading text", fontname="hebo", fontsize=18)
+    page.insert_text((72, 100), "Body paragraph", fontname="tiro", fontsize=11)
+    page.insert_text((72, 130), "ok", fontname="tiro", fontsize=11)  # Span <= 2 karakter di-skip
+    page.insert_text((72, 160), "Second heading", fontname="hebo", fontsize=18)
+    
+    page_spans = [
+        span
+        for block in page.get_text("dict")["blocks"]
+        for line in block.get("lines", [])
+        for span in line["spans"]
+        if len(span["text"].strip()) > 2
+    ]
+    spans = PDFExtractor().extract_text_spans(page)
+    
+    assert len(spans.fonts) == 2  # Font dictionary, bukan nama font per span
+    assert spans.to_contents() == legacy_contents(page_spans)
+    doc.close()
+
+
+def test_job_status_expands_text_spans_by_default(monkeypatch):
+    job = JobStatus(job_id="job-1", status=TaskStatus.COMPLETED, total_pages=1, completed_pages=1)
+    page = PageResult(
+        page_number=1, content=[], text_spans=compact_spans(), processing_time=0.1, status=TaskStatus.COMPLETED
+    )
+    monkeypatch.setattr(master_main, "find_job_status", lambda job_id: job)
+    monkeypatch.setattr(master_main, "load_job_results", lambda job_id: [page])
+    
+    legacy = asyncio.run(master_main.get_job_status("job-1"))
+    assert legacy.results[0].text_spans is None
+    assert legacy.results[0].content == legacy_contents(SPANS)
+    
+    compact = asyncio.run(master_main.get_job_status("job-1", format=ResultFormat.COMPACT))
+    assert compact.results[0].text_spans == compact_spans()
+    assert compact.results[0].content == []
+    
+    progress = asyncio.run(master_main.get_job_status("job-1", include_results=False))
+    assert progress.results == []
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import ExtractionProfile, JobStatus, PageTask, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+def tasks_for(job_id, count=3):
+    return [PageTask(task_id=f"{job_id}_{i}", job_id=job_id, page_numbers=[i + 1], pdf_path="a.pdf") for i in range(count)]
+
+
+def processing_status(job_id):
+    return JobStatus(job_id=job_id, status=TaskStatus.PROCESSING, total_pages=3).model_dump()
+
+
+def queued_task_ids(client):
+    return [json.loads(task_data)["task_id"] for task_data in client.lrange(settings.pdf_processing_queue, 0, -1)]
+
+
+def test_push_tasks_writes_status_and_tasks_together(fake_redis):
+    assert redis_queue.push_tasks(tasks_for("job-1"), {"job-1": processing_status("job-1")})
+    
+    # Satu LPUSH dengan urutan task sama seperti push_task satu per satu (worker mengambil dari kanan)
+    assert queued_task_ids(fake_redis) == ["job-1_2", "job-1_1", "job-1_0"]
+    assert redis_queue.get_job_status("job-1")["status"] == TaskStatus.PROCESSING
+    assert 0 < fake_redis.ttl("job_status:job-1") <= settings.job_ttl_seconds
+
+
+def test_push_tasks_skips_cancelled_job(fake_redis):
+    redis_queue.cancel_job("job-1")
+    
+    assert not redis_queue.push_tasks(tasks_for("job-1"), {"job-1": processing_status("job-1")})
+    assert queued_task_ids(fake_redis) == []
+    assert redis_queue.get_job_status("job-1") is None
+
+
+def test_push_tasks_aborts_when_cancelled_during_enqueue(monkeypatch, fake_redis):
+    pipeline = fake_redis.pipeline
+    
+    def pipeline_cancelled_before_exec(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        multi = pipe.multi
+        
+        def cancel_then_multi():
+            redis_queue.cancel_job("job-1")  # Koneksi lain, setelah WATCH dan sebelum EXEC
+            multi()
+        
+        pipe.multi = cancel_then_multi
+        return pipe
+    
+    monkeypatch.setattr(fake_redis, "pipeline", pipeline_cancelled_before_exec)
+    
+    assert not redis_queue.push_tasks(tasks_for("job-1"), {"job-1": processing_status("job-1")})
+    assert queued_task_ids(fake_redis) == []
+    assert redis_queue.get_job_status("job-1") is None
+
+
+def test_push_tasks_without_job_statuses(fake_redis):
+    assert redis_queue.push_tasks(tasks_for("job-1", 2))
+    assert queued_task_ids(fake_redis) == ["job-1_1", "job-1_0"]
+    assert redis_queue.push_tasks([])
+
+
+@pytest.fixture
+def pending_job(monkeypatch, fake_redis):
+    job = JobStatus(job_id="job-1", status=TaskStatus.PENDING, total_pages=7)
+    monkeypatch.setattr(master_main, "jobs_storage", {"job-1": job})
+    monkeypatch.setattr(settings, "pages_per_worker", 5)
+    redis_queue.set_job_status("job-1", job.model_dump())
+    return job
+
+
+def test_process_pdf_async_enqueues_job(pending_job, fake_redis):
+    asyncio.run(master_main.process_pdf_async("job-1", "a.pdf", list(range(1, 8)), ExtractionProfile()))
+    
+    assert pending_job.status == TaskStatus.PROCESSING
+    assert redis_queue.get_job_status("job-1")["status"] == TaskStatus.PROCESSING
+    assert queued_task_ids(fake_redis) == ["job-1_1", "job-1_0"]
+
+
+def test_process_pdf_async_leaves_cancelled_job_alone(pending_job, fake_redis):
+    redis_queue.cancel_job("job-1")
+    
+    asyncio.run(master_main.process_pdf_async("job-1", "a.pdf", list(range(1, 8)), ExtractionProfile()))
+    
+    assert pending_job.status == TaskStatus.PENDING  # Tidak ditandai failed
+    assert queued_task_ids(fake_redis) == []
@@ -0,0 +1,117 @@
+import fitz
+import pytest
+from fastapi import HTTPException
+
+from master_app.main import build_extraction_profile
+from shared.config import settings
+from shared.models import CompactTextSpans, ContentType, ExtractionProfile, OCRMode, TaskStatus, TextLayout
+
+
+@pytest.mark.parametrize("page_from, page_to, expected", [
+    (None, None, [1, 2, 3, 4, 5]),
+    (2, None, [2, 3, 4, 5]),
+    (None, 3, [1, 2, 3]),
+    (2, 4, [2, 3, 4]),
+    (4, 99, [4, 5]),  # Dipotong di akhir dokumen
+    (9, 12, []),  # Di luar dokumen
+    (None, 0, []),  # page_to=0 bukan "semua halaman"
+])
+def test_resolve_pages(page_from, page_to, expected):
+    profile = ExtractionProfile(page_from=page_from, page_to=page_to)
+    assert profile.resolve_pages(5) == expected
+
+
+def test_cache_key_separates_profiles():
+    default = ExtractionProfile()
+    assert default.cache_key() == ExtractionProfile().cache_key()
+    # Urutan content_types dan page range tidak mempengaruhi hasil per halaman
+    assert ExtractionProfile(content_types=[ContentType.IMAGE, ContentType.TEXT]).cache_key() == \
+        ExtractionProfile(content_types=[ContentType.TEXT, ContentType.IMAGE]).cache_key()
+    assert ExtractionProfile(page_from=2, page_to=3).cache_key() == default.cache_key()
+    
+    variants = [
+        default,
+        ExtractionProfile(content_types=[ContentType.TEXT]),
+        ExtractionProfile(ocr=OCRMode.OFF),
+        ExtractionProfile(ocr=OCRMode.AUTO),
+        ExtractionProfile(dpi=150),
+        ExtractionProfile(text_layout=TextLayout.BLOCKS),
+        ExtractionProfile(rasterize=True),
+    ]
+    assert len({profile.cache_key() for profile in variants}) == len(variants)
+
+
+def test_build_extraction_profile():
+    profile = build_extraction_profile("text, table,text", 2, 4, OCRMode.AUTO, 150, TextLayout.BLOCKS)
+    assert profile.content_types == [ContentType.TEXT, ContentType.TABLE]
+    assert (profile.page_from, profile.page_to, profile.ocr, profile.dpi) == (2, 4, OCRMode.AUTO, 150)
+    assert profile.text_layout == TextLayout.BLOCKS
+
+
+@pytest.mark.parametrize("content_types, page_from, page_to, dpi, detail", [
+    ("text,video", None, None, None, "Invalid content_types"),
+    (" , ", None, None, None, "content_types must not be empty"),
+    ("text", 0, None, None, "page_from must be >= 1"),
+    ("text", None, 0, None, "page_to must be >= 1"),
+    ("text", None, -3, None, "page_to must be >= 1"),
+    ("text", 5, 2, None, "page_to must be >= page_from"),
+    ("text", None, None, 10, "dpi must be >= 36"),
+])
+def test_build_extraction_profile_rejects_invalid_input(content_types, page_from, page_to, dpi, detail):
+    with pytest.raises(HTTPException) as error:
+        build_extraction_profile(content_types, page_from, page_to, OCRMode.ON, dpi)
+    assert error.value.status_code == 400
+    assert detail in error.value.detail
+
+
+@pytest.fixture
+def extractor():
+    pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR tidak dipakai
+    from worker_app.main import PDFExtractor
+    return PDFExtractor()
+
+
+@pytest.fixture
+def text_page():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Native text " * 10)
+    doc.new_page()
+    yield doc
+    doc.close()
+
+
+@pytest.mark.parametrize("ocr, spans_text, expected", [
+    (OCRMode.ON, ["x" * 500], True),
+    (OCRMode.OFF, [], False),
+    (OCRMode.AUTO, [], True),  # Halaman scan tanpa native text
+    (OCRMode.AUTO, ["short"], True),
+    (OCRMode.AUTO, ["x" * 30, "y" * 30], False),
+])
+def test_should_run_ocr(monkeypatch, extractor, text_page, ocr, spans_text, expected):
+    monkeypatch.setattr(settings, "ocr_auto_min_text_chars", 50)
+    spans = CompactTextSpans(text=spans_text)
+    assert extractor._should_run_ocr(text_page[1], ExtractionProfile(ocr=ocr), spans) is expected
+
+
+def test_should_run_ocr_auto_reads_page_text_without_spans(monkeypatch, extractor, text_page):
+    monkeypatch.setattr(settings, "ocr_auto_min_text_chars", 50)
+    profile = ExtractionProfile(ocr=OCRMode.AUTO)
+    assert extractor._should_run_ocr(text_page[0], profile, None) is False
+    assert extractor._should_run_ocr(text_page[1], profile, None) is True
+
+
+def test_text_only_profile_skips_tables_and_images(monkeypatch, extractor, text_page, tmp_path):
+    path = str(tmp_path / "text.pdf")
+    text_page.save(path)
+    
+    def not_called(*args, **kwargs):
+        raise AssertionError("stage should not run for a text-only profile")
+    
+    monkeypatch.setattr(extractor, "extract_table_content", not_called)
+    monkeypatch.setattr(extractor, "extract_image_content", not_called)
+    
+    result = extractor.process_page(path, 1, ExtractionProfile(content_types=[ContentType.TEXT]), observe=False)
+    
+    assert result.status == TaskStatus.COMPLETED
+    assert set(result.timings) == {"open", "text", "knowledge"}
+    assert "Native text" in result.knowledge
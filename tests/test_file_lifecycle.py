@@ -0,0 +1,112 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import JobStatus, TaskStatus
+from shared.result_store import LocalResultStore
+
+
+@pytest.fixture
+def dirs(monkeypatch, tmp_path, fake_redis):
+    monkeypatch.setattr(settings, "uploads_path", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "temp_path", str(tmp_path / "temp"))
+    monkeypatch.setattr(settings, "results_path", str(tmp_path / "results"))
+    monkeypatch.setattr(settings, "job_ttl_seconds", 3600)
+    monkeypatch.setattr(settings, "upload_retention_seconds", 0)
+    monkeypatch.setattr(settings, "stale_temp_seconds", 3600)
+    monkeypatch.setattr(master_main, "jobs_storage", {})
+    monkeypatch.setattr(master_main, "result_store", LocalResultStore(settings.results_dir))
+    return tmp_path
+
+
+def upload(job_id, age_seconds=0):
+    path = os.path.join(settings.upload_dir, f"{job_id}.pdf")
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(b"%PDF-1.4")
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def finished_job(job_id, status, seconds_ago=10):
+    job = JobStatus(job_id=job_id, status=status, total_pages=1, completed_at=datetime.now() - timedelta(seconds=seconds_ago))
+    master_main.jobs_storage[job_id] = job
+    return job
+
+
+def test_orphan_upload_removed_after_grace_period(dirs):
+    recent = upload("orphan-new")
+    old = upload("orphan-old", age_seconds=7200)
+    
+    assert master_main.sweep_job_files() == 1
+    assert os.path.exists(recent) and not os.path.exists(old)
+
+
+def test_completed_upload_kept_until_results_stored(dirs):
+    path = upload("job-1")
+    finished_job("job-1", TaskStatus.COMPLETED)
+    
+    # Result tidak ada di result store: source PDF masih dibutuhkan
+    assert master_main.sweep_job_files() == 0
+    assert os.path.exists(path)
+    
+    assert master_main.result_store.put_job("job-1", {"job_id": "job-1"}, [], [], {}, 0)
+    assert master_main.sweep_job_files() == 1
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("status", [TaskStatus.FAILED, TaskStatus.CANCELLED])
+def test_failed_upload_removed(dirs, status):
+    path = upload("job-1")
+    finished_job("job-1", status)
+    
+    assert master_main.sweep_job_files() == 1
+    assert not os.path.exists(path)
+
+
+def test_upload_kept_while_processing_or_retained(dirs, monkeypatch):
+    processing = upload("job-1")
+    master_main.jobs_storage["job-1"] = JobStatus(job_id="job-1", status=TaskStatus.PROCESSING, total_pages=1)
+    retained = upload("job-2")
+    finished_job("job-2", TaskStatus.FAILED, seconds_ago=10)
+    monkeypatch.setattr(settings, "upload_retention_seconds", 60)
+    
+    assert master_main.sweep_job_files() == 0
+    assert os.path.exists(processing) and os.path.exists(retained)
+
+
+def test_stale_temp_files_removed(dirs):
+    fresh = os.path.join(settings.temp_dir, "fresh.tmp")
+    stale = os.path.join(settings.temp_dir, "stale.tmp")
+    for path in (fresh, stale):
+        with open(path, "wb") as temp_file:
+            temp_file.write(b"data")
+    mtime = time.time() - 7200
+    os.utime(stale, (mtime, mtime))
+    
+    assert master_main.sweep_job_files() == 1
+    assert os.path.exists(fresh) and not os.path.exists(stale)
+
+
+def test_disk_pressure_rejects_upload(dirs, monkeypatch):
+    monkeypatch.setattr(settings, "min_free_disk_percent", 0.0)
+    monkeypatch.setattr(settings, "min_free_disk_bytes", 0)
+    master_main.check_disk_pressure()
+    
+    free_bytes = master_main.disk_status(settings.upload_dir)["free_bytes"]
+    # Upload yang akan menghabiskan free space juga ditolak
+    with pytest.raises(HTTPException) as exc_info:
+        master_main.check_disk_pressure(incoming_bytes=free_bytes + 1)
+    assert exc_info.value.status_code == 503
+    
+    monkeypatch.setattr(settings, "min_free_disk_bytes", free_bytes * 2)
+    monkeypatch.setattr(settings, "disk_pressure_retry_after", 30)
+    with pytest.raises(HTTPException) as exc_info:
+        master_main.check_disk_pressure()
+    assert exc_info.value.headers == {"Retry-After": "30"}
+    assert master_main.disk_status(settings.upload_dir)["under_pressure"]
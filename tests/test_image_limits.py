@@ -0,0 +1,123 @@
+import io
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR diganti reader palsu
+
+from shared.config import settings
+from worker_app.main import PDFExtractor, PDFWorker
+
+
+class FakeReader:
+    def __init__(self):
+        self.shapes = []
+    
+    def readtext(self, image):
+        self.shapes.append(image.shape)
+        return [([[0, 0], [10, 0], [10, 10], [0, 10]], "hello world", 0.9)]
+
+
+@pytest.fixture
+def extractor():
+    extractor = PDFExtractor()
+    extractor._easyocr_reader = FakeReader()
+    return extractor
+
+
+@pytest.fixture
+def image_pdf(tmp_path):
+    """Satu halaman dengan image 2000x1000 pixel yang ditampilkan 4x2 inch (500 DPI)"""
+    gradient = np.tile(np.linspace(0, 255, 2000, dtype=np.uint8), (1000, 1))
+    png = io.BytesIO()
+    Image.fromarray(np.dstack([gradient] * 3)).save(png, format="PNG")
+    
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(fitz.Rect(72, 72, 72 + 288, 72 + 144), stream=png.getvalue())
+    path = tmp_path / "image.pdf"
+    doc.save(str(path))
+    doc.close()
+    
+    doc = fitz.open(str(path))
+    yield doc[0]
+    doc.close()
+
+
+@pytest.mark.parametrize("max_pixels, dpi, rect, expected", [
+    (0, None, fitz.Rect(0, 0, 144, 144), 1.0),
+    (0, 150, fitz.Rect(0, 0, 144, 144), 0.5),  # 600px di 2 inch = 300 DPI
+    (0, 600, fitz.Rect(0, 0, 144, 144), 1.0),  # Tidak pernah upscale
+    (0, 150, None, 1.0),  # DPI tidak diketahui tanpa posisi di halaman
+    (0, 150, fitz.Rect(0, 0, 0, 144), 1.0),
+    (45_000, None, None, 0.5),  # 600x300 = 180000 pixel, sisi dikali sqrt(1/4)
+    (45_000, None, fitz.Rect(0, 0, 144, 144), 0.5),
+    (45_000, 75, fitz.Rect(0, 0, 144, 144), 0.25),  # Batas DPI lebih ketat
+    (45_000, 300, fitz.Rect(0, 0, 144, 144), 0.5),  # Batas pixel lebih ketat
+    (200_000, None, None, 1.0),
+])
+def test_ocr_scale(monkeypatch, extractor, max_pixels, dpi, rect, expected):
+    monkeypatch.setattr(settings, "max_image_pixels", max_pixels)
+    assert extractor._ocr_scale(600, 300, rect, dpi) == pytest.approx(expected)
+
+
+def test_load_ocr_image_full_resolution(monkeypatch, extractor, image_pdf):
+    monkeypatch.setattr(settings, "max_image_pixels", 0)
+    img = image_pdf.get_images(full=True)[0]
+    
+    image = extractor._load_ocr_image(image_pdf, img[0], 2000, 1000, image_pdf.get_image_bbox(img), None)
+    assert image.shape == (1000, 2000, 3)
+
+
+def test_load_ocr_image_renders_downscaled(monkeypatch, extractor, image_pdf):
+    monkeypatch.setattr(settings, "max_image_pixels", 500_000)
+    img = image_pdf.get_images(full=True)[0]
+    rect = image_pdf.get_image_bbox(img)
+    
+    image = extractor._load_ocr_image(image_pdf, img[0], 2000, 1000, rect, None)
+    # Di-render langsung di resolusi target: sekitar 1000x500, tidak pernah di atas MAX_IMAGE_PIXELS
+    assert image.shape[0] * image.shape[1] <= 500_000
+    assert abs(image.shape[1] - 1000) <= 2 and abs(image.shape[0] - 500) <= 2
+    
+    # DPI profile: 2000px di 4 inch = 500 DPI, target 100 DPI = 400px
+    image = extractor._load_ocr_image(image_pdf, img[0], 2000, 1000, rect, 100)
+    assert abs(image.shape[1] - 400) <= 2
+    
+    # Tanpa posisi di halaman tidak ada area untuk di-render
+    assert extractor._load_ocr_image(image_pdf, img[0], 2000, 1000, None, None) is None
+
+
+def test_image_stats_for_limits(monkeypatch, extractor, image_pdf):
+    monkeypatch.setattr(settings, "max_image_pixels", 500_000)
+    stats = {}
+    
+    [content] = extractor.extract_image_content(image_pdf, run_ocr=True, stats=stats)
+    
+    assert content.metadata["ocr_scale"] == pytest.approx(0.5, abs=0.01)
+    assert content.content["text_summary"] == "hello world"
+    assert stats["image_pixels_downscaled"] == 1 and stats["downscaled_images"] == 1
+    assert stats["ocr_pixels"] <= 500_000
+    [(height, width, _)] = extractor.easyocr_reader.shapes
+    assert height * width == stats["ocr_pixels"]
+
+
+def test_time_budget_skips_ocr(monkeypatch, extractor, image_pdf):
+    monkeypatch.setattr(settings, "max_image_pixels", 0)
+    stats = {}
+    
+    [content] = extractor.extract_image_content(image_pdf, run_ocr=True, stats=stats, deadline=1.0)
+    
+    assert content.metadata["ocr_skipped"] == "time_budget"
+    assert content.metadata["extraction_method"] == "none"
+    assert stats == {"ocr_skipped_time_budget": 1}
+    assert extractor.easyocr_reader.shapes == []
+
+
+@pytest.mark.parametrize("limit_mb, rss_mb, expected", [(0, 4096, False), (1024, 512, False), (1024, 2048, True)])
+def test_worker_memory_guard(monkeypatch, limit_mb, rss_mb, expected):
+    monkeypatch.setattr(settings, "worker_max_rss_mb", limit_mb)
+    worker = PDFWorker.__new__(PDFWorker)  # Tanpa signal handler dan extractor
+    monkeypatch.setattr(worker, "rss_bytes", lambda: rss_mb * 1024 * 1024)
+    assert worker.memory_exceeded() is expected
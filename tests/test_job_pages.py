@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import master_app.main as master_main
+from shared.models import (
+    CompactTextSpans, ContentType, ExtractedContent, JobStatus, PageResult, ResultFormat, TaskResult, TaskStatus
+)
+from shared.redis_queue import redis_queue
+
+
+def page(page_number, status=TaskStatus.COMPLETED):
+    content = [
+        ExtractedContent(content_type=ContentType.TABLE, content={"headers": ["a"], "rows": [["1"]]}, bbox=[0, 0, 1, 1]),
+        ExtractedContent(content_type=ContentType.IMAGE, content={"image_id": "image_1"}, metadata={"image_index": 0}),
+    ]
+    return PageResult(
+        page_number=page_number,
+        content=content if status == TaskStatus.COMPLETED else [],
+        text_spans=CompactTextSpans(
+            fonts=["f"], text=[f"page {page_number}"], bbox=[0, 0, 1, 1], font_id=[0], size=[10], flags=[0]
+        ) if status == TaskStatus.COMPLETED else None,
+        knowledge=f"page {page_number}",
+        processing_time=0.1,
+        status=status,
+        error_message=None if status == TaskStatus.COMPLETED else "boom",
+        stats={"tables": 1}
+    )
+
+
+def test_set_job_pages_counts_failed_pages_once(fake_redis):
+    assert redis_queue.set_job_pages("job-1", [page(1), page(2, TaskStatus.FAILED)]) == (2, 1)
+    # Result yang sama dikirim ulang (misal task di-requeue): tidak ada halaman baru, failed tetap 1
+    assert redis_queue.set_job_pages("job-1", [page(2, TaskStatus.FAILED)]) == (0, 1)
+    # Halaman failed yang berhasil setelah requeue keluar dari set failed
+    assert redis_queue.set_job_pages("job-1", [page(2), page(3, TaskStatus.FAILED)]) == (1, 1)
+    
+    assert redis_queue.get_job_page_numbers("job-1") == [1, 2, 3]
+    assert [data["page_number"] for data in redis_queue.get_job_pages("job-1", [3, 1])] == [1, 3]
+    assert redis_queue.get_job_pages("job-1", []) == []
+    assert fake_redis.ttl("job_failed_pages:job-1") > 0
+    
+    redis_queue.delete_job_data("job-1")
+    assert not fake_redis.exists("job_pages:job-1", "job_failed_pages:job-1")
+
+
+def test_worker_results_update_job_counters(monkeypatch, fake_redis):
+    monkeypatch.setattr(master_main, "jobs_storage", {})
+    job = JobStatus(job_id="job-1", status=TaskStatus.PROCESSING, total_pages=4)
+    redis_queue.set_job_status("job-1", job.model_dump())
+    
+    def deliver(*pages):
+        result = TaskResult(task_id="task_1", job_id="job-1", worker_id="worker_1", page_results=list(pages))
+        asyncio.run(master_main.process_worker_result(result))
+        return JobStatus(**redis_queue.get_job_status("job-1"))
+    
+    job = deliver(page(1), page(2, TaskStatus.FAILED))
+    assert (job.completed_pages, job.failed_pages) == (2, 1)
+    
+    job = deliver(page(1), page(2, TaskStatus.FAILED))
+    assert (job.completed_pages, job.failed_pages) == (2, 1)
+    
+    job = deliver(page(2))
+    assert (job.completed_pages, job.failed_pages, job.status) == (2, 0, TaskStatus.PROCESSING)
+
+
+@pytest.fixture
+def stored_job(fake_redis):
+    job = JobStatus(job_id="job-1", status=TaskStatus.COMPLETED, total_pages=3, completed_pages=3, failed_pages=1)
+    redis_queue.set_job_pages("job-1", [page(1), page(2), page(3, TaskStatus.FAILED)])
+    return job
+
+
+def result_page(job, from_page=None, to_page=None, content_types=None, exclude_fields=None, format=ResultFormat.LEGACY):
+    response = master_main.build_result_page(job, from_page, to_page, content_types, exclude_fields, format, False)
+    return json.loads(response.body)
+
+
+def test_result_page_range(stored_job):
+    result = result_page(stored_job, from_page=2)
+    assert [data["page_number"] for data in result["results"]] == [2, 3]
+    assert (result["from_page"], result["to_page"], result["returned_pages"]) == (2, None, 2)
+    assert result_page(stored_job, to_page=1)["returned_pages"] == 1
+    assert result_page(stored_job, from_page=5)["results"] == []
+
+
+def test_result_page_content_types_and_projection(stored_job):
+    result = result_page(stored_job, from_page=1, to_page=1, content_types="text,table", exclude_fields="bbox,knowledge")
+    first = result["results"][0]
+    
+    assert [item["content_type"] for item in first["content"]] == ["text", "table"]
+    assert first["content"][0]["content"] == "page 1"
+    assert all("bbox" not in item for item in first["content"])
+    assert "knowledge" not in first and first["stats"] == {"tables": 1}
+    
+    compact = result_page(stored_job, 1, 1, content_types="image", exclude_fields="metadata", format=ResultFormat.COMPACT)
+    first = compact["results"][0]
+    assert [item["content_type"] for item in first["content"]] == ["image"]
+    assert first["text_spans"] is None
+    assert "metadata" not in first["content"][0]
+    
+    spans = result_page(stored_job, 1, 1, exclude_fields="metadata,bbox", format=ResultFormat.COMPACT)["results"][0]["text_spans"]
+    assert spans == {"text": ["page 1"]}
+
+
+@pytest.mark.parametrize("kwargs, detail", [
+    ({"content_types": "text,video"}, "Invalid content_types: video"),
+    ({"exclude_fields": "bbox,page_number"}, "Invalid exclude_fields: page_number"),
+    ({"from_page": 3, "to_page": 2}, "to_page must be >= from_page"),
+])
+def test_result_page_rejects_invalid_params(stored_job, kwargs, detail):
+    with pytest.raises(HTTPException) as error:
+        result_page(stored_job, **kwargs)
+    assert error.value.status_code == 400
+    assert error.value.detail == detail
@@ -0,0 +1,75 @@
+import itertools
+
+import pytest
+
+import master_app.main as master_main
+from shared import metrics
+from shared.metrics import StageTimer
+from shared.models import JobStatus, TaskStatus
+
+
+def test_stage_timer_exclusive_time(monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: float(next(clock)))
+    timer = StageTimer()
+    
+    with timer.stage("page"):          # 0 .. 7
+        with timer.stage("text"):      # 1 .. 2
+            pass
+        with timer.stage("ocr"):       # 3 .. 6
+            with timer.stage("render"):  # 4 .. 5
+                pass
+    with timer.stage("text"):          # 8 .. 9
+        pass
+    
+    # Parent hanya menghitung waktu di luar stage nested; stage berulang dijumlah
+    assert timer.timings == {"text": 2.0, "render": 1.0, "ocr": 2.0, "page": 3.0}
+
+
+def test_stage_timer_records_on_error():
+    timer = StageTimer()
+    with pytest.raises(ValueError):
+        with timer.stage("tables"):
+            raise ValueError("broken table")
+    assert "tables" in timer.timings
+
+
+def profile_page(page_number, processing_time, timings, status=TaskStatus.COMPLETED, stats=None, level="full"):
+    return {
+        "page_number": page_number,
+        "status": status,
+        "processing_time": processing_time,
+        "timings": timings,
+        "stats": stats or {},
+        "extraction_level": level
+    }
+
+
+def test_build_job_profile():
+    job = JobStatus(job_id="job-1", status=TaskStatus.PROCESSING, total_pages=4)
+    pages = [
+        profile_page(1, 1.0, {"text": 0.2, "ocr": 0.8}, stats={"ocr_images": 2}),
+        profile_page(2, 3.0, {"text": 0.5, "ocr": 2.5}, stats={"ocr_images": 1, "image_errors": 1}, level="text_only"),
+        profile_page(3, 0.5, {}, status=TaskStatus.FAILED, level=None),
+    ]
+    
+    profile = master_main.build_job_profile(job, pages, top=2)
+    
+    assert profile["profiled_pages"] == 3 and profile["total_pages"] == 4
+    assert profile["total_page_seconds"] == 4.5 and profile["mean_page_seconds"] == 1.5
+    assert [stage["stage"] for stage in profile["stages"]] == ["ocr", "text"]
+    ocr = profile["stages"][0]
+    assert ocr["total_seconds"] == 3.3 and ocr["max_seconds"] == 2.5 and ocr["mean_seconds"] == 1.1
+    assert ocr["share"] == pytest.approx(3.3 / 4.0, abs=1e-4)
+    assert profile["stats"] == {"ocr_images": 3, "image_errors": 1}
+    assert profile["extraction_levels"] == {"full": 1, "text_only": 1}
+    
+    assert [page["page_number"] for page in profile["slowest_pages"]] == [2, 1]
+    assert profile["slowest_pages"][0]["slowest_stage"] == "ocr"
+
+
+def test_build_job_profile_without_pages():
+    job = JobStatus(job_id="job-1", status=TaskStatus.PENDING, total_pages=2)
+    profile = master_main.build_job_profile(job, [], top=10)
+    assert profile["mean_page_seconds"] == 0.0
+    assert profile["stages"] == [] and profile["slowest_pages"] == []
@@ -0,0 +1,71 @@
+import pytest
+
+from shared.knowledge import build_page_knowledge, normalize_fragment
+from shared.models import CompactTextSpans, ContentType, ExtractedContent
+
+
+def text(value):
+    return ExtractedContent(content_type=ContentType.TEXT, content=value)
+
+
+def table(headers, rows, table_id="table_1"):
+    return ExtractedContent(
+        content_type=ContentType.TABLE, content={"table_id": table_id, "headers": headers, "rows": rows}
+    )
+
+
+def image(**content):
+    return ExtractedContent(content_type=ContentType.IMAGE, content={"image_id": "image_1", **content})
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("  a \t b\n\nc  ", "a b c"),
+    (None, ""),
+    (42, "42"),
+    (" spaced ", "spaced"),
+])
+def test_normalize_fragment(value, expected):
+    assert normalize_fragment(value) == expected
+
+
+def test_sections_in_fixed_order():
+    knowledge = build_page_knowledge([
+        image(text_summary="Scanned  note"),
+        table(["Name", "Qty"], [["Apple", "3"], [None, " 4 "]]),
+        text("First   line\nwrapped"),
+        text("Second line"),
+    ])
+    
+    assert knowledge == (
+        "TEXT CONTENT:\nFirst line wrapped\nSecond line\n\n"
+        "TABLE CONTENT:\nTable: table_1\nName | Qty\n----------\nApple | 3\n | 4\n\n"
+        "IMAGE TEXT CONTENT:\nImage image_1 Text: Scanned note"
+    )
+
+
+def test_text_spans_come_before_content():
+    spans = CompactTextSpans(
+        fonts=["f"], text=["span one", "span  two"], bbox=[0, 0, 1, 1] * 2, font_id=[0, 0], size=[1, 1], flags=[0, 0]
+    )
+    knowledge = build_page_knowledge([text("rasterized")], spans)
+    assert knowledge == "TEXT CONTENT:\nspan one\nspan two\nrasterized"
+
+
+def test_image_falls_back_to_extracted_text():
+    knowledge = build_page_knowledge([image(extracted_text=[{"text": "one"}, {"text": " two "}, "skipped"])])
+    assert knowledge == "IMAGE TEXT CONTENT:\nImage image_1 Text: one two"
+
+
+def test_empty_and_malformed_content_is_skipped():
+    assert build_page_knowledge([]) == ""
+    assert build_page_knowledge([
+        text("   "),
+        image(text_summary="", extracted_text=[]),
+        ExtractedContent(content_type=ContentType.TABLE, content={"table_id": "no_rows"}),
+        ExtractedContent(content_type=ContentType.TABLE, content="not a table"),
+    ]) == ""
+
+
+def test_tables_separated_by_blank_line():
+    knowledge = build_page_knowledge([table(["A"], [["1"]]), table([], [["2"], []], table_id="table_2")])
+    assert knowledge == "TABLE CONTENT:\nTable: table_1\nA\n-\n1\n\nTable: table_2\n2"
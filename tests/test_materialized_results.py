@@ -0,0 +1,88 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import CompactTextSpans, JobStatus, PageResult, TaskResult, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+def page(page_number):
+    return PageResult(
+        page_number=page_number,
+        content=[],
+        text_spans=CompactTextSpans(
+            fonts=["f"], text=[f"text of page {page_number}"], bbox=[0, 0, 1, 1], font_id=[0], size=[10], flags=[0]
+        ),
+        knowledge=f"knowledge {page_number}",
+        processing_time=0.1,
+        status=TaskStatus.COMPLETED
+    )
+
+
+@pytest.fixture
+def completed_job(monkeypatch, tmp_path, fake_redis):
+    """Job 2 halaman yang diselesaikan lewat process_worker_result (tanpa spill ke disk)"""
+    monkeypatch.setattr(settings, "result_spill", False)
+    monkeypatch.setattr(settings, "result_compression", True)
+    monkeypatch.setattr(master_main, "jobs_storage", {})
+    job = JobStatus(job_id="job-1", status=TaskStatus.PROCESSING, total_pages=2)
+    redis_queue.set_job_status("job-1", job.model_dump())
+    
+    result = TaskResult(task_id="task_1", job_id="job-1", worker_id="worker_1", page_results=[page(2), page(1)])
+    asyncio.run(master_main.process_worker_result(result))
+    return "job-1"
+
+
+@pytest.fixture
+def client(completed_job):
+    return TestClient(master_main.app)
+
+
+def test_outputs_materialized_once_on_completion(completed_job, fake_redis):
+    assert redis_queue.get_job_status(completed_job)["status"] == TaskStatus.COMPLETED
+    assert sorted(fake_redis.keys("job_payload:*")) == ["job_payload:job-1:knowledge", "job_payload:job-1:result:legacy:0"]
+    
+    payload = redis_queue.get_job_payload(completed_job, "result:legacy:0")
+    result = json.loads(gzip.decompress(payload))
+    assert [page_result["page_number"] for page_result in result["results"]] == [1, 2]
+    # Payload default sudah dalam format legacy (text spans di-expand)
+    assert result["results"][0]["content"][0]["content"] == "text of page 1"
+    assert result["full_document_knowledge"]
+
+
+def test_result_served_from_payload(client, completed_job):
+    payload = redis_queue.get_job_payload(completed_job, "result:legacy:0")
+    # Payload diubah langsung: response harus berasal dari payload, bukan dibangun ulang
+    redis_queue.set_job_payload(completed_job, "result:legacy:0", gzip.compress(b'{"served": "payload"}'))
+    
+    response = client.get(f"/job-result/{completed_job}")
+    assert response.json() == {"served": "payload"}
+    
+    redis_queue.set_job_payload(completed_job, "result:legacy:0", payload)
+    compressed = client.get(f"/job-result/{completed_job}", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json()["job_id"] == completed_job
+    
+    plain = client.get(f"/job-result/{completed_job}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == compressed.json()
+
+
+def test_result_variants_memoized_on_first_request(client, completed_job, fake_redis):
+    compact = client.get(f"/job-result/{completed_job}", params={"format": "compact", "include_table_data": "true"})
+    
+    assert compact.status_code == 200
+    assert compact.json()["results"][0]["text_spans"]["text"] == ["text of page 1"]
+    assert fake_redis.exists("job_payload:job-1:result:compact:1")
+
+
+def test_knowledge_served_from_payload(client, completed_job):
+    knowledge = client.get(f"/job-knowledge/{completed_job}").json()
+    
+    assert knowledge["processed_pages"] == 2
+    assert knowledge["full_document_knowledge"] == "Page 1:\nknowledge 1\n\nPage 2:\nknowledge 2"
@@ -0,0 +1,66 @@
+import time
+
+import fitz
+import pytest
+
+pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR tidak dipakai di test ini
+
+import worker_app.main as worker_main
+from shared.config import settings
+from shared.models import PageTask, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+def _hang_on_first_page(pdf_path, page_number, profile):
+    """Pengganti _process_page_isolated di process executor: halaman 1 hang"""
+    if page_number == 1:
+        time.sleep(120)
+    return worker_main._process_page_isolated(pdf_path, page_number, profile)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for number in (1, 2):
+        doc.new_page().insert_text((72, 72), f"Isolated page number {number}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(settings, "page_timeout", 3)
+    monkeypatch.setattr(settings, "page_max_attempts", 1)
+    monkeypatch.setattr(settings, "page_cache_ttl", 0)
+    monkeypatch.setattr(redis_queue, "is_job_cancelled", lambda job_id: False)
+    extractor = worker_main.PDFExtractor()
+    yield extractor
+    extractor.close()
+
+
+def test_timed_out_page_fails_and_next_page_completes(monkeypatch, extractor, pdf_path):
+    monkeypatch.setattr(worker_main, "_process_page_isolated", _hang_on_first_page)
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1, 2], pdf_path=pdf_path)
+    
+    start = time.time()
+    result = extractor.process_task(task)
+    
+    timed_out, completed = result.page_results
+    assert timed_out.status == TaskStatus.FAILED
+    assert "timed out" in timed_out.error_message
+    assert timed_out.stats == {"timeout": 1}
+    assert timed_out.extraction_level is None
+    
+    assert completed.status == TaskStatus.COMPLETED
+    assert "Isolated page number 2" in completed.knowledge
+    # Process yang hang di-kill, bukan ditunggu sampai sleep selesai
+    assert time.time() - start < 60
+
+
+def test_kill_executor_processes_without_private_attribute():
+    class Executor:
+        pass
+    
+    assert worker_main._kill_executor_processes(Executor()) is False
@@ -0,0 +1,129 @@
+import pytest
+
+pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR tidak dipakai di test ini
+
+import worker_app.main as worker_main
+from shared.config import settings
+from shared.models import ContentType, ExtractionLevel, ExtractionProfile, PageResult, PageTask, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(settings, "page_max_attempts", 4)
+    monkeypatch.setattr(settings, "page_retry_backoff", 0)
+    monkeypatch.setattr(redis_queue, "is_job_cancelled", lambda job_id: False)
+    return worker_main.PDFExtractor()
+
+
+def fake_run_page(calls, succeeds):
+    """Pengganti run_page: halaman berhasil kalau succeeds(profile) True"""
+    def run_page(pdf_path, page_number, profile, isolate=True, timeout=None):
+        calls.append(profile)
+        if succeeds(profile):
+            return PageResult(
+                page_number=page_number, content=[], knowledge="ok", processing_time=0.01,
+                status=TaskStatus.COMPLETED, stats={"text_spans": 1}
+            )
+        return PageResult(
+            page_number=page_number, content=[], processing_time=0.01,
+            status=TaskStatus.FAILED, error_message="boom"
+        )
+    return run_page
+
+
+def levels(attempts):
+    return [level for level, _ in attempts]
+
+
+def test_attempts_follow_retry_levels(extractor):
+    attempts = extractor.extraction_attempts(ExtractionProfile())
+    assert levels(attempts) == [
+        ExtractionLevel.FULL, ExtractionLevel.NO_TABLES, ExtractionLevel.TEXT_ONLY, ExtractionLevel.RASTERIZED_OCR
+    ]
+    assert attempts[0][1] == ExtractionProfile()
+    assert attempts[1][1].content_types == [ContentType.TEXT, ContentType.IMAGE]
+    assert attempts[3][1].rasterize and attempts[3][1].dpi == settings.page_retry_rasterize_dpi
+
+
+def test_attempts_deduped_by_cache_key(extractor):
+    # Text-only: no_tables dan text_only menghasilkan profile yang sama dengan full
+    attempts = extractor.extraction_attempts(ExtractionProfile(content_types=[ContentType.TEXT]))
+    assert levels(attempts) == [ExtractionLevel.FULL, ExtractionLevel.RASTERIZED_OCR]
+    assert len({profile.cache_key() for _, profile in attempts}) == len(attempts)
+
+
+@pytest.mark.parametrize("max_attempts, expected", [(2, 2), (1, 1), (0, 1)])
+def test_attempts_capped_by_max_attempts(monkeypatch, extractor, max_attempts, expected):
+    monkeypatch.setattr(settings, "page_max_attempts", max_attempts)
+    assert len(extractor.extraction_attempts(ExtractionProfile())) == expected
+
+
+def test_first_successful_level_wins(extractor):
+    calls = []
+    extractor.run_page = fake_run_page(calls, lambda profile: not profile.wants(ContentType.TABLE))
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1], pdf_path="unused.pdf")
+    
+    result = extractor.run_page_with_retry(task, 1, isolate=False)
+    
+    assert len(calls) == 2
+    assert result.status == TaskStatus.COMPLETED
+    assert result.extraction_level == ExtractionLevel.NO_TABLES
+    assert [(attempt.level, attempt.status) for attempt in result.attempts] == [
+        (ExtractionLevel.FULL, TaskStatus.FAILED), (ExtractionLevel.NO_TABLES, TaskStatus.COMPLETED)
+    ]
+    assert result.stats == {"text_spans": 1, "retries": 1}
+    assert "retry" in result.timings
+
+
+def test_first_attempt_success_has_no_retry_history(extractor):
+    calls = []
+    extractor.run_page = fake_run_page(calls, lambda profile: True)
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1], pdf_path="unused.pdf")
+    
+    result = extractor.run_page_with_retry(task, 1, isolate=False)
+    
+    assert len(calls) == 1
+    assert result.extraction_level == ExtractionLevel.FULL
+    assert result.attempts == []
+    assert "retries" not in result.stats
+
+
+def test_page_failing_every_level_has_no_extraction_level(extractor):
+    calls = []
+    extractor.run_page = fake_run_page(calls, lambda profile: False)
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1], pdf_path="unused.pdf")
+    
+    result = extractor.run_page_with_retry(task, 1, isolate=False)
+    
+    assert len(calls) == 4
+    assert result.status == TaskStatus.FAILED
+    assert result.extraction_level is None
+    assert [attempt.level for attempt in result.attempts] == levels(extractor.extraction_attempts(ExtractionProfile()))
+    assert result.stats["retries"] == 3
+
+
+def test_single_failed_attempt_has_no_extraction_level(monkeypatch, extractor):
+    monkeypatch.setattr(settings, "page_max_attempts", 1)
+    extractor.run_page = fake_run_page([], lambda profile: False)
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1], pdf_path="unused.pdf")
+    
+    result = extractor.run_page_with_retry(task, 1, isolate=False)
+    
+    assert result.status == TaskStatus.FAILED
+    assert result.extraction_level is None
+
+
+def test_permanent_error_is_not_retried(tmp_path, extractor):
+    calls = []
+    run_page = extractor.run_page
+    extractor.run_page = lambda *args, **kwargs: calls.append(args) or run_page(*args, **kwargs)
+    task = PageTask(task_id="task-1", job_id="job-1", page_numbers=[1], pdf_path=str(tmp_path / "missing.pdf"))
+    
+    result = extractor.run_page_with_retry(task, 1, isolate=False)
+    
+    assert len(calls) == 1
+    assert result.status == TaskStatus.FAILED
+    assert "not found" in result.error_message
+    assert result.retryable is False
+    assert result.extraction_level is None
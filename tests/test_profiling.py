@@ -0,0 +1,51 @@
+import marshal
+import tracemalloc
+
+import pytest
+
+from shared import profiling
+from shared.profiling import TaskProfiler, should_profile_task
+
+
+def test_should_profile_task(monkeypatch):
+    assert should_profile_task(True, 0)
+    assert not should_profile_task(False, 0)
+    
+    monkeypatch.setattr(profiling.random, "randrange", lambda n: 0)
+    assert should_profile_task(False, 10)
+    monkeypatch.setattr(profiling.random, "randrange", lambda n: 3)
+    assert not should_profile_task(False, 10)
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(1024)]
+
+
+def test_task_profiler_artifacts():
+    with TaskProfiler(top=5) as profiler:
+        data = allocate()
+    
+    assert not tracemalloc.is_tracing()
+    assert profiler.peak_memory >= 1024 * 1024
+    artifacts = profiler.artifacts()
+    assert set(artifacts) == {"pstats", "txt"}
+    assert any(function == "allocate" for _, _, function in marshal.loads(artifacts["pstats"]))
+    assert "Peak traced memory" in artifacts["txt"].decode()
+    del data
+
+
+def test_task_profiler_keeps_existing_tracemalloc():
+    tracemalloc.start()
+    try:
+        with TaskProfiler():
+            allocate()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_task_profiler_does_not_swallow_errors():
+    with pytest.raises(RuntimeError):
+        with TaskProfiler() as profiler:
+            raise RuntimeError("page failed")
+    assert profiler.snapshot is not None
@@ -0,0 +1,74 @@
+import fitz
+import pytest
+
+pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR tidak dipakai di test ini
+
+from worker_app.main import PDFExtractor
+
+
+def segment(x0, y0, x1, y1, text, style=("Helvetica", 10, 0)):
+    return {"bbox": [x0, y0, x1, y1], "text": text, "styles": {style: len(text)}}
+
+
+@pytest.fixture
+def extractor():
+    return PDFExtractor()
+
+
+def test_columns_read_left_then_right_between_full_width_segments(extractor):
+    rows = range(20)
+    right = [segment(320, 100 + row * 12, 540, 110 + row * 12, f"Right {row}") for row in rows]
+    left = [segment(72, 100 + row * 12, 280, 110 + row * 12, f"Left {row}") for row in rows]
+    segments = [segment(72, 700, 540, 712, "Footer")] + right + left + [segment(72, 40, 540, 52, "Title")]
+    
+    ordered = extractor._order_segments(segments, 612)
+    
+    assert [item["text"] for item in ordered] == (
+        ["Title"] + [f"Left {row}" for row in rows] + [f"Right {row}" for row in rows] + ["Footer"]
+    )
+    assert [item["column"] for item in ordered] == [None] + [0] * 20 + [1] * 20 + [None]
+
+
+def test_single_column_keeps_top_to_bottom_order(extractor):
+    segments = [segment(72, 200, 400, 210, "Second"), segment(72, 100, 500, 110, "First")]
+    
+    ordered = extractor._order_segments(segments, 612)
+    
+    assert [item["text"] for item in ordered] == ["First", "Second"]
+
+
+def test_merge_lines_into_blocks(extractor):
+    ordered = [
+        {**segment(72, 100, 280, 110, "A hyphen-"), "column": 0},
+        {**segment(72, 111, 280, 121, "ated   word"), "column": 0},
+        {**segment(72, 122, 280, 132, "Next line", ("Helvetica-Bold", 12, 16)), "column": 0},
+        {**segment(72, 200, 280, 210, "Far below"), "column": 0},
+        {**segment(320, 201, 540, 211, "Other column"), "column": 1},
+    ]
+    
+    blocks = extractor._merge_segments(ordered)
+    
+    assert [block["text"] for block in blocks] == ["A hyphenated word Next line", "Far below", "Other column"]
+    assert blocks[0]["bbox"] == [72, 100, 280, 132]
+    # Style dominan block dihitung dari jumlah karakter per style
+    assert max(blocks[0]["styles"], key=blocks[0]["styles"].get) == ("Helvetica", 10, 0)
+
+
+def test_text_blocks_from_two_column_page(extractor):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Two column report title spanning the whole width of the page", fontsize=12)
+    for line in range(5):
+        page.insert_text((72, 100 + line * 12), f"Left column line {line}", fontsize=9)
+        page.insert_text((320, 100 + line * 12), f"Right {line} 5 kg", fontsize=9)
+    
+    blocks = extractor.extract_text_blocks(page)
+    
+    assert blocks.text == [
+        "Two column report title spanning the whole width of the page",
+        " ".join(f"Left column line {line}" for line in range(5)),
+        " ".join(f"Right {line} 5 kg" for line in range(5)),
+    ]
+    assert len(blocks.bbox) == 4 * len(blocks)
+    assert blocks.fonts == ["Helvetica"]
+    doc.close()
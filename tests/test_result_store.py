@@ -0,0 +1,88 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared.result_store import LocalResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalResultStore(str(tmp_path / "results"))
+
+
+def put_sample_job(store, job_id="job-1", retention_seconds=3600):
+    pages = [
+        {"page_number": 2, "status": "completed", "knowledge": "two"},
+        {"page_number": 1, "status": "completed", "knowledge": "one"},
+    ]
+    chunks = [{"chunk_index": 0, "page_number": 1, "text": "one"}]
+    payloads = {"result": gzip.compress(b'{"job_id": "job-1"}'), "profile:task_1": b"raw"}
+    assert store.put_job(job_id, {"job_id": job_id, "status": "completed"}, pages, chunks, payloads, retention_seconds)
+    return pages, chunks, payloads
+
+
+def test_put_get_round_trip(store):
+    pages, chunks, payloads = put_sample_job(store)
+    
+    assert store.has_job("job-1")
+    assert store.get_job_status("job-1") == {"job_id": "job-1", "status": "completed"}
+    assert store.get_page_numbers("job-1") == [1, 2]
+    assert store.get_pages("job-1") == pages
+    assert store.get_pages("job-1", [2]) == [pages[0]]
+    assert store.get_chunks("job-1") == chunks
+    assert store.get_payload("job-1", "result") == payloads["result"]
+    assert store.get_payload("job-1", "profile:task_1") == b"raw"
+    assert store.get_payload("job-1", "missing") is None
+    assert list(store.list_jobs()) == ["job-1"]
+
+
+def test_unknown_job(store):
+    assert not store.has_job("nope")
+    assert store.get_job_status("nope") is None
+    assert store.get_pages("nope") == []
+    assert store.get_chunks("nope") is None
+    assert store.get_page_numbers("nope") == []
+
+
+def test_job_without_manifest_is_not_visible(store):
+    put_sample_job(store)
+    os.remove(os.path.join(store.root_dir, "job-1", "manifest.json"))
+    
+    assert not store.has_job("job-1")
+    assert store.get_pages("job-1") == []
+    assert store.expired_jobs(datetime.now() + timedelta(days=365)) == []
+
+
+def test_invalid_job_id_is_rejected(store):
+    assert not store.put_job("../escape", {}, [], [], {}, 0)
+    assert not store.has_job("../escape")
+    assert not store.delete_job("../escape")
+    assert not os.path.exists(os.path.join(os.path.dirname(store.root_dir), "escape"))
+
+
+def test_expired_jobs(store):
+    put_sample_job(store, "short", retention_seconds=60)
+    put_sample_job(store, "forever", retention_seconds=0)
+    
+    assert store.expired_jobs() == []
+    assert store.expired_jobs(datetime.now() + timedelta(seconds=120)) == ["short"]
+    assert store.get_manifest("forever")["expires_at"] is None
+
+
+def test_delete_job(store):
+    put_sample_job(store)
+    
+    assert store.delete_job("job-1")
+    assert not store.has_job("job-1")
+    assert not os.path.exists(os.path.join(store.root_dir, "job-1"))
+    assert not store.delete_job("job-1")
+
+
+def test_put_job_overwrites_previous_results(store):
+    put_sample_job(store)
+    store.put_job("job-1", {"status": "completed"}, [{"page_number": 3}], [], {}, 0)
+    
+    assert store.get_page_numbers("job-1") == [3]
+    assert store.get_pages("job-1") == [{"page_number": 3}]
@@ -0,0 +1,93 @@
+import pytest
+
+from worker_app.supervisor import ScalingPolicy
+
+
+@pytest.fixture
+def policy():
+    return ScalingPolicy(
+        min_workers=1,
+        max_workers=4,
+        tasks_per_worker=4,
+        max_backlog_age=60,
+        scale_up_step=2,
+        scale_up_cooldown=30,
+        scale_down_cooldown=300,
+        max_cpu_percent=85,
+        min_free_memory_mb=1024
+    )
+
+
+def decide(policy, now=1000.0, running=1, idle=0, queue_depth=0, backlog_age=0.0,
+           cpu_percent=10.0, available_memory_mb=16384, worker_memory_mb=1024):
+    return policy.decide(now, running, idle, queue_depth, backlog_age, cpu_percent, available_memory_mb, worker_memory_mb)
+
+
+def test_desired_workers_from_queue_depth(policy):
+    assert policy.desired_workers(0, 0, 1) == (1, "queue_depth")  # Minimum tetap dijaga
+    assert policy.desired_workers(9, 0, 1) == (3, "queue_depth")
+    # Queue pendek tapi task tertua melewati SLO
+    assert policy.desired_workers(2, 120, 1) == (2, "backlog_age")
+
+
+def test_scale_up_limited_by_step(policy):
+    decision = decide(policy, running=1, queue_depth=40)
+    assert (decision.action, decision.count, decision.reason, decision.desired) == ("scale_up", 2, "queue_depth", 4)
+
+
+def test_min_workers_restored_without_cooldown(policy):
+    policy.record(decide(policy, running=1, queue_depth=40), 1000.0)
+    decision = decide(policy, now=1001.0, running=0)
+    assert (decision.action, decision.count, decision.reason) == ("scale_up", 1, "min_workers")
+
+
+def test_scale_up_cooldown(policy):
+    policy.record(decide(policy, running=1, queue_depth=40), 1000.0)
+    
+    blocked = decide(policy, now=1010.0, running=3, queue_depth=40)
+    assert (blocked.action, blocked.blocked) == ("none", "cooldown")
+    
+    allowed = decide(policy, now=1031.0, running=3, queue_depth=40)
+    assert (allowed.action, allowed.count) == ("scale_up", 1)
+
+
+def test_scale_up_blocked_by_cpu_and_memory(policy):
+    assert decide(policy, queue_depth=40, cpu_percent=90).blocked == "cpu"
+    assert decide(policy, queue_depth=40, available_memory_mb=1500).blocked == "memory"
+    # Memory hanya cukup untuk satu worker lagi
+    decision = decide(policy, queue_depth=40, available_memory_mb=2500)
+    assert (decision.action, decision.count) == ("scale_up", 1)
+
+
+def test_blocked_at_max_workers(policy):
+    decision = decide(policy, running=4, queue_depth=100)
+    assert (decision.action, decision.desired, decision.blocked) == ("none", 4, "max_workers")
+
+
+def test_scale_down_waits_for_cooldown_since_last_scaling(policy):
+    policy.record(decide(policy, running=1, queue_depth=40), 1000.0)
+    
+    # Queue kosong, tapi belum lewat scale_down_cooldown sejak scale up terakhir (hysteresis)
+    assert decide(policy, now=1100.0, running=3, idle=2).action == "none"
+    
+    decision = decide(policy, now=1301.0, running=3, idle=2)
+    assert (decision.action, decision.count, decision.reason, decision.desired) == ("scale_down", 2, "idle", 1)
+
+
+def test_scale_down_only_idle_workers(policy):
+    decision = decide(policy, running=3, idle=1)
+    assert (decision.action, decision.count) == ("scale_down", 1)
+    assert decide(policy, running=3, idle=0).action == "none"
+
+
+def test_no_scale_down_while_backlog_is_old(policy):
+    # Satu task di queue tapi sudah lama menunggu: jangan kurangi worker
+    assert decide(policy, running=3, idle=2, queue_depth=1, backlog_age=120).action != "scale_down"
+
+
+def test_record_only_tracks_scaling_actions(policy):
+    policy.record(decide(policy, running=1), 1000.0)
+    assert policy.last_scale_up is None and policy.last_scale_event is None
+    
+    policy.record(decide(policy, running=3, idle=2), 1000.0)
+    assert policy.last_scale_up is None and policy.last_scale_event == 1000.0
@@ -0,0 +1,79 @@
+import fitz
+import pdfplumber
+import pytest
+
+pytest.importorskip("easyocr")  # Diimport worker_app.main, model OCR tidak dipakai di test ini
+
+from shared.models import ContentType, ExtractionProfile
+from worker_app.main import PDFExtractor
+
+
+def draw_grid(page, rows=3, cols=3, x0=72, y0=72, cell_width=100, cell_height=20):
+    for row in range(rows + 1):
+        y = y0 + row * cell_height
+        page.draw_line((x0, y), (x0 + cols * cell_width, y))
+    for col in range(cols + 1):
+        x = x0 + col * cell_width
+        page.draw_line((x, y0), (x, y0 + rows * cell_height))
+    for row in range(rows):
+        for col in range(cols):
+            page.insert_text((x0 + col * cell_width + 4, y0 + row * cell_height + 14), f"r{row}c{col}")
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """Halaman 1: table bergaris, 2: text saja, 3: satu kotak border, 4: table dari rect per cell"""
+    doc = fitz.open()
+    draw_grid(doc.new_page())
+    doc.new_page().insert_text((72, 72), "Plain paragraph without any ruling lines")
+    
+    page = doc.new_page()
+    page.draw_rect(fitz.Rect(50, 50, 550, 750))
+    page.insert_text((72, 72), "Framed page")
+    
+    page = doc.new_page()
+    for row in range(3):
+        for col in range(2):
+            page.draw_rect(fitz.Rect(72 + col * 100, 72 + row * 20, 172 + col * 100, 92 + row * 20))
+            page.insert_text((76 + col * 100, 86 + row * 20), f"r{row}c{col}")
+    
+    path = tmp_path / "tables.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_prefilter_matches_pdfplumber(pdf_path):
+    extractor = PDFExtractor()
+    doc = fitz.open(pdf_path)
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number, expected in [(1, True), (2, False), (3, False), (4, True)]:
+            assert extractor.page_may_contain_table(doc[page_number - 1]) is expected, page_number
+            # Halaman yang di-skip prefilter memang tidak punya table menurut pdfplumber
+            if not expected:
+                assert pdf.pages[page_number - 1].find_tables() == []
+    doc.close()
+
+
+def test_table_content_from_grid(pdf_path):
+    stats = {}
+    tables = PDFExtractor().extract_table_content(pdf_path, 1, stats)
+    
+    assert len(tables) == 1
+    assert tables[0].content["headers"] == ["r0c0", "r0c1", "r0c2"]
+    assert tables[0].content["rows"] == [["r1c0", "r1c1", "r1c2"], ["r2c0", "r2c1", "r2c2"]]
+    assert stats == {}
+
+
+def test_process_page_skips_pdfplumber_without_ruling_lines(monkeypatch, pdf_path):
+    extractor = PDFExtractor()
+    calls = []
+    monkeypatch.setattr(extractor, "extract_table_content", lambda *args: calls.append(args) or [])
+    profile = ExtractionProfile(content_types=[ContentType.TEXT, ContentType.TABLE])
+    
+    skipped = extractor.process_page(pdf_path, 2, profile, observe=False)
+    assert skipped.stats["table_prefilter_skipped"] == 1
+    assert calls == []
+    
+    extractor.process_page(pdf_path, 1, profile, observe=False)
+    assert len(calls) == 1
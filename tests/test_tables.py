@@ -0,0 +1,36 @@
+from shared.tables import normalize_headers, table_records
+
+
+def test_empty_headers_get_column_names():
+    assert normalize_headers(["Name", None, "", "  "]) == ["Name", "column_2", "column_3", "column_4"]
+
+
+def test_whitespace_in_headers_is_collapsed():
+    assert normalize_headers(["  Unit\nPrice ", "Total\t Qty"]) == ["Unit Price", "Total Qty"]
+
+
+def test_duplicate_headers_get_suffix():
+    assert normalize_headers(["a", "a", "a", "b"]) == ["a", "a_2", "a_3", "b"]
+
+
+def test_suffix_does_not_collide_with_existing_header():
+    # "a_2" sudah ada, duplicate "a" berikutnya harus jadi "a_3"
+    assert normalize_headers(["a", "a_2", "a"]) == ["a", "a_2", "a_3"]
+
+
+def test_non_string_headers():
+    assert normalize_headers([2024, 1.5, None]) == ["2024", "1.5", "column_3"]
+
+
+def test_table_records_pads_short_rows_and_ignores_extra_cells():
+    table = {"headers": ["a", "b", "c"], "rows": [["1", "2", "3"], ["4"], ["5", "6", "7", "8"]]}
+    assert table_records(table) == [
+        {"a": "1", "b": "2", "c": "3"},
+        {"a": "4", "b": None, "c": None},
+        {"a": "5", "b": "6", "c": "7"},
+    ]
+
+
+def test_table_records_without_rows_or_headers():
+    assert table_records({"headers": ["a"], "rows": []}) == []
+    assert table_records({}) == []
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from shared.tracing import (
+    JsonlSpanExporter, OtlpHttpSpanExporter, Tracer, format_traceparent, new_traceparent, parse_traceparent
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.batches = []
+    
+    def export(self, spans, service_name):
+        self.batches.append([span.to_dict(service_name) for span in spans])
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer("test", exporter, flush_interval=60)
+
+
+@pytest.mark.parametrize("traceparent", [None, "", "garbage", "00-abc-def-01", "00-" + "a" * 32 + "-" + "b" * 8 + "-01"])
+def test_invalid_traceparent(traceparent):
+    assert parse_traceparent(traceparent) is None
+
+
+def test_traceparent_round_trip():
+    trace_id, span_id = parse_traceparent(new_traceparent())
+    assert len(trace_id) == 32 and len(span_id) == 16
+    assert parse_traceparent(format_traceparent(trace_id, span_id)) == (trace_id, span_id)
+
+
+def test_nested_spans_share_trace(tracer, exporter):
+    with tracer.span("job", job_id="job-1") as job_span:
+        with tracer.span("page") as page_span:
+            pass
+    tracer.flush()
+    
+    [[page, job]] = exporter.batches
+    assert page["parent_span_id"] == job_span.span_id and page["trace_id"] == job_span.trace_id
+    assert job["parent_span_id"] is None and job["attributes"] == {"job_id": "job-1"}
+    assert page_span.end_time <= job_span.end_time
+
+
+def test_span_from_propagated_traceparent(tracer, exporter):
+    traceparent = new_traceparent()
+    with tracer.span("task", parent=traceparent) as span:
+        pass
+    # Root span job memakai context yang sudah dipropagasi ke worker sebelumnya
+    root = tracer.record_span("job", 10.0, 12.5, span_context=traceparent, pages=3)
+    tracer.flush()
+    
+    trace_id, span_id = parse_traceparent(traceparent)
+    assert (span.trace_id, span.parent_id) == (trace_id, span_id)
+    assert (root.trace_id, root.span_id, root.parent_id) == (trace_id, span_id, None)
+    assert exporter.batches[0][1]["duration_ms"] == 2500.0
+
+
+def test_span_error_recorded(tracer, exporter):
+    with pytest.raises(ValueError):
+        with tracer.span("page"):
+            raise ValueError("broken page")
+    tracer.flush()
+    
+    [[span]] = exporter.batches
+    assert span["status"] == "error" and span["error"] == "broken page"
+
+
+def test_pending_spans_bounded(exporter):
+    tracer = Tracer("test", exporter, flush_interval=60, max_batch=2, max_pending=3)
+    tracer._flusher = object()  # Flush manual saja, tanpa background thread
+    for index in range(5):
+        tracer.record_span(f"span-{index}", 1.0, 2.0)
+    assert tracer._dropped == 2
+    tracer.flush()
+    
+    assert [len(batch) for batch in exporter.batches] == [2, 1]
+
+
+def test_export_failure_does_not_raise():
+    class BrokenExporter:
+        def export(self, spans, service_name):
+            raise ConnectionError("collector down")
+    
+    tracer = Tracer("test", BrokenExporter(), flush_interval=60)
+    tracer.record_span("page", 1.0, 2.0)
+    tracer.flush()
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer("master", JsonlSpanExporter(str(path)), flush_interval=60)
+    tracer.record_span("queue_wait", 1.0, 1.5)
+    tracer.record_span("page", 1.5, 2.0)
+    tracer.flush()
+    
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["queue_wait", "page"]
+    assert all(span["service"] == "master" for span in spans)
+
+
+def test_otlp_span_encoding():
+    tracer = Tracer("test")
+    span = tracer.record_span("page", 1.0, 2.0, parent=new_traceparent(), error="failed", page=3, ocr=True, score=0.5)
+    
+    otlp = OtlpHttpSpanExporter("http://localhost:4318/v1/traces")._otlp_span(span)
+    assert otlp["parentSpanId"] == span.parent_id
+    assert otlp["endTimeUnixNano"] == "2000000000"
+    assert otlp["status"] == {"code": 2, "message": "failed"}
+    assert otlp["attributes"] == [
+        {"key": "page", "value": {"intValue": "3"}},
+        {"key": "ocr", "value": {"boolValue": True}},
+        {"key": "score", "value": {"doubleValue": 0.5}},
+    ]
@@ -0,0 +1,71 @@
+import pytest
+
+import master_app.main as master_main
+from shared.config import settings
+from shared.models import PageTask, TaskStatus
+from shared.redis_queue import redis_queue
+
+
+def claim(worker_id, requeue_count=0, job_id="job-1"):
+    """Worker mengambil task dari queue (task in-flight di processing_queue:{worker_id})"""
+    task = PageTask(task_id="task_1", job_id=job_id, page_numbers=[1, 2], pdf_path="/tmp/doc.pdf", requeue_count=requeue_count)
+    redis_queue.requeue_task(task)
+    assert redis_queue.get_task(timeout=1, worker_id=worker_id).task_id == "task_1"
+    return task
+
+
+def kill(worker_id, fake_redis):
+    """Heartbeat expire, registrasi worker masih ada"""
+    fake_redis.delete(f"worker_heartbeat:{worker_id}")
+
+
+@pytest.fixture
+def workers(fake_redis):
+    for worker_id in ("worker_1", "worker_2"):
+        redis_queue.set_worker_heartbeat(worker_id, {"worker_id": worker_id, "status": "busy"}, ttl=30)
+    return fake_redis
+
+
+def test_alive_worker_keeps_its_task(workers):
+    claim("worker_1")
+    
+    assert master_main.requeue_dead_workers() == 0
+    assert workers.llen("processing_queue:worker_1") == 1
+    assert set(redis_queue.get_workers()) == {"worker_1", "worker_2"}
+
+
+def test_dead_worker_task_requeued(workers):
+    claim("worker_1")
+    kill("worker_1", workers)
+    
+    assert redis_queue.get_workers()["worker_1"] is None
+    assert master_main.requeue_dead_workers() == 1
+    
+    assert not workers.exists("processing_queue:worker_1")
+    assert list(redis_queue.get_workers()) == ["worker_2"]
+    task = redis_queue.get_task(timeout=1, worker_id="worker_2")
+    assert task.task_id == "task_1" and task.requeue_count == 1
+
+
+def test_poison_task_fails_its_pages(workers, monkeypatch):
+    monkeypatch.setattr(settings, "max_task_requeues", 2)
+    claim("worker_1", requeue_count=2)
+    kill("worker_1", workers)
+    
+    assert master_main.requeue_dead_workers() == 1
+    assert workers.llen(settings.pdf_processing_queue) == 0
+    result = redis_queue.get_result(timeout=1)
+    assert result.task_id == "task_1" and result.worker_id == "worker_1"
+    assert [page.page_number for page in result.page_results] == [1, 2]
+    assert all(page.status == TaskStatus.FAILED for page in result.page_results)
+    assert "requeued 2 times" in result.page_results[0].error_message
+
+
+def test_cancelled_job_task_dropped(workers):
+    claim("worker_1")
+    redis_queue.cancel_job("job-1")
+    kill("worker_1", workers)
+    
+    assert master_main.requeue_dead_workers() == 1
+    assert workers.llen(settings.pdf_processing_queue) == 0
+    assert redis_queue.get_result(timeout=1) is None
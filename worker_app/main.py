@@ -3,11 +3,13 @@ import time
 import uuid
 import signal
 import sys
+import socket
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional
+import psutil
 import fitz  # PyMuPDF
 import pdfplumber
-import pandas as pd
 import cv2
 import numpy as np
 from PIL import Image
@@ -15,6 +17,10 @@ import pytesseract
 import easyocr
 import io
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
 from datetime import datetime
 
 # 🔧 PIL Compatibility Fix for Pillow 10.0.0+
@@ -34,22 +40,59 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.config import settings
 from shared.models import (
     PageTask, TaskResult, PageResult, ExtractedContent, 
-    ContentType, TaskStatus
+    ContentType, TaskStatus, ExtractionProfile, OCRMode, CompactTextSpans, TextLayout, WorkerHeartbeat,
+    ExtractionLevel, PageAttempt
 )
 from shared.redis_queue import redis_queue
+from shared.tables import normalize_headers
+from shared.knowledge import build_page_knowledge
+from shared.metrics import (
+    StageTimer, observe_stage_timings, worker_registry,
+    STAGE_SECONDS, PAGE_SECONDS, PAGES_PROCESSED, PAGE_CACHE, PAGE_LIMITS, PAGE_EXECUTOR_RECYCLES, PAGE_RETRIES
+)
+from shared.profiling import TaskProfiler, should_profile_task
+from shared.tracing import create_tracer
+from shared.admission import ThroughputTracker
+from prometheus_client import start_http_server
 from loguru import logger
 
 # Configure logging
 logger.add(os.path.join(settings.logs_dir, "worker_app.log"), rotation="500 MB", level=settings.log_level)
 
+# 🔭 Span worker (queue wait, process_task, process_page, push_result)
+tracer = create_tracer("pdf-worker")
+
+# Key stats halaman yang dihitung ke pdf_worker_page_limits_total per (limit, action)
+PAGE_LIMIT_STATS = {
+    ("image_pixels", "downscaled"): ("image_pixels_downscaled",),
+    ("image_pixels", "skipped"): ("ocr_skipped_image_pixels",),
+    ("time_budget", "skipped"): ("ocr_skipped_time_budget", "table_skipped_time_budget"),
+}
+
+class PermanentPageError(Exception):
+    """Error halaman yang tidak akan berubah kalau di-retry (file hilang/rusak, terenkripsi, halaman tidak ada)"""
+
 class PDFExtractor:
     def __init__(self):
         self.worker_id = f"worker_{uuid.uuid4().hex[:8]}"
-        self.easyocr_reader = easyocr.Reader(['en', 'id'])  # English dan Indonesian
+        self._easyocr_reader = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._page_executor: Optional[ProcessPoolExecutor] = None
+        # Level retry halaman gagal; nama level salah langsung error saat worker start
+        self.retry_levels = [ExtractionLevel(level.strip()) for level in settings.page_retry_levels.split(",") if level.strip()]
         
-    def extract_text_content(self, page) -> List[ExtractedContent]:
-        """Extract text content dari halaman"""
-        text_contents = []
+    @property
+    def easyocr_reader(self):
+        """Lazy-load EasyOCR reader, model hanya di-load saat pertama kali ada image yang di-OCR"""
+        if self._easyocr_reader is None:
+            self._easyocr_reader = easyocr.Reader(['en', 'id'])  # English dan Indonesian
+        return self._easyocr_reader
+    
+    def extract_text_spans(self, page) -> CompactTextSpans:
+        """Extract text spans dari halaman dalam encoding kolom"""
+        text_spans = CompactTextSpans()
+        font_ids = {}
         
         try:
             # Extract text blocks dengan posisi
@@ -61,29 +104,206 @@ class PDFExtractor:
                         for span in line["spans"]:
                             text = span["text"].strip()
                             if text and len(text) > 2:  # Filter text pendek
-                                bbox = span["bbox"]  # [x0, y0, x1, y1]
+                                font = span.get("font", "")
+                                if font not in font_ids:
+                                    font_ids[font] = len(text_spans.fonts)
+                                    text_spans.fonts.append(font)
                                 
-                                content = ExtractedContent(
-                                    content_type=ContentType.TEXT,
-                                    content=text,
-                                    bbox=list(bbox),
-                                    confidence=1.0,  # Native text memiliki confidence tinggi
-                                    metadata={
-                                        "font": span.get("font", ""),
-                                        "size": span.get("size", 0),
-                                        "flags": span.get("flags", 0)
-                                    }
-                                )
-                                text_contents.append(content)
+                                text_spans.text.append(text)
+                                text_spans.bbox.extend(span["bbox"])  # [x0, y0, x1, y1]
+                                text_spans.font_id.append(font_ids[font])
+                                text_spans.size.append(span.get("size", 0))
+                                text_spans.flags.append(span.get("flags", 0))
                                 
         except Exception as e:
             logger.error(f"Error extracting text: {e}")
             
-        return text_contents
+        return text_spans
+    
+    def extract_text_blocks(self, page) -> CompactTextSpans:
+        """Extract text per block: span digabung menjadi line dan block dalam reading order"""
+        text_blocks = CompactTextSpans()
+        font_ids = {}
+        
+        try:
+            # Pecah setiap line menjadi segment di gap horizontal yang lebar (gutter antar kolom),
+            # karena PyMuPDF kadang menggabungkan line sejajar dari kolom berbeda
+            segments = []
+            for block in page.get_text("dict").get("blocks", []):
+                for line in block.get("lines", []):
+                    segment = None
+                    for span in line["spans"]:
+                        if not span["text"].strip():
+                            continue
+                        gap_limit = max(span.get("size", 0) * 2, 15)
+                        if segment is None or span["bbox"][0] - segment["bbox"][2] > gap_limit:
+                            segment = {"bbox": list(span["bbox"]), "text": "", "styles": {}}
+                            segments.append(segment)
+                        segment["text"] += span["text"]
+                        segment["bbox"] = [
+                            min(segment["bbox"][0], span["bbox"][0]), min(segment["bbox"][1], span["bbox"][1]),
+                            max(segment["bbox"][2], span["bbox"][2]), max(segment["bbox"][3], span["bbox"][3])
+                        ]
+                        span_style = (span.get("font", ""), span.get("size", 0), span.get("flags", 0))
+                        segment["styles"][span_style] = segment["styles"].get(span_style, 0) + len(span["text"])
+            
+            for block in self._merge_segments(self._order_segments(segments, page.rect.width)):
+                font, size, flags = max(block["styles"], key=block["styles"].get)
+                if font not in font_ids:
+                    font_ids[font] = len(text_blocks.fonts)
+                    text_blocks.fonts.append(font)
+                
+                text_blocks.text.append(block["text"])
+                text_blocks.bbox.extend(block["bbox"])
+                text_blocks.font_id.append(font_ids[font])
+                text_blocks.size.append(size)
+                text_blocks.flags.append(flags)
+                
+        except Exception as e:
+            logger.error(f"Error extracting text blocks: {e}")
+            
+        return text_blocks
+    
+    def _order_segments(self, segments: List[dict], page_width: float) -> List[dict]:
+        """Urutkan line segment dalam reading order dengan column detection dari clustering bbox
+        
+        Rentang x semua segment diakumulasi menjadi histogram coverage. Rentang yang jarang
+        tertutup segment (di bawah 10% dari puncak) dianggap gutter, rentang di antaranya
+        dianggap kolom. Segment yang melintasi gutter (heading, paragraf full-width) memotong
+        halaman menjadi band; di dalam setiap band segment dibaca per kolom dari kiri ke kanan,
+        lalu dari atas ke bawah. Setiap segment diberi "column" (None untuk segment lebar).
+        """
+        bin_size = 4.0
+        bin_count = int(page_width // bin_size) + 2
+        coverage_delta = [0] * (bin_count + 1)
+        for segment in segments:
+            first_bin = max(0, min(bin_count - 1, int(segment["bbox"][0] // bin_size)))
+            last_bin = max(0, min(bin_count - 1, int(segment["bbox"][2] // bin_size)))
+            coverage_delta[first_bin] += 1
+            coverage_delta[last_bin + 1] -= 1
+        
+        columns = []
+        coverage = 0
+        peak = 0
+        coverage_bins = []
+        for delta in coverage_delta[:bin_count]:
+            coverage += delta
+            coverage_bins.append(coverage)
+            peak = max(peak, coverage)
+        
+        threshold = max(1, peak * 0.1)
+        for index, bin_coverage in enumerate(coverage_bins):
+            if bin_coverage > threshold:
+                if columns and columns[-1][1] == index * bin_size:
+                    columns[-1][1] = (index + 1) * bin_size
+                else:
+                    columns.append([index * bin_size, (index + 1) * bin_size])
+        
+        for segment in segments:
+            segment["column"] = None
+            for index, (col_x0, col_x1) in enumerate(columns):
+                if segment["bbox"][0] >= col_x0 - bin_size and segment["bbox"][2] <= col_x1 + bin_size:
+                    segment["column"] = index
+                    break
+        
+        ordered = []
+        band = []
+        for segment in sorted(segments, key=lambda item: (item["bbox"][1], item["bbox"][0])):
+            if segment["column"] is None:
+                ordered.extend(sorted(band, key=lambda item: (item["column"], item["bbox"][1])))
+                band = []
+                ordered.append(segment)
+            else:
+                band.append(segment)
+        ordered.extend(sorted(band, key=lambda item: (item["column"], item["bbox"][1])))
+        
+        return ordered
+    
+    def _merge_segments(self, ordered_segments: List[dict]) -> List[dict]:
+        """Gabungkan segment berurutan di kolom yang sama dan berdekatan secara vertikal menjadi block"""
+        blocks = []
+        
+        for segment in ordered_segments:
+            text = " ".join(segment["text"].split())
+            previous = blocks[-1] if blocks else None
+            line_height = segment["bbox"][3] - segment["bbox"][1]
+            
+            if (
+                previous is not None
+                and previous["column"] == segment["column"]
+                and -line_height * 0.5 <= segment["bbox"][1] - previous["last_bottom"] <= line_height * 0.8
+            ):
+                # Gabungkan kata yang terpotong hyphen di akhir line
+                if previous["text"].endswith("-") and text[:1].islower():
+                    previous["text"] = previous["text"][:-1] + text
+                else:
+                    previous["text"] += " " + text
+                previous["bbox"] = [
+                    min(previous["bbox"][0], segment["bbox"][0]), min(previous["bbox"][1], segment["bbox"][1]),
+                    max(previous["bbox"][2], segment["bbox"][2]), max(previous["bbox"][3], segment["bbox"][3])
+                ]
+                previous["last_bottom"] = segment["bbox"][3]
+                for style, chars in segment["styles"].items():
+                    previous["styles"][style] = previous["styles"].get(style, 0) + chars
+            else:
+                blocks.append({
+                    "text": text,
+                    "bbox": list(segment["bbox"]),
+                    "column": segment["column"],
+                    "last_bottom": segment["bbox"][3],
+                    "styles": dict(segment["styles"])
+                })
+        
+        return blocks
+    
+    def extract_text_content(self, page) -> List[ExtractedContent]:
+        """Extract text content dari halaman"""
+        return self.extract_text_spans(page).to_contents()
+    
+    def page_may_contain_table(self, page) -> bool:
+        """Pre-filter murah untuk table detection pakai vector drawings dari PyMuPDF
+        
+        pdfplumber find_tables() (strategy default "lines") hanya bisa menemukan table
+        dari garis dan sisi rect. Halaman tanpa minimal 3 garis horizontal (header + 1 row)
+        dan 2 garis vertical tidak mungkin menghasilkan table, jadi pdfplumber bisa di-skip.
+        """
+        tolerance = 1.0
+        horizontal_edges = 0
+        vertical_edges = 0
+        
+        for drawing in page.get_cdrawings():
+            for item in drawing["items"]:
+                kind = item[0]
+                if kind == "l":
+                    (x0, y0), (x1, y1) = item[1], item[2]
+                    if abs(y0 - y1) <= tolerance:
+                        horizontal_edges += 1
+                    elif abs(x0 - x1) <= tolerance:
+                        vertical_edges += 1
+                elif kind == "re":
+                    x0, y0, x1, y1 = item[1]
+                    if abs(y1 - y0) <= tolerance:
+                        horizontal_edges += 1  # Rect tipis dipakai sebagai garis horizontal
+                    elif abs(x1 - x0) <= tolerance:
+                        vertical_edges += 1
+                    else:
+                        horizontal_edges += 2
+                        vertical_edges += 2
+                elif kind == "qu":
+                    horizontal_edges += 2
+                    vertical_edges += 2
+            
+            if horizontal_edges >= 3 and vertical_edges >= 2:
+                return True
+        
+        return False
     
-    def extract_table_content(self, pdf_path: str, page_number: int) -> List[ExtractedContent]:
-        """Extract table content dari halaman"""
+    def extract_table_content(
+        self, pdf_path: str, page_number: int, stats: Optional[Dict[str, int]] = None
+    ) -> List[ExtractedContent]:
+        """Extract table content dari halaman; table yang error di-skip dan dihitung di stats["table_errors"]"""
         table_contents = []
+        stats = stats if stats is not None else {}
         
         try:
             # Gunakan pdfplumber untuk table extraction
@@ -100,9 +320,9 @@ class PDFExtractor:
                             table_data = table.extract()
                             if table_data and len(table_data) > 1:  # Minimal header + 1 row
                                 
-                                # Convert ke format yang lebih mudah dibaca
-                                df = pd.DataFrame(table_data[1:], columns=table_data[0])
-                                table_dict = df.to_dict('records')
+                                # Header unik dan non-empty; records ("data") dibuat master hanya saat diminta
+                                headers = normalize_headers(table_data[0])
+                                rows = table_data[1:]
                                 
                                 # Get table bounds
                                 bbox = table.bbox  # [x0, y0, x1, y1]
@@ -111,11 +331,10 @@ class PDFExtractor:
                                     content_type=ContentType.TABLE,
                                     content={
                                         "table_id": f"table_{i+1}",
-                                        "headers": table_data[0],
-                                        "rows": table_data[1:],
-                                        "data": table_dict,
-                                        "row_count": len(table_data) - 1,
-                                        "col_count": len(table_data[0]) if table_data[0] else 0
+                                        "headers": headers,
+                                        "rows": rows,
+                                        "row_count": len(rows),
+                                        "col_count": len(headers)
                                     },
                                     bbox=list(bbox),
                                     confidence=0.9,
@@ -128,222 +347,342 @@ class PDFExtractor:
                                 
                         except Exception as e:
                             logger.error(f"Error processing table {i}: {e}")
+                            stats["table_errors"] = stats.get("table_errors", 0) + 1
                             
         except Exception as e:
             logger.error(f"Error extracting tables: {e}")
+            stats["table_errors"] = stats.get("table_errors", 0) + 1
             
         return table_contents
     
-    def extract_image_content(self, page) -> List[ExtractedContent]:
-        """Extract images dan text dari images"""
+    def _ocr_scale(self, width: int, height: int, img_rect, dpi: Optional[int]) -> float:
+        """Faktor downscale image sebelum OCR: batas DPI profile dan MAX_IMAGE_PIXELS"""
+        scale = 1.0
+        if dpi and img_rect and img_rect.width > 0:
+            effective_dpi = width / (img_rect.width / 72)
+            scale = min(scale, dpi / effective_dpi)
+        if settings.max_image_pixels and width * height > settings.max_image_pixels:
+            scale = min(scale, (settings.max_image_pixels / (width * height)) ** 0.5)
+        return scale
+    
+    def _pixmap_to_array(self, pix) -> np.ndarray:
+        """Pixmap -> array untuk OCR langsung dari samples, tanpa encode PNG dan copy PIL"""
+        if pix.colorspace and pix.colorspace.n > 3:  # CMYK
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # Drop alpha channel
+        samples = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        if pix.n == 1:
+            return samples[:, :, 0].copy()  # Grayscale diterima EasyOCR apa adanya
+        return cv2.cvtColor(samples, cv2.COLOR_RGB2BGR)
+    
+    def _load_ocr_image(self, page, xref: int, width: int, height: int, img_rect, dpi: Optional[int]) -> Optional[np.ndarray]:
+        """Decode image untuk OCR; image yang perlu di-downscale di-render langsung di resolusi target
+        
+        Return None kalau image terlalu besar dan tidak punya posisi di halaman untuk di-render.
+        """
+        scale = self._ocr_scale(width, height, img_rect, dpi)
+        if scale < 1:
+            if not img_rect or img_rect.is_empty:
+                return None
+            # Render area image di halaman dengan zoom yang menghasilkan width * scale pixel,
+            # jadi tidak ada buffer full-resolution selain decode di MuPDF sendiri
+            zoom = scale * width / img_rect.width
+            if settings.max_image_pixels:
+                # Area render mengikuti rect di halaman, aspect ratio-nya bisa beda dengan image
+                zoom = min(zoom, (settings.max_image_pixels / (img_rect.width * img_rect.height)) ** 0.5)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=img_rect, alpha=False)
+        else:
+            pix = fitz.Pixmap(page.parent, xref)
+        return self._pixmap_to_array(pix)
+    
+    def extract_image_content(
+        self,
+        page,
+        run_ocr: bool = True,
+        dpi: Optional[int] = None,
+        timer: Optional[StageTimer] = None,
+        stats: Optional[Dict[str, int]] = None,
+        deadline: Optional[float] = None
+    ) -> List[ExtractedContent]:
+        """Extract images dan text dari images; timer, stats dan deadline (time budget halaman) optional
+        
+        Image yang gagal di-decode/OCR di-skip dan dihitung di stats["image_errors"], halaman tetap completed.
+        """
         image_contents = []
+        stats = stats if stats is not None else {}
         
         try:
-            # Get images dari halaman
-            image_list = page.get_images()
+            # Get images dari halaman; ukuran dibaca dari metadata image, tanpa decode
+            image_list = page.get_images(full=True)
             
             for img_index, img in enumerate(image_list):
                 try:
-                    # Extract image
-                    xref = img[0]
-                    pix = fitz.Pixmap(page.parent, xref)
+                    xref, width, height = img[0], img[2], img[3]
                     
-                    if pix.n - pix.alpha < 4:  # GRAY or RGB
-                        # Convert ke PIL Image
-                        img_data = pix.tobytes("png")
-                        pil_image = Image.open(io.BytesIO(img_data))
-                        
-                        # Get image bounds (approximate)
-                        img_rect = page.get_image_rects(img)[0] if page.get_image_rects(img) else None
-                        bbox = list(img_rect) if img_rect else None
-                        
-                        # Convert ke numpy array untuk OCR
-                        cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-                        
-                        # OCR dengan EasyOCR
-                        ocr_results = self.easyocr_reader.readtext(cv_image)
-                        
-                        extracted_text = []
-                        total_confidence = 0
-                        
-                        for (box, text, confidence) in ocr_results:
-                            if confidence > 0.5 and len(text.strip()) > 2:
-                                extracted_text.append({
-                                    "text": text.strip(),
-                                    "confidence": confidence,
-                                    "bbox": box
-                                })
-                                total_confidence += confidence
-                        
-                        avg_confidence = total_confidence / len(ocr_results) if ocr_results else 0
-                        
-                        # Save image info
-                        content = ExtractedContent(
-                            content_type=ContentType.IMAGE,
-                            content={
-                                "image_id": f"image_{img_index+1}",
-                                "width": pix.width,
-                                "height": pix.height,
-                                "extracted_text": extracted_text,
-                                "text_summary": " ".join([item["text"] for item in extracted_text]),
-                                "has_text": len(extracted_text) > 0
-                            },
-                            bbox=bbox,
-                            confidence=avg_confidence,
-                            metadata={
-                                "extraction_method": "easyocr",
-                                "image_index": img_index,
-                                "total_text_elements": len(extracted_text)
-                            }
-                        )
-                        image_contents.append(content)
+                    # Get image bounds (posisi pertama); get_image_rects men-decode image untuk hash, ini tidak
+                    try:
+                        img_rect = page.get_image_bbox(img)
+                    except ValueError as e:
+                        # Image tidak ditampilkan di halaman, posisi tidak diketahui
+                        logger.warning(f"No bbox for image {img_index}: {e}")
+                        img_rect = None
+                    if img_rect is not None and (img_rect.is_infinite or img_rect.is_empty):
+                        img_rect = None
+                    bbox = list(img_rect) if img_rect else None
+                    
+                    ocr_results = []
+                    ocr_skipped = None
+                    ocr_scale = None
+                    if run_ocr and deadline and time.time() > deadline:
+                        # Soft time budget habis: image sisanya dilaporkan tanpa OCR
+                        ocr_skipped = "time_budget"
+                    elif run_ocr:
+                        with timer.stage("ocr") if timer else nullcontext():
+                            cv_image = self._load_ocr_image(page, xref, width, height, img_rect, dpi)
+                            if cv_image is not None:
+                                # OCR dengan EasyOCR
+                                ocr_results = self.easyocr_reader.readtext(cv_image)
+                    
+                        if cv_image is None:
+                            ocr_skipped = "image_pixels"
+                        else:
+                            stats["ocr_images"] = stats.get("ocr_images", 0) + 1
+                            stats["ocr_pixels"] = stats.get("ocr_pixels", 0) + cv_image.shape[0] * cv_image.shape[1]
+                            if cv_image.shape[1] < width:
+                                ocr_scale = round(cv_image.shape[1] / width, 4)
+                                stats["downscaled_images"] = stats.get("downscaled_images", 0) + 1
+                            cv_image = None  # Cleanup sebelum image berikutnya di-decode
+                    
+                    if ocr_skipped:
+                        stats[f"ocr_skipped_{ocr_skipped}"] = stats.get(f"ocr_skipped_{ocr_skipped}", 0) + 1
+                    elif ocr_scale and settings.max_image_pixels and width * height > settings.max_image_pixels:
+                        stats["image_pixels_downscaled"] = stats.get("image_pixels_downscaled", 0) + 1
+                    
+                    extracted_text = []
+                    total_confidence = 0
                     
-                    pix = None  # Cleanup
+                    for (box, text, confidence) in ocr_results:
+                        if confidence > 0.5 and len(text.strip()) > 2:
+                            extracted_text.append({
+                                "text": text.strip(),
+                                "confidence": confidence,
+                                "bbox": box
+                            })
+                            total_confidence += confidence
+                    
+                    avg_confidence = total_confidence / len(ocr_results) if ocr_results else 0
+                    
+                    metadata = {
+                        "extraction_method": "easyocr" if run_ocr and not ocr_skipped else "none",
+                        "image_index": img_index,
+                        "total_text_elements": len(extracted_text)
+                    }
+                    if ocr_scale:
+                        metadata["ocr_scale"] = ocr_scale
+                    if ocr_skipped:
+                        metadata["ocr_skipped"] = ocr_skipped
+                    
+                    # Save image info
+                    content = ExtractedContent(
+                        content_type=ContentType.IMAGE,
+                        content={
+                            "image_id": f"image_{img_index+1}",
+                            "width": width,
+                            "height": height,
+                            "extracted_text": extracted_text,
+                            "text_summary": " ".join([item["text"] for item in extracted_text]),
+                            "has_text": len(extracted_text) > 0
+                        },
+                        bbox=bbox,
+                        confidence=avg_confidence,
+                        metadata=metadata
+                    )
+                    image_contents.append(content)
                     
                 except Exception as e:
                     logger.error(f"Error processing image {img_index}: {e}")
+                    stats["image_errors"] = stats.get("image_errors", 0) + 1
                     
         except Exception as e:
             logger.error(f"Error extracting images: {e}")
+            stats["image_errors"] = stats.get("image_errors", 0) + 1
             
         return image_contents
     
-    def aggregate_knowledge_from_content(self, content_list: List[ExtractedContent]) -> str:
-        """Aggregate all extracted content into a single knowledge string for RAG"""
-        knowledge_parts = []
-        
-        # Group content by type for better organization
-        text_parts = []
-        table_parts = []
-        image_parts = []
-        
-        for content in content_list:
-            if content.content_type == ContentType.TEXT:
-                if isinstance(content.content, str) and content.content.strip():
-                    text_parts.append(content.content.strip())
-                    
-            elif content.content_type == ContentType.TABLE:
-                if isinstance(content.content, dict):
-                    table_data = content.content
-                    
-                    # Extract table as readable text
-                    if "headers" in table_data and "rows" in table_data:
-                        headers = table_data["headers"]
-                        rows = table_data["rows"]
-                        
-                        # Format table as text
-                        table_text = f"Table: {table_data.get('table_id', 'Unknown')}\n"
-                        if headers:
-                            table_text += " | ".join(str(h) for h in headers) + "\n"
-                            table_text += "-" * (len(" | ".join(str(h) for h in headers))) + "\n"
-                            
-                        for row in rows:
-                            if row:
-                                table_text += " | ".join(str(cell) for cell in row) + "\n"
-                                
-                        table_parts.append(table_text.strip())
-                        
-            elif content.content_type == ContentType.IMAGE:
-                if isinstance(content.content, dict):
-                    image_data = content.content
-                    
-                    # Extract text from image OCR results
-                    if "text_summary" in image_data and image_data["text_summary"]:
-                        image_text = f"Image {image_data.get('image_id', 'Unknown')} Text: {image_data['text_summary']}"
-                        image_parts.append(image_text)
-                        
-                    # Also include detailed extracted text if available
-                    elif "extracted_text" in image_data and image_data["extracted_text"]:
-                        extracted_texts = []
-                        for text_item in image_data["extracted_text"]:
-                            if isinstance(text_item, dict) and "text" in text_item:
-                                extracted_texts.append(text_item["text"])
-                        
-                        if extracted_texts:
-                            image_text = f"Image {image_data.get('image_id', 'Unknown')} Text: {' '.join(extracted_texts)}"
-                            image_parts.append(image_text)
+    def extract_rasterized_text(
+        self, page, dpi: Optional[int] = None, stats: Optional[Dict[str, int]] = None
+    ) -> List[ExtractedContent]:
+        """Render halaman jadi satu image dan OCR (fallback kalau native text/image/table gagal)"""
+        stats = stats if stats is not None else {}
+        page_rect = page.rect
+        zoom = (dpi or settings.page_retry_rasterize_dpi) / 72
+        if settings.max_image_pixels:
+            zoom = min(zoom, (settings.max_image_pixels / (page_rect.width * page_rect.height)) ** 0.5)
         
-        # Combine all parts with clear separation
-        if text_parts:
-            knowledge_parts.append("TEXT CONTENT:\n" + "\n".join(text_parts))
-            
-        if table_parts:
-            knowledge_parts.append("TABLE CONTENT:\n" + "\n\n".join(table_parts))
-            
-        if image_parts:
-            knowledge_parts.append("IMAGE TEXT CONTENT:\n" + "\n".join(image_parts))
-        
-        # Join all parts
-        knowledge = "\n\n".join(knowledge_parts)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        cv_image = self._pixmap_to_array(pix)
+        pix = None
+        stats["ocr_pixels"] = stats.get("ocr_pixels", 0) + cv_image.shape[0] * cv_image.shape[1]
+        ocr_results = self.easyocr_reader.readtext(cv_image)
+        cv_image = None
         
-        # Clean up and normalize text
-        knowledge = self._clean_knowledge_text(knowledge)
-        
-        return knowledge
+        text_contents = []
+        for (box, text, confidence) in ocr_results:
+            if confidence > 0.5 and len(text.strip()) > 2:
+                # Koordinat pixel render -> koordinat halaman (point)
+                xs = [float(point[0]) for point in box]
+                ys = [float(point[1]) for point in box]
+                text_contents.append(ExtractedContent(
+                    content_type=ContentType.TEXT,
+                    content=text.strip(),
+                    bbox=[
+                        page_rect.x0 + min(xs) / zoom, page_rect.y0 + min(ys) / zoom,
+                        page_rect.x0 + max(xs) / zoom, page_rect.y0 + max(ys) / zoom
+                    ],
+                    confidence=float(confidence),
+                    metadata={"extraction_method": "rasterized_ocr", "dpi": round(zoom * 72)}
+                ))
+        return text_contents
     
-    def _clean_knowledge_text(self, text: str) -> str:
-        """Clean and normalize knowledge text"""
-        import re
-        
-        # Remove extra whitespaces and normalize line breaks
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        
-        # Remove very short fragments (likely noise)
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if len(line) > 2:  # Keep lines with more than 2 characters
-                cleaned_lines.append(line)
+    def aggregate_knowledge_from_content(
+        self,
+        content_list: List[ExtractedContent],
+        text_spans: Optional[CompactTextSpans] = None
+    ) -> str:
+        """Aggregate all extracted content into a single knowledge string for RAG"""
+        return build_page_knowledge(content_list, text_spans)
+    
+    def _should_run_ocr(self, page, profile: ExtractionProfile, text_spans: Optional[CompactTextSpans]) -> bool:
+        """Tentukan apakah image di halaman perlu di-OCR berdasarkan profile"""
+        if profile.ocr == OCRMode.ON:
+            return True
+        if profile.ocr == OCRMode.OFF:
+            return False
         
-        return '\n'.join(cleaned_lines).strip()
+        # Mode auto: OCR hanya kalau native text di halaman minim (misal hasil scan)
+        if text_spans is not None:
+            native_chars = sum(len(text) for text in text_spans.text)
+        else:
+            native_chars = len(page.get_text("text").strip())
+        return native_chars < settings.ocr_auto_min_text_chars
     
-    def process_page(self, pdf_path: str, page_number: int) -> PageResult:
-        """Process single page dan extract semua content"""
+    def process_page(
+        self,
+        pdf_path: str,
+        page_number: int,
+        profile: Optional[ExtractionProfile] = None,
+        observe: bool = True
+    ) -> PageResult:
+        """Process single page dan extract content sesuai extraction profile
+        
+        observe=False: metrics dan span tidak dicatat di sini (process executor, dicatat parent dari timings).
+        """
         start_time = time.time()
+        profile = profile or ExtractionProfile()
+        timer = StageTimer()
+        stats = {}
+        # Soft time budget: stage berat (table, OCR) di-skip setelah lewat, stage yang sedang jalan tidak diinterupsi
+        deadline = start_time + settings.page_time_budget if settings.page_time_budget > 0 else None
         
         try:
             # Open PDF
-            doc = fitz.open(pdf_path)
-            page = doc[page_number - 1]  # Convert to 0-indexed
+            with timer.stage("open"):
+                if not os.path.isfile(pdf_path):
+                    raise PermanentPageError(f"PDF not found: {pdf_path}")
+                try:
+                    doc = fitz.open(pdf_path)
+                except fitz.FileDataError as e:
+                    raise PermanentPageError(f"Cannot open PDF: {e}") from e
+                if doc.needs_pass:
+                    doc.close()
+                    raise PermanentPageError("PDF is encrypted")
+                if not 1 <= page_number <= doc.page_count:
+                    page_count = doc.page_count
+                    doc.close()
+                    raise PermanentPageError(f"Page {page_number} out of range (document has {page_count} pages)")
+                page = doc[page_number - 1]  # Convert to 0-indexed
             
             all_content = []
+            text_spans = None
             
             # Extract text content
-            text_content = self.extract_text_content(page)
-            all_content.extend(text_content)
-            logger.info(f"Extracted {len(text_content)} text elements from page {page_number}")
+            if profile.wants(ContentType.TEXT) and profile.rasterize:
+                with timer.stage("ocr"):
+                    rasterized_content = self.extract_rasterized_text(page, dpi=profile.dpi, stats=stats)
+                all_content.extend(rasterized_content)
+                stats["rasterized_text"] = len(rasterized_content)
+                logger.info(f"Extracted {len(rasterized_content)} OCR text elements from rasterized page {page_number}")
+            elif profile.wants(ContentType.TEXT):
+                with timer.stage("text"):
+                    if profile.text_layout == TextLayout.BLOCKS:
+                        text_spans = self.extract_text_blocks(page)
+                    else:
+                        text_spans = self.extract_text_spans(page)
+                stats["text_spans"] = len(text_spans)
+                logger.info(f"Extracted {len(text_spans)} text elements from page {page_number}")
             
             # Extract table content
-            table_content = self.extract_table_content(pdf_path, page_number)
-            all_content.extend(table_content)
-            logger.info(f"Extracted {len(table_content)} tables from page {page_number}")
+            if profile.wants(ContentType.TABLE) and deadline and time.time() > deadline:
+                stats["table_skipped_time_budget"] = 1
+                logger.warning(f"Skipped table extraction for page {page_number}: time budget of {settings.page_time_budget}s exceeded")
+            elif profile.wants(ContentType.TABLE):
+                with timer.stage("table"):
+                    if not settings.table_prefilter or self.page_may_contain_table(page):
+                        table_content = self.extract_table_content(pdf_path, page_number, stats)
+                        all_content.extend(table_content)
+                        stats["tables"] = len(table_content)
+                        logger.info(f"Extracted {len(table_content)} tables from page {page_number}")
+                    else:
+                        stats["table_prefilter_skipped"] = 1
+                        logger.info(f"Skipped table extraction for page {page_number}: no ruling lines")
+                logger.info(f"Table stage for page {page_number} took {timer.timings['table']:.3f}s")
             
-            # Extract image content
-            image_content = self.extract_image_content(page)
-            all_content.extend(image_content)
-            logger.info(f"Extracted {len(image_content)} images from page {page_number}")
+            # Extract image content (OCR dicatat sebagai stage sendiri)
+            if profile.wants(ContentType.IMAGE):
+                with timer.stage("image"):
+                    run_ocr = self._should_run_ocr(page, profile, text_spans)
+                    image_content = self.extract_image_content(
+                        page, run_ocr=run_ocr, dpi=profile.dpi, timer=timer, stats=stats, deadline=deadline
+                    )
+                all_content.extend(image_content)
+                stats["images"] = len(image_content)
+                logger.info(f"Extracted {len(image_content)} images from page {page_number} (ocr={run_ocr})")
             
             doc.close()
             
             # 🤖 Aggregate knowledge for RAG
-            knowledge = self.aggregate_knowledge_from_content(all_content)
+            with timer.stage("knowledge"):
+                knowledge = self.aggregate_knowledge_from_content(all_content, text_spans)
+            stats["knowledge_chars"] = len(knowledge)
             logger.info(f"Generated {len(knowledge)} characters of knowledge for page {page_number}")
             
+            # Text spans dikirim dalam encoding kolom, atau di-expand kalau compact disable
+            if text_spans is not None and not settings.compact_text_spans:
+                all_content = text_spans.to_contents() + all_content
+                text_spans = None
+            
             processing_time = time.time() - start_time
+            if observe:
+                self._record_page_metrics(timer.timings, processing_time, TaskStatus.COMPLETED, stats)
+                self._record_page_span(page_number, start_time, timer.timings, TaskStatus.COMPLETED)
             
             return PageResult(
                 page_number=page_number,
                 content=all_content,
+                text_spans=text_spans,
                 knowledge=knowledge,  # 🆕 New aggregated knowledge field
                 processing_time=processing_time,
-                status=TaskStatus.COMPLETED
+                status=TaskStatus.COMPLETED,
+                timings=timer.timings,
+                stats=stats
             )
             
         except Exception as e:
             processing_time = time.time() - start_time
+            if observe:
+                self._record_page_metrics(timer.timings, processing_time, TaskStatus.FAILED, stats)
+                self._record_page_span(page_number, start_time, timer.timings, TaskStatus.FAILED, str(e))
             logger.error(f"Error processing page {page_number}: {e}")
             
             return PageResult(
@@ -352,21 +691,225 @@ class PDFExtractor:
                 knowledge="",  # 🆕 Empty knowledge for failed pages
                 processing_time=processing_time,
                 status=TaskStatus.FAILED,
-                error_message=str(e)
+                error_message=str(e),
+                timings=timer.timings,
+                stats=stats,
+                retryable=not isinstance(e, PermanentPageError)
+            )
+    
+    def _record_page_metrics(
+        self, timings: Dict[str, float], processing_time: float, status: TaskStatus, stats: Optional[Dict[str, int]] = None
+    ):
+        """Update Prometheus metrics worker untuk satu halaman
+        
+        Limit yang kena dihitung dari stats halaman, jadi halaman dari process executor juga tercatat di sini.
+        """
+        observe_stage_timings(timings)
+        PAGE_SECONDS.observe(processing_time)
+        PAGES_PROCESSED.labels(status.value).inc()
+        stats = stats or {}
+        for (limit, action), keys in PAGE_LIMIT_STATS.items():
+            count = sum(stats.get(key, 0) for key in keys)
+            if count:
+                PAGE_LIMITS.labels(limit, action).inc(count)
+    
+    def _record_page_span(
+        self, page_number: int, start_time: float, timings: Dict[str, float], status: TaskStatus, error: Optional[str] = None
+    ):
+        """Span process_page (child dari span task aktif) dengan waktu per stage sebagai attribute"""
+        tracer.record_span(
+            "process_page", start_time, time.time(), error=error,
+            page_number=page_number, status=status.value,
+            **{f"stage.{stage}_seconds": round(seconds, 6) for stage, seconds in timings.items()}
+        )
+    
+    def page_executor(self) -> ProcessPoolExecutor:
+        """Process executor (spawn, satu process) untuk halaman; di-warm up supaya startup tidak ikut PAGE_TIMEOUT"""
+        if self._page_executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_page_process
+            )
+            executor.submit(os.getpid).result()
+            self._page_executor = executor
+        return self._page_executor
+    
+    def recycle_page_executor(self, reason: str):
+        """Kill process executor (halaman yang hang tidak bisa di-cancel); executor baru dibuat saat halaman berikutnya"""
+        executor, self._page_executor = self._page_executor, None
+        if executor is None:
+            return
+        PAGE_EXECUTOR_RECYCLES.labels(reason).inc()
+        if _kill_executor_processes(executor):
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            # Process yang hang dibiarkan selesai sendiri, worker tidak ikut menunggu
+            logger.warning("Cannot kill page executor processes, shutting down without waiting")
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self):
+        """Hentikan process executor halaman (kalau ada)"""
+        executor, self._page_executor = self._page_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def run_page(
+        self, pdf_path: str, page_number: int, profile: ExtractionProfile, isolate: bool = True, timeout: Optional[float] = None
+    ) -> PageResult:
+        """process_page dengan batas timeout (default PAGE_TIMEOUT) di process terpisah, atau inline (isolate=False / timeout 0)"""
+        timeout = settings.page_timeout if timeout is None else timeout
+        if not isolate or timeout <= 0:
+            return self.process_page(pdf_path, page_number, profile)
+        
+        start_time = time.time()
+        error = None
+        try:
+            future = self.page_executor().submit(_process_page_isolated, pdf_path, page_number, profile)
+            page_result = future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            self.recycle_page_executor("timeout")
+            error = f"Page processing timed out after {timeout}s"
+        except BrokenProcessPool:
+            # Process executor mati di tengah halaman (misal OOM-kill atau segfault di native library)
+            self.recycle_page_executor("crashed")
+            error = "Page processing process crashed"
+        
+        if error:
+            logger.error(f"{error} (page {page_number})")
+            page_result = PageResult(
+                page_number=page_number,
+                content=[],
+                processing_time=time.time() - start_time,
+                status=TaskStatus.FAILED,
+                error_message=error,
+                stats={"timeout": 1} if "timed out" in error else {}
             )
+        
+        # Metrics dan span dicatat di process ini dari timing yang dikirim balik process executor
+        self._record_page_metrics(page_result.timings, page_result.processing_time, page_result.status, page_result.stats)
+        self._record_page_span(page_number, start_time, page_result.timings, page_result.status, page_result.error_message)
+        return page_result
     
-    def process_task(self, task: PageTask) -> TaskResult:
-        """Process task dari queue"""
+    def extraction_attempts(self, profile: ExtractionProfile) -> List[tuple]:
+        """Urutan (level, profile) attempt halaman: full lalu PAGE_RETRY_LEVELS, level yang hasilnya sama di-skip"""
+        attempts = []
+        for level in [ExtractionLevel.FULL] + self.retry_levels:
+            degraded = profile.degrade(level, settings.page_retry_rasterize_dpi)
+            if attempts and degraded.cache_key() == attempts[-1][1].cache_key():
+                continue
+            attempts.append((level, degraded))
+        return attempts[:max(settings.page_max_attempts, 1)]
+    
+    def run_page_with_retry(self, task: PageTask, page_number: int, isolate: bool = True) -> PageResult:
+        """run_page dengan retry (exponential backoff) di level ekstraksi yang makin ringan sampai ada yang berhasil
+        
+        Level diurutkan dari hasil terbaik, jadi attempt sukses pertama yang dipakai dan retry berhenti di situ.
+        """
+        start_time = time.time()
+        attempts = []
+        for attempt_index, (level, profile) in enumerate(self.extraction_attempts(task.extraction_profile)):
+            if attempt_index > 0:
+                if redis_queue.is_job_cancelled(task.job_id):
+                    break
+                backoff = min(settings.page_retry_backoff * 2 ** (attempt_index - 1), settings.page_retry_backoff_max)
+                logger.warning(f"Retrying page {page_number} at level {level.value} in {backoff:.1f}s (attempt {attempt_index + 1})")
+                time.sleep(backoff)
+            
+            timeout = settings.page_timeout if attempt_index == 0 else settings.page_retry_timeout
+            page_result = self.run_page(task.pdf_path, page_number, profile, isolate, timeout)
+            if attempt_index > 0:
+                PAGE_RETRIES.labels(level.value, page_result.status.value).inc()
+            attempts.append(PageAttempt(
+                level=level,
+                status=page_result.status,
+                processing_time=page_result.processing_time,
+                error_message=page_result.error_message
+            ))
+            if page_result.status == TaskStatus.COMPLETED:
+                break
+            if not page_result.retryable:
+                # File hilang/rusak/terenkripsi atau halaman tidak ada: level lain juga pasti gagal
+                logger.error(f"Page {page_number} failed with a non-retryable error, not retrying")
+                break
+        
+        # Halaman yang tidak berhasil di level mana pun tidak punya extraction level
+        page_level = level if page_result.status == TaskStatus.COMPLETED else None
+        if len(attempts) == 1:
+            return page_result if page_level else page_result.model_copy(update={"extraction_level": None})
+        
+        # Waktu attempt gagal dan backoff dicatat sebagai stage "retry" supaya profile job tetap lengkap
+        total_time = time.time() - start_time
+        if page_level:
+            logger.info(f"Page {page_number} recovered at level {page_level.value} after {len(attempts)} attempts")
+        return page_result.model_copy(update={
+            "extraction_level": page_level,
+            "attempts": attempts,
+            "processing_time": total_time,
+            "timings": {**page_result.timings, "retry": total_time - page_result.processing_time},
+            "stats": {**page_result.stats, "retries": len(attempts) - 1}
+        })
+    
+    def get_cached_page(self, task: PageTask, page_number: int) -> Optional[PageResult]:
+        """Get page result dari cache kalau file dan extraction profile sama pernah diproses"""
+        if not task.file_hash or settings.page_cache_ttl <= 0:
+            return None
+        
+        cached_data = redis_queue.get_cached_page(task.file_hash, task.extraction_profile.cache_key(), page_number)
+        if cached_data:
+            self.cache_hits += 1
+            PAGE_CACHE.labels("hit").inc()
+            return PageResult(**cached_data)
+        
+        self.cache_misses += 1
+        PAGE_CACHE.labels("miss").inc()
+        return None
+    
+    def process_task(self, task: PageTask, isolate: bool = True) -> TaskResult:
+        """Process task dari queue; isolate=False menjalankan halaman inline (misal untuk profiling)"""
         logger.info(f"Processing task {task.task_id} for pages {task.page_numbers}")
         
         page_results = []
         
-        for page_number in task.page_numbers:
+        for index, page_number in enumerate(task.page_numbers):
+            # Check cancellation flag di antara halaman supaya bisa berhenti lebih awal
+            if redis_queue.is_job_cancelled(task.job_id):
+                remaining_pages = task.page_numbers[index:]
+                logger.info(f"Job {task.job_id} cancelled, skipping pages {remaining_pages}")
+                for remaining_page in remaining_pages:
+                    page_results.append(PageResult(
+                        page_number=remaining_page,
+                        content=[],
+                        processing_time=0,
+                        status=TaskStatus.CANCELLED,
+                        error_message="Job cancelled"
+                    ))
+                break
+            
             try:
-                page_result = self.process_page(task.pdf_path, page_number)
+                cache_start = time.time()
+                page_result = self.get_cached_page(task, page_number)
+                if page_result:
+                    # Timing asli diganti waktu lookup cache supaya profile job mencerminkan kerja yang benar-benar dilakukan
+                    cache_seconds = time.time() - cache_start
+                    page_result = page_result.model_copy(update={
+                        "processing_time": cache_seconds,
+                        "timings": {"cache": cache_seconds},
+                        "stats": {**page_result.stats, "cache_hit": 1}
+                    })
+                    page_results.append(page_result)
+                    logger.info(f"Page {page_number} served from cache")
+                    continue
+                
+                page_result = self.run_page_with_retry(task, page_number, isolate)
                 page_results.append(page_result)
                 logger.info(f"Completed page {page_number} in {page_result.processing_time:.2f}s")
                 
+                # Hasil degraded tidak di-cache, request berikutnya mencoba ekstraksi full lagi
+                if (task.file_hash and page_result.status == TaskStatus.COMPLETED
+                        and page_result.extraction_level == ExtractionLevel.FULL):
+                    redis_queue.set_cached_page(
+                        task.file_hash, task.extraction_profile.cache_key(), page_number, page_result.model_dump()
+                    )
+                
             except Exception as e:
                 logger.error(f"Failed to process page {page_number}: {e}")
                 # Add failed result
@@ -385,11 +928,52 @@ class PDFExtractor:
             worker_id=self.worker_id
         )
 
+def _kill_executor_processes(executor: ProcessPoolExecutor) -> bool:
+    """Kill semua process ProcessPoolExecutor; False kalau process-nya tidak bisa diakses
+    
+    ProcessPoolExecutor baru punya kill_workers() di Python 3.14. Sebelumnya satu-satunya cara
+    adalah atribut private _processes (dict pid -> Process) milik CPython, jadi aksesnya
+    dibatasi di sini dan dicek dulu keberadaannya.
+    """
+    if hasattr(executor, "kill_workers"):
+        executor.kill_workers()
+        return True
+    processes = getattr(executor, "_processes", None)
+    if not isinstance(processes, dict):
+        return False
+    for process in list(processes.values()):
+        process.kill()
+    return True
+
+# Extractor di dalam process executor halaman, dibuat sekali per process (model OCR di-load sekali)
+_isolated_extractor: Optional[PDFExtractor] = None
+
+def _init_page_process():
+    """Signal shutdown hanya ditangani worker; halaman yang sedang jalan diselesaikan dulu"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def _process_page_isolated(pdf_path: str, page_number: int, profile: ExtractionProfile) -> PageResult:
+    global _isolated_extractor
+    if _isolated_extractor is None:
+        _isolated_extractor = PDFExtractor()
+    return _isolated_extractor.process_page(pdf_path, page_number, profile, observe=False)
+
 class PDFWorker:
     def __init__(self):
         self.extractor = PDFExtractor()
         self.running = True
         
+        # 💓 State untuk heartbeat
+        self.started_at = datetime.now()
+        self.current_task: Optional[PageTask] = None
+        self.current_task_started_at: Optional[datetime] = None
+        self.tasks_processed = 0
+        self.pages_processed = 0
+        self.throughput = ThroughputTracker(settings.throughput_window_seconds, 0.0)
+        self.process = psutil.Process()
+        self._heartbeat_stop = threading.Event()
+        
         # Setup signal handlers untuk graceful shutdown
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
@@ -399,6 +983,141 @@ class PDFWorker:
         logger.info(f"Received signal {signum}, shutting down gracefully...")
         self.running = False
     
+    def process_and_report(self, task: PageTask) -> bool:
+        """Process satu task dan kirim result ke master; False kalau result tidak terkirim"""
+        # 🔭 Waktu task menunggu di queue sejak di-enqueue master (termasuk subtask sebelumnya dalam bundle)
+        tracer.record_span(
+            "queue_wait", task.created_at.timestamp(), time.time(),
+            parent=task.traceparent, job_id=task.job_id, task_id=task.task_id
+        )
+        
+        # Skip task dari job yang sudah di-cancel
+        if redis_queue.is_job_cancelled(task.job_id):
+            logger.info(f"Skipping task {task.task_id}: job {task.job_id} was cancelled")
+            return True
+        
+        with tracer.span(
+            "process_task", parent=task.traceparent,
+            job_id=task.job_id, task_id=task.task_id, pages=len(task.page_numbers), worker_id=self.extractor.worker_id
+        ) as task_span:
+            # Process task (🔬 dengan profiler kalau diminta job atau kena sampling)
+            if should_profile_task(task.profiling, settings.profiling_sample_rate):
+                result = self.profile_task(task)
+            else:
+                result = self.extractor.process_task(task)
+            result.traceparent = task_span.traceparent
+            
+            # Send result back (stage serialize = serialize + push ke result queue)
+            with STAGE_SECONDS.labels("serialize").time(), tracer.span("push_result"):
+                success = redis_queue.push_result(result)
+        if success:
+            logger.info(f"Result sent for task {task.task_id}")
+        else:
+            logger.error(f"Failed to send result for task {task.task_id}")
+        return success
+    
+    def process_bundle(self, task: PageTask) -> bool:
+        """Process task (atau semua subtask bundle); False begitu ada result yang tidak terkirim"""
+        # Bundle berisi beberapa dokumen kecil, masing-masing diproses dan di-report sendiri
+        for subtask in task.bundle or [task]:
+            self.current_task = subtask
+            self.current_task_started_at = datetime.now()
+            if not self.process_and_report(subtask):
+                return False
+            self.tasks_processed += 1
+            self.pages_processed += len(subtask.page_numbers)
+            self.throughput.record(len(subtask.page_numbers))
+        return True
+    
+    def release_failed_task(self, task: PageTask) -> bool:
+        """Task yang result-nya tidak terkirim dikembalikan ke queue (dihitung sebagai requeue)
+        
+        Return False kalau task tetap di processing_queue:{worker_id}: requeue sudah habis atau Redis
+        tidak bisa dihubungi. Worker lalu berhenti tanpa deregister, dan master me-requeue atau
+        mem-fail task setelah heartbeat expire (lihat requeue_dead_workers).
+        """
+        if task.requeue_count >= settings.max_task_requeues:
+            return False
+        # Halaman subtask yang sudah sempat di-report tidak dihitung dua kali oleh master (set_job_pages)
+        task.requeue_count += 1
+        return redis_queue.requeue_task(task)
+    
+    def profile_task(self, task: PageTask) -> TaskResult:
+        """Process task di bawah cProfile + tracemalloc dan simpan artifact sebagai payload job"""
+        logger.info(f"Profiling task {task.task_id}")
+        profiler = TaskProfiler(settings.profiling_top, settings.profiling_traceback_frames)
+        with profiler:
+            # Inline supaya cProfile/tracemalloc melihat ekstraksi, bukan hanya menunggu process executor
+            result = self.extractor.process_task(task, isolate=False)
+        
+        for extension, data in profiler.artifacts().items():
+            name = f"profile-{task.task_id}.{extension}"
+            if redis_queue.set_job_payload(task.job_id, name, data):
+                result.profile_artifacts.append(name)
+        return result
+    
+    def rss_bytes(self) -> int:
+        """RSS worker termasuk process executor halaman (model OCR dan image di-decode di sana)"""
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss
+    
+    def build_heartbeat(self) -> WorkerHeartbeat:
+        task = self.current_task
+        if task:
+            status = "busy" if self.running else "draining"
+        else:
+            status = "idle" if self.running else "draining"
+        return WorkerHeartbeat(
+            worker_id=self.extractor.worker_id,
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            status=status,
+            started_at=self.started_at,
+            current_task_id=task.task_id if task else None,
+            current_job_id=task.job_id if task else None,
+            current_task_pages=len(task.page_numbers) if task else 0,
+            current_task_started_at=self.current_task_started_at if task else None,
+            tasks_processed=self.tasks_processed,
+            pages_processed=self.pages_processed,
+            pages_per_second=self.throughput.pages_per_second(),
+            rss_bytes=self.rss_bytes(),
+            cpu_percent=self.process.cpu_percent(interval=None),
+            cache_hits=self.extractor.cache_hits,
+            cache_misses=self.extractor.cache_misses
+        )
+    
+    def send_heartbeat(self):
+        heartbeat = self.build_heartbeat()
+        redis_queue.set_worker_heartbeat(heartbeat.worker_id, heartbeat.model_dump(), settings.worker_heartbeat_ttl)
+    
+    def heartbeat_loop(self):
+        """Thread terpisah supaya heartbeat tetap jalan selama halaman yang lama (misal OCR) diproses"""
+        while not self._heartbeat_stop.wait(settings.worker_heartbeat_interval):
+            try:
+                self.send_heartbeat()
+            except Exception as e:
+                logger.error(f"Error sending heartbeat: {e}")
+    
+    def memory_exceeded(self) -> bool:
+        """RSS worker melewati WORKER_MAX_RSS_MB (misal fragmentasi setelah image besar)"""
+        if not settings.worker_max_rss_mb:
+            return False
+        rss_mb = self.rss_bytes() / (1024 * 1024)
+        if rss_mb > settings.worker_max_rss_mb:
+            logger.warning(f"Worker RSS {rss_mb:.0f}MB exceeds WORKER_MAX_RSS_MB={settings.worker_max_rss_mb}, restarting")
+            return True
+        return False
+    
+    def restart(self):
+        """Ganti process dengan worker baru (PID sama, worker_id baru) supaya memory kembali bersih"""
+        tracer.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+    
     def run(self):
         """Main worker loop"""
         logger.info(f"Worker {self.extractor.worker_id} started")
@@ -414,23 +1133,49 @@ class PDFWorker:
             logger.error("Cannot connect to Redis, exiting...")
             sys.exit(1)
         
+        # 📊 Expose Prometheus metrics worker
+        if settings.worker_metrics_port:
+            try:
+                start_http_server(settings.worker_metrics_port, registry=worker_registry)
+                logger.info(f"Worker metrics available on port {settings.worker_metrics_port}")
+            except OSError as e:
+                logger.warning(f"Worker metrics server not started on port {settings.worker_metrics_port}: {e}")
+        
+        # 💓 Register worker dan mulai heartbeat sebelum mengambil task pertama
+        worker_id = self.extractor.worker_id
+        self.send_heartbeat()
+        heartbeat_thread = threading.Thread(target=self.heartbeat_loop, name="heartbeat", daemon=True)
+        heartbeat_thread.start()
+        
+        restart = False
+        stranded = False  # Task belum di-ack: worker tidak deregister supaya master mendeteksinya sebagai worker mati
         while self.running:
             try:
-                # Get task dari queue
-                task = redis_queue.get_task(timeout=5)
+                # Get task dari queue; task di-hold di processing_queue:{worker_id} sampai di-ack
+                task = redis_queue.get_task(timeout=5, worker_id=worker_id)
                 
                 if task:
                     logger.info(f"Received task {task.task_id}")
                     
-                    # Process task
-                    result = self.extractor.process_task(task)
+                    try:
+                        reported = self.process_bundle(task)
+                    except Exception as e:
+                        logger.error(f"Error processing task {task.task_id}: {e}")
+                        reported = False
+                    finally:
+                        self.current_task = None
                     
-                    # Send result back
-                    success = redis_queue.push_result(result)
-                    if success:
-                        logger.info(f"Result sent for task {task.task_id}")
-                    else:
-                        logger.error(f"Failed to send result for task {task.task_id}")
+                    # Ack hanya setelah semua result terkirim (atau task sudah kembali di queue)
+                    if not reported and not self.release_failed_task(task):
+                        logger.error(f"Task {task.task_id} left in processing queue, stopping worker so the master requeues it")
+                        stranded = True
+                        break
+                    redis_queue.ack_task(worker_id)
+                    
+                    # 🧠 Task sudah di-ack, jadi restart di sini tidak kehilangan task
+                    if self.memory_exceeded():
+                        restart = True
+                        break
                         
                 else:
                     # No task available, continue loop
@@ -443,7 +1188,19 @@ class PDFWorker:
                 logger.error(f"Error in worker loop: {e}")
                 time.sleep(1)  # Wait before retrying
         
+        # Deregister supaya master tidak menganggap worker ini mati
+        self._heartbeat_stop.set()
+        heartbeat_thread.join(timeout=5)
+        if not stranded:
+            redis_queue.remove_worker(worker_id)
+        self.extractor.close()
+        
+        # Restart dibatalkan kalau worker sekaligus diminta berhenti (SIGTERM selama task terakhir)
+        if restart and self.running:
+            self.restart()
         logger.info(f"Worker {self.extractor.worker_id} stopped")
+        if stranded:
+            sys.exit(1)
 
 if __name__ == "__main__":
     worker = PDFWorker()
@@ -0,0 +1,354 @@
+"""
+Supervisor worker lokal: spawn dan retire proses PDFWorker di satu host berdasarkan
+queue depth, umur backlog dan headroom CPU/RAM.
+
+Worker di-retire dengan SIGTERM (graceful shutdown worker: task yang sedang jalan
+diselesaikan dulu), dan hanya worker yang heartbeat-nya idle yang dipilih untuk scale down.
+
+Usage:
+    python worker_app/supervisor.py [--min-workers 1] [--max-workers 4]
+"""
+
+import argparse
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+# Import shared modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.config import settings
+from shared.redis_queue import redis_queue
+from shared.metrics import (
+    supervisor_registry, SUPERVISOR_WORKERS, SUPERVISOR_DESIRED_WORKERS, SUPERVISOR_QUEUE_DEPTH,
+    SUPERVISOR_BACKLOG_AGE, SUPERVISOR_DECISIONS, SUPERVISOR_BLOCKED
+)
+from prometheus_client import start_http_server
+from loguru import logger
+
+# Configure logging
+logger.add(os.path.join(settings.logs_dir, "supervisor.log"), rotation="500 MB", level=settings.log_level)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+class ScalingDecision:
+    """Hasil satu evaluasi: action scale_up / scale_down / none"""
+
+    def __init__(self, action: str = "none", count: int = 0, reason: str = "", desired: int = 0, blocked: Optional[str] = None):
+        self.action = action
+        self.count = count
+        self.reason = reason
+        self.desired = desired
+        self.blocked = blocked  # Alasan scale up yang diinginkan tapi tidak dijalankan
+
+    def __repr__(self) -> str:
+        return f"ScalingDecision({self.action}, count={self.count}, reason={self.reason}, desired={self.desired}, blocked={self.blocked})"
+
+class ScalingPolicy:
+    """Tentukan jumlah worker dari kondisi queue dan host; tidak punya side effect selain timestamp cooldown"""
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        tasks_per_worker: int,
+        max_backlog_age: float,
+        scale_up_step: int,
+        scale_up_cooldown: float,
+        scale_down_cooldown: float,
+        max_cpu_percent: float,
+        min_free_memory_mb: float
+    ):
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers)
+        self.tasks_per_worker = max(tasks_per_worker, 1)
+        self.max_backlog_age = max_backlog_age
+        self.scale_up_step = max(scale_up_step, 1)
+        self.scale_up_cooldown = scale_up_cooldown
+        self.scale_down_cooldown = scale_down_cooldown
+        self.max_cpu_percent = max_cpu_percent
+        self.min_free_memory_mb = min_free_memory_mb
+        self.last_scale_up: Optional[float] = None
+        self.last_scale_event: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, min_workers: Optional[int] = None, max_workers: Optional[int] = None) -> "ScalingPolicy":
+        return cls(
+            min_workers=settings.supervisor_min_workers if min_workers is None else min_workers,
+            max_workers=settings.supervisor_max_workers if max_workers is None else max_workers,
+            tasks_per_worker=settings.supervisor_tasks_per_worker,
+            max_backlog_age=settings.supervisor_max_backlog_age,
+            scale_up_step=settings.supervisor_scale_up_step,
+            scale_up_cooldown=settings.supervisor_scale_up_cooldown,
+            scale_down_cooldown=settings.supervisor_scale_down_cooldown,
+            max_cpu_percent=settings.supervisor_max_cpu_percent,
+            min_free_memory_mb=settings.supervisor_min_free_memory_mb
+        )
+
+    def desired_workers(self, queue_depth: int, backlog_age: float, running: int) -> Tuple[int, str]:
+        """(jumlah worker yang diinginkan sebelum dibatasi max_workers, alasan)"""
+        desired = math.ceil(queue_depth / self.tasks_per_worker)
+        reason = "queue_depth"
+        # Queue pendek tapi task tertua sudah melewati SLO (halaman lambat, misal OCR): tambah satu worker
+        if backlog_age > self.max_backlog_age and desired <= running:
+            desired = running + 1
+            reason = "backlog_age"
+        return max(desired, self.min_workers), reason
+
+    def _elapsed(self, since: Optional[float], now: float) -> float:
+        return math.inf if since is None else now - since
+
+    def decide(
+        self,
+        now: float,
+        running: int,
+        idle: int,
+        queue_depth: int,
+        backlog_age: float,
+        cpu_percent: float,
+        available_memory_mb: float,
+        worker_memory_mb: float
+    ) -> ScalingDecision:
+        wanted, reason = self.desired_workers(queue_depth, backlog_age, running)
+        desired = min(wanted, self.max_workers)
+
+        # Jumlah minimum selalu dijaga (misal worker crash), tanpa cooldown dan cek headroom
+        if running < self.min_workers:
+            return ScalingDecision("scale_up", self.min_workers - running, "min_workers", desired)
+
+        if desired > running:
+            if self._elapsed(self.last_scale_up, now) < self.scale_up_cooldown:
+                return ScalingDecision(desired=desired, blocked="cooldown")
+            if cpu_percent >= self.max_cpu_percent:
+                # Worker tambahan hanya berebut CPU yang sama
+                return ScalingDecision(desired=desired, blocked="cpu")
+            memory_fit = int((available_memory_mb - self.min_free_memory_mb) // max(worker_memory_mb, 1))
+            if memory_fit <= 0:
+                return ScalingDecision(desired=desired, blocked="memory")
+            count = min(desired - running, self.scale_up_step, memory_fit)
+            return ScalingDecision("scale_up", count, reason, desired)
+
+        if wanted > self.max_workers:
+            return ScalingDecision(desired=desired, blocked="max_workers")
+
+        if desired < running and backlog_age <= self.max_backlog_age:
+            if self._elapsed(self.last_scale_event, now) < self.scale_down_cooldown:
+                return ScalingDecision(desired=desired)
+            count = min(running - desired, idle)
+            if count > 0:
+                return ScalingDecision("scale_down", count, "idle", desired)
+
+        return ScalingDecision(desired=desired)
+
+    def record(self, decision: ScalingDecision, now: float):
+        """Catat waktu scaling untuk cooldown"""
+        if decision.action == "scale_up":
+            self.last_scale_up = now
+        if decision.action != "none":
+            self.last_scale_event = now
+
+class ManagedWorker:
+    """Satu proses worker yang di-spawn supervisor"""
+
+    def __init__(self, process: subprocess.Popen, slot: int):
+        self.process = process
+        self.slot = slot  # Index untuk port metrics worker
+        self.started_at = time.monotonic()
+        self.drain_started_at: Optional[float] = None
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def draining(self) -> bool:
+        return self.drain_started_at is not None
+
+class WorkerSupervisor:
+    def __init__(self, policy: ScalingPolicy):
+        self.policy = policy
+        self.workers: List[ManagedWorker] = []
+        self.hostname = socket.gethostname()
+        self.running = True
+        self._stop = threading.Event()
+
+        # Setup signal handlers untuk graceful shutdown (semua worker di-drain)
+        signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+
+    def signal_handler(self, signum, frame):
+        """Handle shutdown signals"""
+        logger.info(f"Received signal {signum}, draining workers...")
+        self.running = False
+        self._stop.set()
+
+    def spawn_worker(self):
+        used_slots = {worker.slot for worker in self.workers}
+        slot = next(index for index in range(len(self.workers) + 1) if index not in used_slots)
+
+        env = os.environ.copy()
+        # Setiap worker butuh port metrics sendiri di host yang sama
+        env["WORKER_METRICS_PORT"] = str(settings.worker_metrics_port + slot) if settings.worker_metrics_port else "0"
+        process = subprocess.Popen([sys.executable, WORKER_SCRIPT], cwd=str(settings.project_root), env=env)
+        self.workers.append(ManagedWorker(process, slot))
+        logger.info(f"Spawned worker pid {process.pid} (slot {slot})")
+
+    def retire_worker(self, worker: ManagedWorker, now: float):
+        """SIGTERM: worker menyelesaikan task yang sedang jalan lalu deregister sendiri"""
+        worker.drain_started_at = now
+        try:
+            worker.process.send_signal(signal.SIGTERM)
+            logger.info(f"Draining worker pid {worker.pid}")
+        except ProcessLookupError:
+            pass
+
+    def reap_workers(self, now: float):
+        """Buang worker yang sudah exit; kill worker yang drain-nya melewati timeout"""
+        for worker in list(self.workers):
+            exit_code = worker.process.poll()
+            if exit_code is not None:
+                self.workers.remove(worker)
+                if worker.draining:
+                    logger.info(f"Worker pid {worker.pid} drained (exit code {exit_code})")
+                else:
+                    logger.warning(f"Worker pid {worker.pid} exited unexpectedly with code {exit_code}")
+            elif worker.draining and now - worker.drain_started_at > settings.supervisor_drain_timeout:
+                # Task in-flight tetap di processing_queue:{worker_id}, master me-requeue setelah heartbeat expire
+                logger.warning(f"Worker pid {worker.pid} did not drain in {settings.supervisor_drain_timeout}s, killing")
+                worker.process.kill()
+
+    def worker_heartbeats(self) -> Dict[int, dict]:
+        """Heartbeat worker milik supervisor ini, per pid"""
+        pids = {worker.pid for worker in self.workers}
+        return {
+            heartbeat["pid"]: heartbeat
+            for heartbeat in redis_queue.get_workers().values()
+            if heartbeat and heartbeat["hostname"] == self.hostname and heartbeat["pid"] in pids
+        }
+
+    def worker_memory_mb(self, heartbeats: Dict[int, dict]) -> float:
+        """Estimasi RAM satu worker baru: RSS worker terbesar yang berjalan, atau default dari settings"""
+        rss_values = [heartbeat["rss_bytes"] for heartbeat in heartbeats.values() if heartbeat["rss_bytes"]]
+        if not rss_values:
+            return settings.supervisor_worker_memory_mb
+        return max(rss_values) / (1024 * 1024)
+
+    def evaluate(self):
+        """Satu putaran: reap, ukur kondisi queue dan host, lalu scale"""
+        now = time.monotonic()
+        self.reap_workers(now)
+
+        heartbeats = self.worker_heartbeats()
+        running = [worker for worker in self.workers if not worker.draining]
+        # Worker idle dengan RSS terbesar di-retire duluan (membebaskan RAM paling banyak)
+        idle = sorted(
+            (worker for worker in running if heartbeats.get(worker.pid, {}).get("status") == "idle"),
+            key=lambda worker: heartbeats[worker.pid]["rss_bytes"],
+            reverse=True
+        )
+        queue_depth = redis_queue.get_queue_depth()
+        backlog_age = redis_queue.get_backlog_age()
+
+        decision = self.policy.decide(
+            now,
+            running=len(running),
+            idle=len(idle),
+            queue_depth=queue_depth,
+            backlog_age=backlog_age,
+            cpu_percent=psutil.cpu_percent(interval=None),
+            available_memory_mb=psutil.virtual_memory().available / (1024 * 1024),
+            worker_memory_mb=self.worker_memory_mb(heartbeats)
+        )
+
+        if decision.action == "scale_up":
+            logger.info(f"Scaling up by {decision.count} ({decision.reason}): queue_depth={queue_depth}, backlog_age={backlog_age:.1f}s")
+            for _ in range(decision.count):
+                self.spawn_worker()
+        elif decision.action == "scale_down":
+            logger.info(f"Scaling down by {decision.count} ({decision.reason}): queue_depth={queue_depth}")
+            for worker in idle[:decision.count]:
+                self.retire_worker(worker, now)
+        elif decision.blocked:
+            SUPERVISOR_BLOCKED.labels(decision.blocked).inc()
+            logger.debug(f"Scale up to {decision.desired} blocked: {decision.blocked}")
+
+        if decision.action != "none":
+            SUPERVISOR_DECISIONS.labels(decision.action, decision.reason).inc()
+        self.policy.record(decision, now)
+
+        SUPERVISOR_DESIRED_WORKERS.set(decision.desired)
+        SUPERVISOR_QUEUE_DEPTH.set(queue_depth)
+        SUPERVISOR_BACKLOG_AGE.set(backlog_age)
+        draining = sum(1 for worker in self.workers if worker.draining)
+        SUPERVISOR_WORKERS.labels("running").set(len(self.workers) - draining)
+        SUPERVISOR_WORKERS.labels("draining").set(draining)
+
+    def shutdown(self):
+        """Drain semua worker dan tunggu sampai exit (maksimal drain timeout)"""
+        now = time.monotonic()
+        for worker in self.workers:
+            if not worker.draining:
+                self.retire_worker(worker, now)
+
+        deadline = now + settings.supervisor_drain_timeout
+        for worker in self.workers:
+            try:
+                worker.process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Worker pid {worker.pid} did not drain in time, killing")
+                worker.process.kill()
+                worker.process.wait()
+        self.workers = []
+
+    def run(self):
+        """Main supervisor loop"""
+        logger.info(
+            f"Supervisor started on {self.hostname} "
+            f"(workers {self.policy.min_workers}-{self.policy.max_workers})"
+        )
+
+        # Test Redis connection
+        if not redis_queue.ping():
+            logger.error("Cannot connect to Redis, exiting...")
+            sys.exit(1)
+
+        # 📊 Expose Prometheus metrics supervisor
+        if settings.supervisor_metrics_port:
+            try:
+                start_http_server(settings.supervisor_metrics_port, registry=supervisor_registry)
+                logger.info(f"Supervisor metrics available on port {settings.supervisor_metrics_port}")
+            except OSError as e:
+                logger.warning(f"Supervisor metrics server not started on port {settings.supervisor_metrics_port}: {e}")
+
+        # Panggilan pertama cpu_percent(None) selalu 0, baseline untuk evaluasi berikutnya
+        psutil.cpu_percent(interval=None)
+
+        while self.running:
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"Error in supervisor loop: {e}")
+            self._stop.wait(settings.supervisor_interval)
+
+        self.shutdown()
+        logger.info("Supervisor stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Autoscale worker PDF lokal berdasarkan queue depth dan backlog")
+    parser.add_argument("--min-workers", type=int, help="Override SUPERVISOR_MIN_WORKERS")
+    parser.add_argument("--max-workers", type=int, help="Override SUPERVISOR_MAX_WORKERS")
+    args = parser.parse_args()
+
+    supervisor = WorkerSupervisor(ScalingPolicy.from_settings(args.min_workers, args.max_workers))
+    supervisor.run()
+
+if __name__ == "__main__":
+    main()